@@ -0,0 +1,561 @@
+"""Benchmark suite for the Budget Tracker integration.
+
+Runs the integration against a lightweight stand-in for ``hass`` (executor,
+bus, dispatcher, services and config entries) over synthetic datasets and
+reports, as JSON:
+
+- p50/p99 latency of every service registered by ``register_services``
+- ``async_setup_entry`` and sensor platform setup time
+- ``archive_and_reset_data`` duration
+- on-disk size of the storage file
+- optionally (``--memory``), memory retained by the loaded data
+
+Usage (from the repository root, with Home Assistant installed)::
+
+    python benchmarks/bench_budget_tracker.py --preset small medium
+    python benchmarks/bench_budget_tracker.py --accounts 1000 --items 100000 --months 120
+    python benchmarks/bench_budget_tracker.py --preset large --output bench_output.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components import budget_tracker  # noqa: E402
+from custom_components.budget_tracker import sensor as budget_sensor  # noqa: E402
+from custom_components.budget_tracker.categorize import Categorizer, parse_rules  # noqa: E402
+from custom_components.budget_tracker.store import _write_json_file  # noqa: E402
+from custom_components.budget_tracker.const import (  # noqa: E402
+    DOMAIN,
+    CONF_ACCOUNTS,
+    CONF_STORAGE_TYPE,
+    DEFAULT_STORAGE_TYPE,
+    SERVICE_ADD_INCOME_ITEM,
+    SERVICE_ADD_EXPENSE_ITEM,
+    SERVICE_REMOVE_ITEM,
+    SERVICE_ADD_RECURRING_INCOME,
+    SERVICE_ADD_RECURRING_EXPENSE,
+    SERVICE_REMOVE_RECURRING_ITEM,
+    SERVICE_CLEAR_MONTH_ITEMS,
+    SERVICE_TRANSFER,
+    SERVICE_RECATEGORIZE,
+    SERVICE_COMPACT_HISTORY,
+    SERVICE_START_PROFILING,
+    SERVICE_STOP_PROFILING,
+)
+
+# Empty account receiving the transfers when the dataset has a single account
+TRANSFER_ACCOUNT = "bench_transfer"
+# Service calls bounding the profiling sessions of the benchmark
+PROFILING_CALLS = 1_000
+
+# Dataset presets: accounts, total items (current month + history), months of history
+PRESETS = {
+    "small": {"accounts": 1, "items": 1_000, "months": 12},
+    "medium": {"accounts": 10, "items": 10_000, "months": 36},
+    "large": {"accounts": 100, "items": 100_000, "months": 120},
+    "xlarge": {"accounts": 1_000, "items": 100_000, "months": 120},
+}
+
+CATEGORIES = [
+    "Alimentation", "Logement", "Transport", "Loisirs", "Santé",
+    "Travail", "Abonnements", "Énergie", "Impôts", "Divers",
+]
+DESCRIPTIONS = [
+    "Courses", "Loyer", "Essence", "Cinéma", "Pharmacie", "Salaire",
+    "Internet", "Électricité", "Restaurant", "Amazon", "Assurance",
+]
+
+
+# ---------------------- FAKE HASS ----------------------
+class FakeConfig:
+    """Minimal ``hass.config`` exposing ``path``."""
+
+    def __init__(self, config_dir):
+        self.config_dir = config_dir
+
+    def path(self, *parts):
+        return os.path.join(self.config_dir, *parts)
+
+
+class FakeEvent:
+    """Minimal event object passed to bus listeners."""
+
+    def __init__(self, event_type, data):
+        self.event_type = event_type
+        self.data = data
+
+
+class FakeBus:
+    """Event bus counting fired events and dispatching to listeners."""
+
+    def __init__(self):
+        self.listeners = {}
+        self.fired = 0
+
+    def async_fire(self, event_type, event_data=None, *args, **kwargs):
+        self.fired += 1
+        event = FakeEvent(event_type, event_data or {})
+        for listener in list(self.listeners.get(event_type, [])):
+            listener(event)
+
+    def async_listen(self, event_type, listener, *args, **kwargs):
+        self.listeners.setdefault(event_type, []).append(listener)
+
+        def remove():
+            self.listeners[event_type].remove(listener)
+
+        return remove
+
+    def async_listen_once(self, event_type, listener, *args, **kwargs):
+        return self.async_listen(event_type, listener)
+
+
+class FakeServiceCall:
+    """Minimal ``ServiceCall`` carrying validated data."""
+
+    def __init__(self, domain, service, data):
+        self.domain = domain
+        self.service = service
+        self.data = data
+        self.return_response = False
+
+
+class FakeServices:
+    """Service registry validating calls with the registered schema."""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def async_register(self, domain, service, handler, schema=None, *args, **kwargs):
+        self.handlers[(domain, service)] = (handler, schema)
+
+    def async_remove(self, domain, service):
+        self.handlers.pop((domain, service), None)
+
+    def has_service(self, domain, service):
+        return (domain, service) in self.handlers
+
+    def async_services(self):
+        services = {}
+        for domain, service in self.handlers:
+            services.setdefault(domain, {})[service] = None
+        return services
+
+    async def async_call(self, domain, service, data=None, blocking=True, **kwargs):
+        handler, schema = self.handlers[(domain, service)]
+        data = schema(dict(data or {})) if schema else dict(data or {})
+        result = handler(FakeServiceCall(domain, service, data))
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+
+class FakeConfigEntry:
+    """Minimal config entry."""
+
+    def __init__(self, entry_id, data, title="bench"):
+        self.entry_id = entry_id
+        self.data = data
+        self.options = {}
+        self.title = title
+        self.domain = DOMAIN
+
+    def async_on_unload(self, func):
+        return func
+
+    def add_update_listener(self, listener):
+        return lambda: None
+
+
+class FakeConfigEntries:
+    """Config entries manager recording forwarded platforms."""
+
+    def __init__(self, hass):
+        self.hass = hass
+        self.entries = {}
+
+    def async_get_entry(self, entry_id):
+        return self.entries.get(entry_id)
+
+    def async_entries(self, domain=None):
+        return list(self.entries.values())
+
+    def async_update_entry(self, entry, data=None, options=None, **kwargs):
+        if data is not None:
+            entry.data = data
+        if options is not None:
+            entry.options = options
+        return True
+
+    async def async_forward_entry_setups(self, entry, platforms):
+        return True
+
+    async def async_unload_platforms(self, entry, platforms):
+        return True
+
+
+class FakeHass:
+    """Lightweight stand-in for ``HomeAssistant``."""
+
+    def __init__(self, config_dir):
+        self.loop = asyncio.get_running_loop()
+        self.data = {}
+        self.config = FakeConfig(config_dir)
+        self.bus = FakeBus()
+        self.services = FakeServices()
+        self.config_entries = FakeConfigEntries(self)
+
+    async def async_add_executor_job(self, target, *args):
+        return await self.loop.run_in_executor(None, target, *args)
+
+    def async_create_task(self, target, *args, **kwargs):
+        return self.loop.create_task(target)
+
+    def async_create_background_task(self, target, *args, **kwargs):
+        return self.loop.create_task(target)
+
+    def async_run_hass_job(self, job, *args, **kwargs):
+        target = getattr(job, "target", job)
+        result = target(*args)
+        if asyncio.iscoroutine(result):
+            return self.loop.create_task(result)
+        return result
+
+    def async_add_hass_job(self, job, *args, **kwargs):
+        return self.async_run_hass_job(job, *args)
+
+
+# ---------------------- DATASET ----------------------
+def _make_item(rng, when, recurring_id=None):
+    item = {
+        "id": str(uuid.uuid4()),
+        "amount": round(rng.uniform(1, 500), 2),
+        "description": rng.choice(DESCRIPTIONS),
+        "category": rng.choice(CATEGORIES),
+        "timestamp": when.isoformat(),
+    }
+    if recurring_id:
+        item["recurring_id"] = recurring_id
+    return item
+
+
+def _make_recurring(rng, now):
+    return {
+        "id": str(uuid.uuid4()),
+        "amount": round(rng.uniform(10, 1500), 2),
+        "description": rng.choice(DESCRIPTIONS),
+        "category": rng.choice(CATEGORIES),
+        "day_of_month": rng.randint(1, 28),
+        "created_at": now.isoformat(),
+    }
+
+
+def generate_dataset(accounts, items, months, seed=0):
+    """
+    Build a synthetic storage payload.
+
+    ``items`` is spread evenly across accounts and across the current month
+    plus ``months`` archived months, alternating income and expenses.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    per_account = max(1, items // accounts)
+    per_month = max(1, per_account // (months + 1))
+    data = {}
+    for index in range(accounts):
+        recurring_incomes = [_make_recurring(rng, now) for _ in range(2)]
+        recurring_expenses = [_make_recurring(rng, now) for _ in range(3)]
+        history = {}
+        month_start = now.replace(day=1)
+        for _ in range(months):
+            month_start = (month_start - timedelta(days=1)).replace(day=1)
+            income_items = [_make_item(rng, month_start) for _ in range(per_month // 2)]
+            expense_items = [_make_item(rng, month_start) for _ in range(per_month - per_month // 2)]
+            income = sum(i["amount"] for i in income_items)
+            expenses = sum(i["amount"] for i in expense_items)
+            history[f"{month_start.year}_{month_start.month:02d}"] = {
+                "income": income,
+                "expenses": expenses,
+                "balance": income - expenses,
+                "income_items": income_items,
+                "expense_items": expense_items,
+            }
+        income_items = [_make_item(rng, now, r["id"]) for r in recurring_incomes]
+        income_items += [_make_item(rng, now) for _ in range(per_month // 2)]
+        expense_items = [_make_item(rng, now, r["id"]) for r in recurring_expenses]
+        expense_items += [_make_item(rng, now) for _ in range(per_month - per_month // 2)]
+        income = sum(i["amount"] for i in income_items)
+        expenses = sum(i["amount"] for i in expense_items)
+        data[f"account{index}"] = {
+            "income": income,
+            "expenses": expenses,
+            "balance": income - expenses,
+            "income_items": income_items,
+            "expense_items": expense_items,
+            "recurring_incomes": recurring_incomes,
+            "recurring_expenses": recurring_expenses,
+            "history": history,
+        }
+    return data
+
+
+# ---------------------- MEASUREMENTS ----------------------
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (in the samples' unit)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """Summarize a list of durations in seconds as milliseconds."""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def storage_size(hass):
+    """Total on-disk size in bytes of the integration's storage."""
+    path = budget_tracker.get_storage_path(hass)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _current_item_ids(hass, entry, account, key):
+    return [item.id for item in hass.data[DOMAIN][entry.entry_id]["data"][account].get(key, [])]
+
+
+async def _call(hass, service, data):
+    return await hass.services.async_call(DOMAIN, service, data, blocking=True)
+
+
+def _service_scenarios(hass, entry, account):
+    """
+    Return ``service -> (setup, data[, teardown])`` builders.
+
+    ``setup`` is an untimed coroutine preparing state (e.g. adding the item a
+    removal will target); ``data`` builds the timed call payload; the optional
+    ``teardown`` coroutine undoes the call's effect on the dataset, untimed.
+    """
+    state = {}
+
+    async def no_setup():
+        return None
+
+    async def add_target_item():
+        await _call(hass, SERVICE_ADD_EXPENSE_ITEM, {"account": account, "amount": 1, "description": "bench-target"})
+        state["item_id"] = _current_item_ids(hass, entry, account, "expense_items")[-1]
+
+    async def add_target_recurring():
+        await _call(hass, SERVICE_ADD_RECURRING_EXPENSE, {"account": account, "amount": 1, "description": "bench-target"})
+        rules = hass.data[DOMAIN][entry.entry_id]["data"][account]["recurring_expenses"]
+        state["item_id"] = rules[-1].id
+
+    async def add_clear_target():
+        await _call(hass, SERVICE_ADD_EXPENSE_ITEM, {"account": account, "amount": 1, "category": "bench-clear"})
+
+    async def keep_history():
+        account_data = hass.data[DOMAIN][entry.entry_id]["data"][account]
+        state["history"] = dict(account_data.get("history", {}))
+
+    async def restore_history():
+        # Archived months are replaced, never mutated: the copy holds the detailed months
+        hass.data[DOMAIN][entry.entry_id]["data"][account]["history"] = state["history"]
+
+    async def start_profiling():
+        # Bounded by calls only: a duration would arm a timer on the event loop
+        await _call(hass, SERVICE_START_PROFILING, {"calls": PROFILING_CALLS})
+
+    async def stop_profiling():
+        await _call(hass, SERVICE_STOP_PROFILING, {})
+
+    async def install_rules():
+        # Alternate the categories so every timed run rewrites the items of the account
+        state["rules"] = state.get("rules", 0) + 1
+        suffix = state["rules"] % 2
+        rules = "\n".join(
+            f"{description} => {CATEGORIES[index % len(CATEGORIES)]} {suffix}"
+            for index, description in enumerate(DESCRIPTIONS)
+        )
+        hass.data[DOMAIN][entry.entry_id]["categorizer"] = Categorizer(parse_rules(rules))
+
+    amount = {"account": account, "amount": 42.5, "description": "Benchmark", "category": "Divers"}
+    to_account = _transfer_target(hass, entry, account)
+    return {
+        SERVICE_ADD_INCOME_ITEM: (no_setup, lambda: dict(amount)),
+        SERVICE_ADD_EXPENSE_ITEM: (no_setup, lambda: dict(amount)),
+        SERVICE_REMOVE_ITEM: (add_target_item, lambda: {"account": account, "item_id": state["item_id"]}),
+        SERVICE_ADD_RECURRING_INCOME: (no_setup, lambda: dict(amount, day_of_month=28)),
+        SERVICE_ADD_RECURRING_EXPENSE: (no_setup, lambda: dict(amount, day_of_month=28)),
+        SERVICE_REMOVE_RECURRING_ITEM: (add_target_recurring, lambda: {"account": account, "item_id": state["item_id"]}),
+        SERVICE_CLEAR_MONTH_ITEMS: (add_clear_target, lambda: {"account": account, "category": "bench-clear"}),
+        SERVICE_COMPACT_HISTORY: (
+            keep_history,
+            lambda: {"account": account, "keep_months": 1, "archive": False},
+            restore_history,
+        ),
+        SERVICE_START_PROFILING: (no_setup, lambda: {"calls": PROFILING_CALLS}, stop_profiling),
+        SERVICE_STOP_PROFILING: (start_profiling, dict),
+        SERVICE_RECATEGORIZE: (install_rules, lambda: {"account": account, "overwrite": True}),
+        SERVICE_TRANSFER: (no_setup, lambda: {"account": account, "to_account": to_account, "amount": 42.5}),
+    }
+
+
+def _transfer_target(hass, entry, account):
+    """Return the account receiving the benchmark transfers."""
+    return next(name for name in hass.data[DOMAIN][entry.entry_id]["accounts"] if name != account)
+
+
+def _mutation_scenarios(hass, entry, account):
+    """Return ``name -> operations`` batches timed through the ``mutate`` path."""
+    to_account = _transfer_target(hass, entry, account)
+    return {
+        "transfer": lambda: [{"op": "transfer", "account": account, "to_account": to_account, "amount": 42.5}],
+    }
+
+
+async def run_scenario(name, accounts, items, months, iterations, seed=0, memory=False):
+    """Run one dataset through setup, every service and the monthly archive."""
+    with tempfile.TemporaryDirectory(prefix="budget_tracker_bench_") as config_dir:
+        hass = FakeHass(config_dir)
+        payload = generate_dataset(accounts, items, months, seed)
+        await hass.async_add_executor_job(
+            _write_json_file, budget_tracker.get_storage_path(hass), payload
+        )
+        del payload
+        entry_accounts = [f"account{i}" for i in range(accounts)]
+        if len(entry_accounts) < 2:
+            entry_accounts.append(TRANSFER_ACCOUNT)
+        entry = FakeConfigEntry(
+            "bench_entry",
+            {CONF_ACCOUNTS: entry_accounts, CONF_STORAGE_TYPE: DEFAULT_STORAGE_TYPE},
+        )
+        hass.config_entries.entries[entry.entry_id] = entry
+        result = {
+            "scenario": name,
+            "accounts": accounts,
+            "items": items,
+            "months": months,
+            "iterations": iterations,
+            "storage_bytes_initial": storage_size(hass),
+        }
+
+        # The period-end timer is irrelevant to the measurements and needs a real event loop scheduler
+        budget_tracker.async_track_point_in_time = lambda *args, **kwargs: (lambda: None)
+
+        await budget_tracker.async_setup(hass, {})
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        await budget_tracker.async_setup_entry(hass, entry)
+        result["setup_entry_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if memory:
+            # Timing above includes tracemalloc overhead when memory is measured
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["data_memory_bytes"] = current
+            result["setup_peak_memory_bytes"] = peak
+
+        entities = []
+        start = time.perf_counter()
+        await budget_sensor.async_setup_entry(hass, entry, lambda new, *args, **kwargs: entities.extend(new))
+        result["sensor_setup_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        result["entities"] = len(entities)
+
+        account = "account0"
+        scenarios = _service_scenarios(hass, entry, account)
+        services = {}
+        for service in sorted(hass.services.async_services().get(DOMAIN, {})):
+            if service not in scenarios:
+                services[service] = {"skipped": "no benchmark scenario"}
+                continue
+            setup, build, *teardown = scenarios[service]
+            samples = []
+            for _ in range(iterations):
+                await setup()
+                data = build()
+                start = time.perf_counter()
+                await _call(hass, service, data)
+                samples.append(time.perf_counter() - start)
+                for undo in teardown:
+                    await undo()
+            services[service] = summarize(samples)
+        result["services"] = services
+
+        mutations = {}
+        for name, build in _mutation_scenarios(hass, entry, account).items():
+            samples = []
+            for _ in range(iterations):
+                operations = build()
+                start = time.perf_counter()
+                await budget_tracker.async_apply_operations(hass, operations)
+                samples.append(time.perf_counter() - start)
+            mutations[name] = summarize(samples)
+        result["mutations"] = mutations
+
+        samples = []
+        for _ in range(max(1, min(iterations, 3))):
+            start = time.perf_counter()
+            await budget_tracker.archive_and_reset_data(hass, entry, force=True)
+            samples.append(time.perf_counter() - start)
+        result["archive_and_reset"] = summarize(samples)
+
+        result["storage_bytes_final"] = storage_size(hass)
+        result["events_fired"] = hass.bus.fired
+        return result
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--preset", nargs="+", choices=sorted(PRESETS), help="Named dataset presets to run")
+    parser.add_argument("--accounts", type=int, help="Number of accounts (custom scenario)")
+    parser.add_argument("--items", type=int, default=10_000, help="Total items across current month and history")
+    parser.add_argument("--months", type=int, default=12, help="Months of archived history")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per service")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for dataset generation")
+    parser.add_argument("--memory", action="store_true", help="Measure memory retained by the loaded data")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    scenarios = []
+    if args.accounts:
+        scenarios.append(("custom", {"accounts": args.accounts, "items": args.items, "months": args.months}))
+    for preset in args.preset or ([] if args.accounts else ["small"]):
+        scenarios.append((preset, PRESETS[preset]))
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    for name, params in scenarios:
+        report["results"].append(
+            await run_scenario(name, iterations=args.iterations, seed=args.seed, memory=args.memory, **params)
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,37 +4,49 @@ Ce module permet de suivre les revenus et dépenses mensuels, avec gestion des c
 """
 
 # Imports
-import asyncio
 import logging
-import os
-import uuid
-from datetime import datetime, timedelta
-import json
-from pathlib import Path
+import time
+from datetime import datetime
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    CONF_NAME, 
     Platform, 
-    STATE_UNKNOWN, 
     EVENT_HOMEASSISTANT_START,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.event import async_track_time_change
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     CONF_ACCOUNTS,
     CONF_STORAGE_TYPE,
-    STORAGE_TYPE_FILE,
+    CONF_NOTIFY_INTERVAL,
+    CONF_HISTORY_DETAIL_MONTHS,
+    CONF_HISTORY_ARCHIVE,
+    CONF_BUDGET_PERIODS,
+    CONF_CATEGORY_RULES,
+    CONF_ANOMALY_THRESHOLD,
+    CONF_CATEGORY_BUDGETS,
+    CONF_BUDGET_THRESHOLDS,
+    CONF_HOUSEHOLD_SENSORS,
+    CONF_ACCOUNT_GROUPS,
+    STORAGE_TYPES,
     DEFAULT_STORAGE_TYPE,
-    SERVICE_SET_INCOME,
-    SERVICE_SET_EXPENSES,
-    SERVICE_RESET_MONTH,
+    DEFAULT_NOTIFY_INTERVAL,
+    DEFAULT_HISTORY_DETAIL_MONTHS,
+    DEFAULT_HISTORY_ARCHIVE,
+    DEFAULT_BUDGET_PERIODS,
+    DEFAULT_CATEGORY_RULES,
+    DEFAULT_ANOMALY_THRESHOLD,
+    DEFAULT_CATEGORY_BUDGETS,
+    DEFAULT_BUDGET_THRESHOLDS,
+    DEFAULT_HOUSEHOLD_SENSORS,
+    DEFAULT_ACCOUNT_GROUPS,
     SERVICE_ADD_INCOME_ITEM,
     SERVICE_ADD_EXPENSE_ITEM,
     SERVICE_REMOVE_ITEM,
@@ -42,23 +54,100 @@ from .const import (
     SERVICE_ADD_RECURRING_EXPENSE,
     SERVICE_REMOVE_RECURRING_ITEM,
     SERVICE_CLEAR_MONTH_ITEMS,
+    SERVICE_START_PROFILING,
+    SERVICE_STOP_PROFILING,
+    SERVICE_COMPACT_HISTORY,
+    SERVICE_TRANSFER,
+    SERVICE_RECATEGORIZE,
     ATTR_ACCOUNT,
     ATTR_AMOUNT,
     ATTR_MONTH,
     ATTR_YEAR,
     ATTR_DESCRIPTION,
     ATTR_ITEM_ID,
-    ATTR_ITEMS_INCOME,
-    ATTR_ITEMS_EXPENSE,
     ATTR_CATEGORY,
-    ATTR_RECURRING_INCOMES,
-    ATTR_RECURRING_EXPENSES,
     ATTR_DAY_OF_MONTH,
     ATTR_END_DATE,
+    ATTR_CALLS,
+    ATTR_DURATION,
+    ATTR_TOP,
+    ATTR_KEEP_MONTHS,
+    ATTR_ARCHIVE,
+    ATTR_IDEMPOTENCY_KEY,
+    ATTR_CHECK_DUPLICATES,
+    ATTR_TO_ACCOUNT,
+    ATTR_OVERWRITE,
+    ATTR_INCLUDE_HISTORY,
     DATA_STORAGE_FILE,
+    DATA_NOTIFIER,
+    DATA_SEARCH,
+    DATA_DEDUP,
+    DATA_ANOMALY,
+    DATA_SPENDING,
+    DATA_HOUSEHOLD,
     EVENT_MONTH_CHANGED,
+    EVENT_ANOMALY,
+    EVENT_THRESHOLD_CROSSED,
 )
-from .frontend_integration import setup_frontend_integration, notify_frontend
+from .anomaly import (
+    STATS_KEY,
+    category_totals,
+    get_anomaly_detector,
+    history_category_stats,
+    update_category_stats,
+)
+from .categorize import Categorizer, parse_rules, recategorize_account
+from .dashboard import ViewCache
+from .forecast import ForecastCache
+from .envelopes import (
+    account_budgets,
+    crossed_thresholds,
+    envelope_state,
+    envelope_unique_id,
+    parse_budgets,
+    parse_thresholds,
+)
+from .dedup import async_update_ingestion_guard, content_key, get_ingestion_guard
+from .household import (
+    HOUSEHOLD,
+    TOTALS,
+    async_signal_household,
+    async_update_household,
+    get_household,
+    household_unique_id,
+    parse_groups,
+)
+from .ids import new_id
+from .frontend_integration import (
+    async_bump_revision,
+    async_notify_data_update,
+    setup_frontend_integration,
+)
+from .instrumentation import BudgetMetrics, get_entry_metrics, instrumented
+from .profiler import async_start_profiling, async_stop_profiling, get_active_profiler
+from .models import (
+    ATTR_TRANSFERS_IN,
+    ATTR_TRANSFERS_OUT,
+    BudgetItem,
+    RecurringRule,
+    items_to_dicts,
+    transfer_id,
+    update_totals,
+)
+from .periods import (
+    PERIOD_START,
+    account_period,
+    parse_period_id,
+    parse_periods,
+    stored_period_start,
+)
+from .mutations import OP_REMOVE, OP_TRANSFER, MutationBatch, MutationError
+from .retention import async_compact_history
+from .ranges import RangeIndex, build_index
+from .schema import compact_month
+from .search import async_update_search_index
+from .spending import async_update_spending_totals, get_spending_totals
+from .store import StoresView, async_flush_stores, get_store
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [Platform.SENSOR]
@@ -70,33 +159,267 @@ def get_storage_path(hass: HomeAssistant) -> str:
     """
     return hass.config.path(DATA_STORAGE_FILE)
 
-def _read_json_file(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        return json.load(file)
+@callback
+def _async_dispatch_data_updated(
+    hass: HomeAssistant, entry_id: str, account: str = None, items=None, reindex: bool = True
+):
+    """
+    Notifie les capteurs d'une entrée que les données ont changé (mesure le coût du dispatch).
+    Incrémente la révision du compte (ou de tous les comptes de l'entrée) pour les snapshots websocket
+    et met en file l'événement (regroupé et limité en fréquence) destiné au frontend.
+    Met à jour l'index de recherche, celui des doublons et les totaux de dépenses par catégorie
+    (éléments ``items`` seulement, sinon reconstruction), sauf si l'appelant l'a déjà fait
+    (``reindex=False``), et vérifie les seuils des enveloppes dont le total a changé.
+    Applique la variation des totaux du compte aux totaux consolidés (foyer et groupes).
+    """
+    async_bump_revision(hass, entry_id, account)
+    async_update_household(hass, entry_id, account)
+    if reindex:
+        async_update_search_index(hass, entry_id, account, items)
+        async_update_ingestion_guard(hass, entry_id, account, items)
+        _async_check_budgets(hass, entry_id, async_update_spending_totals(hass, entry_id, account, items))
+    async_notify_data_update(hass, entry_id, account, items)
+    metrics = get_entry_metrics(hass, entry_id)
+    profiler = get_active_profiler(hass)
+    if metrics is None and profiler is None:
+        async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+        return
+    if profiler is not None:
+        profiler.enter()
+    start = time.perf_counter()
+    try:
+        async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+    finally:
+        if metrics is not None:
+            metrics.record("dispatch", time.perf_counter() - start)
+            metrics.increment("dispatches")
+        if profiler is not None:
+            profiler.exit()
 
-def _write_json_file(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=2)
 
 
+def get_entry_accounts(entry: ConfigEntry) -> list:
+    """
+    Retourne les comptes d'une entrée : ceux des options s'ils ont été modifiés, sinon ceux de la configuration initiale.
+    """
+    return list(entry.options.get(CONF_ACCOUNTS, entry.data.get(CONF_ACCOUNTS, ["default"])))
 
-async def remove_device_node_from_storage(hass: HomeAssistant, account_name: str):
+def get_entry_option(entry: ConfigEntry, key: str, default):
     """
-    Remove the node for the account in DATA_STORAGE_FILE if present.
+    Retourne une option de l'entrée, modifiée via les options ou issue de la configuration initiale.
+    """
+    return entry.options.get(key, entry.data.get(key, default))
+
+def get_entry_periods(entry: ConfigEntry) -> dict:
+    """
+    Retourne les périodes budgétaires de l'entrée ({compte ou None: BudgetPeriod}).
+    Une définition invalide est ignorée (mois calendaires).
     """
-    file_path = get_storage_path(hass)
-    if not os.path.exists(file_path):
-        return False
     try:
-        data = await hass.async_add_executor_job(_read_json_file, file_path)
-        if account_name in data:
-            del data[account_name]
-            await hass.async_add_executor_job(_write_json_file, file_path, data)
-            return True
-        return False
-    except Exception as err:
-        _LOGGER.error("Failed to remove account %s from storage: %s", account_name, err)
-        return False
+        return parse_periods(get_entry_option(entry, CONF_BUDGET_PERIODS, DEFAULT_BUDGET_PERIODS))
+    except ValueError as err:
+        _LOGGER.error("Invalid budget periods for %s: %s", entry.title, err)
+        return {}
+
+def get_entry_categorizer(entry: ConfigEntry) -> Categorizer:
+    """
+    Retourne les règles de catégorisation automatique de l'entrée, compilées en un automate
+    Aho-Corasick pour les motifs littéraux et une expression régulière (un lookahead par règle)
+    pour les autres. Des règles invalides sont ignorées.
+    """
+    try:
+        return Categorizer(parse_rules(get_entry_option(entry, CONF_CATEGORY_RULES, DEFAULT_CATEGORY_RULES)))
+    except ValueError as err:
+        _LOGGER.error("Invalid categorization rules for %s: %s", entry.title, err)
+        return Categorizer([])
+
+def get_entry_budgets(entry: ConfigEntry, accounts: list) -> dict:
+    """
+    Retourne les enveloppes budgétaires de chaque compte de l'entrée ({compte: {catégorie: limite}}).
+    Une définition invalide est ignorée (aucune enveloppe).
+    """
+    try:
+        budgets = parse_budgets(get_entry_option(entry, CONF_CATEGORY_BUDGETS, DEFAULT_CATEGORY_BUDGETS))
+    except ValueError as err:
+        _LOGGER.error("Invalid category budgets for %s: %s", entry.title, err)
+        budgets = {}
+    return {account: account_budgets(budgets, account) for account in accounts}
+
+def get_entry_thresholds(entry: ConfigEntry) -> list:
+    """
+    Retourne les seuils d'alerte des enveloppes de l'entrée (pourcentages croissants de la limite).
+    """
+    try:
+        return parse_thresholds(get_entry_option(entry, CONF_BUDGET_THRESHOLDS, DEFAULT_BUDGET_THRESHOLDS))
+    except ValueError as err:
+        _LOGGER.error("Invalid budget thresholds for %s: %s", entry.title, err)
+        return []
+
+def get_entry_groups(entry: ConfigEntry) -> dict:
+    """
+    Retourne les groupes de comptes de l'entrée ({groupe: [comptes]}).
+    Une définition invalide est ignorée (aucun groupe).
+    """
+    try:
+        return parse_groups(get_entry_option(entry, CONF_ACCOUNT_GROUPS, DEFAULT_ACCOUNT_GROUPS))
+    except ValueError as err:
+        _LOGGER.error("Invalid account groups for %s: %s", entry.title, err)
+        return {}
+
+def _household_keys(entry_id: str, entry_data: dict) -> set:
+    """
+    Retourne les totaux consolidés dont l'entrée crée les capteurs : le foyer (None) si l'option
+    est activée, et chacun de ses groupes ((entrée, groupe)).
+    """
+    keys = {(entry_id, group) for group in entry_data["account_groups"]}
+    if entry_data["household_sensors"]:
+        keys.add(HOUSEHOLD)
+    return keys
+
+@callback
+def _async_refresh_household_groups(hass: HomeAssistant):
+    """
+    Applique aux totaux consolidés les groupes de comptes de toutes les entrées chargées
+    (un même nom de groupe dans deux entrées désigne deux groupes).
+    """
+    groups = {}
+    for entry_id, entry_data in hass.data.get(DOMAIN, {}).items():
+        for group, accounts in entry_data["account_groups"].items():
+            groups[(entry_id, group)] = accounts
+    async_signal_household(hass, get_household(hass).async_set_groups(groups))
+
+@callback
+def _async_check_budgets(hass: HomeAssistant, entry_id: str, changes: dict):
+    """
+    Déclenche budget_tracker_threshold_crossed pour chaque seuil d'enveloppe franchi à la hausse
+    par les totaux de catégorie modifiés ({compte: {catégorie: total précédent}}) : une comparaison
+    du total précédent et du total courant tenu à jour, en O(1) par catégorie modifiée.
+    """
+    entry_data = hass.data[DOMAIN].get(entry_id)
+    if not changes or entry_data is None or not entry_data["budget_thresholds"]:
+        return
+    spending = get_spending_totals(hass)
+    metrics = get_entry_metrics(hass, entry_id)
+    for account, categories in changes.items():
+        budgets = entry_data["budgets"].get(account, {})
+        for category, previous in categories.items():
+            limit = budgets.get(category)
+            if limit is None:
+                continue
+            total = spending.total(account, entry_data["data"].get(account, {}), category)
+            for threshold in crossed_thresholds(limit, entry_data["budget_thresholds"], previous, total):
+                _LOGGER.info("Budget of %s for account %s reached %s%%", category, account, threshold)
+                hass.bus.async_fire(
+                    EVENT_THRESHOLD_CROSSED,
+                    {"account": account, "category": category, "threshold": threshold, **envelope_state(limit, total)},
+                )
+                if metrics is not None:
+                    metrics.increment("events_fired")
+
+def _auto_category(hass: HomeAssistant, entry_id: str, category: str, description: str, amount) -> str:
+    """
+    Retourne la catégorie d'un élément ajouté : celle fournie, sinon celle des règles de
+    catégorisation de l'entrée (chaîne vide si aucune ne s'applique).
+    """
+    if category:
+        return category
+    categorizer = hass.data[DOMAIN][entry_id]["categorizer"]
+    category = categorizer.category(description, amount) if categorizer else None
+    if category is None:
+        return ""
+    metrics = get_entry_metrics(hass, entry_id)
+    if metrics is not None:
+        metrics.increment("items_categorized")
+    return category
+
+@callback
+def _async_schedule_period_end(hass: HomeAssistant, entry: ConfigEntry):
+    """
+    Précalcule la prochaine fin de période de chaque compte de l'entrée et arme un unique
+    minuteur sur la plus proche (le précédent est annulé). Les comptes sans début de période
+    enregistré le reçoivent : celui du dernier archivage (versions précédentes) ou la période en cours.
+    """
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is None:
+        return
+    _async_cancel_period_timer(entry_data)
+    now = dt_util.now()
+    last_reset = entry.data.get("last_reset")
+    period_ends = {}
+    for account in entry_data["accounts"]:
+        period = account_period(entry_data["periods"], account)
+        account_data = entry_data["data"].get(account)
+        if account_data is None:
+            continue
+        if stored_period_start(account_data) is None:
+            try:
+                reference = datetime.fromisoformat(last_reset) if last_reset else now
+            except ValueError:
+                reference = now
+            account_data[PERIOD_START] = period.start(reference).isoformat()
+        period_ends[account] = period.next_start(now)
+    entry_data["period_ends"] = period_ends
+    if not period_ends:
+        return
+
+    @callback
+    def async_period_ended(_now):
+        entry_data["period_timer"] = None
+        _LOGGER.info("Budget period ended, archiving budget data and resetting")
+        hass.async_create_task(archive_and_reset_data(hass, entry))
+
+    entry_data["period_timer"] = async_track_point_in_time(
+        hass, async_period_ended, min(period_ends.values())
+    )
+
+@callback
+def _async_cancel_period_timer(entry_data: dict):
+    """
+    Annule le minuteur de fin de période d'une entrée.
+    """
+    if entry_data["period_timer"] is not None:
+        entry_data["period_timer"]()
+        entry_data["period_timer"] = None
+
+async def async_apply_operations(hass: HomeAssistant, operations: list) -> dict:
+    """
+    Applique une liste d'opérations (ajout, modification, suppression, récurrents, virements)
+    de manière atomique, sur les comptes de toutes les entrées : une opération invalide lève
+    MutationError sans rien modifier.
+    Retourne les nouveaux totaux et les éléments modifiés de chaque compte touché.
+    Les comptes peuvent appartenir à des entrées de types de stockage différents : chaque
+    stockage concerné est alors écrit une fois.
+    """
+    account_entries = {}
+    account_stores = {}
+    for entry_id, entry_data in hass.data.get(DOMAIN, {}).items():
+        for account in entry_data["accounts"]:
+            account_entries[account] = entry_id
+            account_stores[account] = get_store(hass, entry_data["storage_type"])
+    batch = MutationBatch(
+        StoresView(account_stores),
+        categorize=lambda account, description, amount: _auto_category(
+            hass, account_entries[account], "", description, amount
+        ) or None,
+    )
+    for operation in operations:
+        for key in ("account", "to_account"):
+            account = operation.get(key)
+            if account is not None and account not in account_entries:
+                raise MutationError(f"Account {account} not found")
+        batch.apply(operation)
+
+    accounts = batch.commit()
+    # One write per store holding a touched account
+    saved = {}
+    for account in accounts:
+        saved.setdefault(id(account_stores[account]), account_entries[account])
+    for entry_id in saved.values():
+        await save_data(hass, hass.config_entries.async_get_entry(entry_id))
+    for account in batch.accounts:
+        _async_dispatch_data_updated(hass, account_entries[account], account, batch.touched_ids(account))
+    return accounts
+
 
 # ---------------------- SETUP PRINCIPAL ----------------------
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -118,23 +441,36 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """
     # Load or create data storage
     storage_type = entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
-    accounts = entry.data.get(CONF_ACCOUNTS, ["default"])
+    accounts = get_entry_accounts(entry)
 
-    # Create data structure
+    # Create data structure: a view over this entry's accounts in the shared store
+    metrics = BudgetMetrics()
     hass.data[DOMAIN][entry.entry_id] = {
         "storage_type": storage_type,
         "accounts": accounts,
-        "data": {account: {
-            "income": 0, 
-            "expenses": 0, 
-            "balance": 0, 
-            "income_items": [], 
-            "expense_items": [], 
-            "recurring_incomes": [],
-            "recurring_expenses": [],
-            "history": {}
-        } for account in accounts},
+        "data": get_store(hass, storage_type).view(accounts),
+        "metrics": metrics,
+        "revisions": {},
+        "views": ViewCache(metrics),
+        "forecasts": ForecastCache(metrics),
+        "ranges": RangeIndex(metrics),
+        "notify_interval": get_entry_option(entry, CONF_NOTIFY_INTERVAL, DEFAULT_NOTIFY_INTERVAL),
+        "history_detail_months": get_entry_option(
+            entry, CONF_HISTORY_DETAIL_MONTHS, DEFAULT_HISTORY_DETAIL_MONTHS
+        ),
+        "history_archive": get_entry_option(entry, CONF_HISTORY_ARCHIVE, DEFAULT_HISTORY_ARCHIVE),
+        "periods": get_entry_periods(entry),
+        "categorizer": get_entry_categorizer(entry),
+        "anomaly_threshold": get_entry_option(entry, CONF_ANOMALY_THRESHOLD, DEFAULT_ANOMALY_THRESHOLD),
+        "budgets": get_entry_budgets(entry, accounts),
+        "budget_thresholds": get_entry_thresholds(entry),
+        "household_sensors": get_entry_option(entry, CONF_HOUSEHOLD_SENSORS, DEFAULT_HOUSEHOLD_SENSORS),
+        "account_groups": get_entry_groups(entry),
+        # Next period end of each account, and the single timer armed on the nearest one
+        "period_ends": {},
+        "period_timer": None,
     }
+    async_bump_revision(hass, entry.entry_id)
 
     # Load existing data
     await load_data(hass, entry)
@@ -142,42 +478,169 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Synchronize recurring items with current month items
     await sync_recurring_items(hass, entry)
 
+    # Range indexes of the archived periods, extended by each archive from now on
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    for account in accounts:
+        history = dict(entry_data["data"].get(account, {}).get("history", {}))
+        entry_data["ranges"].set(account, await hass.async_add_executor_job(build_index, history))
+
+    # Per-category expense totals, kept up to date by deltas from now on
+    spending = get_spending_totals(hass)
+    for account in accounts:
+        spending.get(account, hass.data[DOMAIN][entry.entry_id]["data"].get(account, {}))
+
+    # Consolidated totals: the accounts of this entry are added once, then maintained by delta
+    _async_refresh_household_groups(hass)
+    async_update_household(hass, entry.entry_id)
+
     # Register services
     register_services(hass)
 
-    # Schedule monthly archive task
-    @callback
-    def check_month_change(now):
-        """Check if month has changed to trigger archive and reset."""
-        # Only run on the first day of the month at 00:00:00
-        if now.day == 1 and now.hour == 0 and now.minute == 0 and now.second == 0:
-            _LOGGER.info("New month detected, archiving budget data and resetting")
-            hass.async_create_task(archive_and_reset_data(hass, entry))
-
-    # Register listener for month change
-    async_track_time_change(
-        hass, check_month_change, hour=0, minute=0, second=0
-    )
+    # Arm the timer of the next period end (one per entry, re-armed after each archive)
+    _async_schedule_period_end(hass, entry)
+    entry.async_on_unload(lambda: _async_cancel_period_timer(entry_data))
 
-    # When HA starts, check if we need to do an initial archive (if the month changed while HA was off)
+    # When HA starts, archive the periods that ended while HA was off
     @callback
     def startup_check(event):
         """Check if we need to archive on startup."""
-        last_reset = entry.data.get("last_reset", "")
-        if last_reset:
-            last_reset_date = datetime.fromisoformat(last_reset)
-            now = datetime.now()
-            # If we're in a different month than last reset and it's not the first day (which would trigger the normal reset)
-            if (last_reset_date.month != now.month or last_reset_date.year != now.year) and not (now.day == 1 and now.hour == 0 and now.minute == 0):
-                _LOGGER.info("Month changed while Home Assistant was off, archiving data")
-                hass.async_create_task(archive_and_reset_data(hass, entry))
+        entry_data = hass.data[DOMAIN].get(entry.entry_id)
+        if entry_data is not None and _due_accounts(entry_data, dt_util.now()):
+            _LOGGER.info("Budget period ended while Home Assistant was off, archiving data")
+            hass.async_create_task(archive_and_reset_data(hass, entry))
     
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, startup_check)
 
+    # Apply option changes (accounts, notification interval) in place
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
+    """
+    Applique les options sans recharger l'entrée : les comptes ajoutés ou supprimés le sont en place
+    (capteurs, routage des services et stockage en une seule écriture).
+    """
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is None:
+        return
+    entry_data["notify_interval"] = get_entry_option(entry, CONF_NOTIFY_INTERVAL, DEFAULT_NOTIFY_INTERVAL)
+    entry_data["history_detail_months"] = get_entry_option(
+        entry, CONF_HISTORY_DETAIL_MONTHS, DEFAULT_HISTORY_DETAIL_MONTHS
+    )
+    entry_data["history_archive"] = get_entry_option(entry, CONF_HISTORY_ARCHIVE, DEFAULT_HISTORY_ARCHIVE)
+    entry_data["categorizer"] = get_entry_categorizer(entry)
+    entry_data["anomaly_threshold"] = get_entry_option(entry, CONF_ANOMALY_THRESHOLD, DEFAULT_ANOMALY_THRESHOLD)
+    entry_data["budget_thresholds"] = get_entry_thresholds(entry)
+    periods = get_entry_periods(entry)
+    accounts = get_entry_accounts(entry)
+    current = entry_data["accounts"]
+    added = [account for account in accounts if account not in current]
+    removed = [account for account in current if account not in accounts]
+    if periods != entry_data["periods"]:
+        entry_data["periods"] = periods
+        entry_data["forecasts"].invalidate()
+        if not added and not removed:
+            _async_schedule_period_end(hass, entry)
+    budgets = get_entry_budgets(entry, accounts)
+    if budgets != entry_data["budgets"]:
+        _async_update_budget_entities(hass, entry, entry_data["budgets"], budgets)
+    household_keys = _household_keys(entry.entry_id, entry_data)
+    entry_data["household_sensors"] = get_entry_option(entry, CONF_HOUSEHOLD_SENSORS, DEFAULT_HOUSEHOLD_SENSORS)
+    entry_data["account_groups"] = get_entry_groups(entry)
+    _async_update_household_entities(hass, entry, household_keys, _household_keys(entry.entry_id, entry_data))
+    if not added and not removed:
+        return
+
+    # Services, websocket commands and the entry's data view all read this list
+    current[:] = accounts
+    await get_store(hass, entry_data["storage_type"]).async_update_accounts(
+        added, removed, get_entry_metrics(hass, entry.entry_id)
+    )
+
+    for account in removed:
+        entry_data["revisions"].pop(account, None)
+        entry_data["views"].invalidate(account)
+        entry_data["forecasts"].forget(account)
+        entry_data["ranges"].invalidate(account)
+        if DATA_SEARCH in hass.data:
+            hass.data[DATA_SEARCH].async_update(account, {}, None)
+        if DATA_DEDUP in hass.data:
+            hass.data[DATA_DEDUP].async_forget(account)
+        if DATA_ANOMALY in hass.data:
+            hass.data[DATA_ANOMALY].async_forget(account)
+        if DATA_SPENDING in hass.data:
+            hass.data[DATA_SPENDING].async_forget(account)
+        async_signal_household(hass, get_household(hass).async_forget(account))
+        _async_remove_account_entities(hass, entry, account)
+    for account in added:
+        async_bump_revision(hass, entry.entry_id, account)
+        get_spending_totals(hass).get(account, entry_data["data"].get(account, {}))
+        async_update_household(hass, entry.entry_id, account)
+    _async_schedule_period_end(hass, entry)
+    if added:
+        async_dispatcher_send(hass, f"{DOMAIN}_accounts_added_{entry.entry_id}", added)
+
+    hass.config_entries.async_update_entry(entry, title=", ".join(accounts))
+    _LOGGER.info("Budget Tracker accounts updated (added: %s, removed: %s)", added, removed)
+
+@callback
+def _async_update_household_entities(hass: HomeAssistant, entry: ConfigEntry, old: set, new: set):
+    """
+    Applique une modification des options de consolidation : les groupes de toutes les entrées
+    sont appliqués aux totaux, les capteurs des totaux consolidés retirés sont supprimés et ceux
+    des nouveaux sont créés.
+    """
+    _async_refresh_household_groups(hass)
+    if old - new:
+        entity_registry = er.async_get(hass)
+        for key in old - new:
+            for kind in TOTALS:
+                entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, household_unique_id(entry.entry_id, key, kind))
+                if entity_id is not None:
+                    entity_registry.async_remove(entity_id)
+    if new - old:
+        async_dispatcher_send(hass, f"{DOMAIN}_household_added_{entry.entry_id}", list(new - old))
+
+@callback
+def _async_update_budget_entities(hass: HomeAssistant, entry: ConfigEntry, old: dict, new: dict):
+    """
+    Applique une modification des enveloppes aux comptes conservés : les capteurs des enveloppes
+    supprimées sont retirés, ceux des nouvelles sont créés, et les limites modifiées sont publiées.
+    """
+    added = []
+    removed = []
+    for account in set(old) & set(new):
+        removed.extend((account, category) for category in old[account] if category not in new[account])
+        added.extend((account, category) for category in new[account] if category not in old[account])
+    if removed:
+        entity_registry = er.async_get(hass)
+        for account, category in removed:
+            entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, envelope_unique_id(account, category))
+            if entity_id is not None:
+                entity_registry.async_remove(entity_id)
+    hass.data[DOMAIN][entry.entry_id]["budgets"] = new
+    if added:
+        async_dispatcher_send(hass, f"{DOMAIN}_budgets_added_{entry.entry_id}", added)
+    async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry.entry_id}")
+
+@callback
+def _async_remove_account_entities(hass: HomeAssistant, entry: ConfigEntry, account: str):
+    """
+    Supprime les capteurs et appareils d'un compte retiré de l'entrée.
+    """
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    for identifier in (f"{entry.entry_id}_{account}", f"{entry.entry_id}_{account}_history"):
+        device = device_registry.async_get_device(identifiers={(DOMAIN, identifier)})
+        if device is None:
+            continue
+        for entity in er.async_entries_for_device(entity_registry, device.id, include_disabled_entities=True):
+            entity_registry.async_remove(entity.entity_id)
+        device_registry.async_remove_device(device.id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """
     Décharge une entrée de configuration et nettoie les données associées.
@@ -187,47 +650,91 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     # Remove data
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-        # Remove storage file if using file storage
-        if entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE) == STORAGE_TYPE_FILE:
-            accounts = entry.data.get(CONF_ACCOUNTS, ["default"])
-            for account in accounts:
-                await remove_device_node_from_storage(hass, account)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Accounts of the entry leave the consolidated totals, with its groups
+        household = get_household(hass)
+        changed = set()
+        for account in entry_data["accounts"]:
+            changed |= household.async_forget(account)
+        async_signal_household(hass, changed)
+        _async_refresh_household_groups(hass)
+        if not hass.data[DOMAIN]:
+            # Last entry: the stores and search index are loaded again by the next setup
+            await async_flush_stores(hass)
+            hass.data.pop(DATA_SEARCH, None)
+            hass.data.pop(DATA_DEDUP, None)
+            hass.data.pop(DATA_ANOMALY, None)
+            hass.data.pop(DATA_SPENDING, None)
+            hass.data.pop(DATA_HOUSEHOLD, None)
+        notifier = hass.data.get(DATA_NOTIFIER)
+        if notifier is not None:
+            notifier.async_forget_entry(entry.entry_id)
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """
+    Supprime les données des comptes d'une entrée supprimée, en une seule écriture.
+    """
+    storage_type = entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
+    if storage_type in STORAGE_TYPES:
+        try:
+            await get_store(hass, storage_type).async_update_accounts(removed=get_entry_accounts(entry))
+        except Exception as err:
+            _LOGGER.error("Failed to remove accounts of %s from storage: %s", entry.title, err)
+        if not hass.data.get(DOMAIN):
+            await async_flush_stores(hass)
+
 # ---------------------- GESTION DES DONNÉES ----------------------
+@instrumented("load_data")
 async def load_data(hass: HomeAssistant, entry: ConfigEntry):
     """
-    Charge les données du budget depuis le fichier.
+    Charge les données du budget depuis le fichier ou le stockage de Home Assistant.
+    Les données ne sont lues et analysées qu'une fois, par le store du type de stockage partagé
+    entre toutes les entrées ; l'entrée reçoit une vue limitée à ses comptes.
     """
     storage_type = entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
     
-    if storage_type == STORAGE_TYPE_FILE:
-        # Load data from file
-        file_path = get_storage_path(hass)
-        if os.path.exists(file_path):
-            try:
-                data = await hass.async_add_executor_job(_read_json_file, file_path)
-                # Update data in memory
-                hass.data[DOMAIN][entry.entry_id]["data"] = data
-                _LOGGER.info("Loaded budget data from file: %s", file_path)
-            except Exception as err:
-                _LOGGER.error("Failed to load budget data: %s", err)
+    if storage_type in STORAGE_TYPES:
+        store = get_store(hass, storage_type)
+        try:
+            metrics = get_entry_metrics(hass, entry.entry_id)
+            migrated = await store.async_load(metrics)
+        except Exception as err:
+            _LOGGER.error("Failed to load budget data: %s", err)
+            return
+        # Accounts missing from the file are created in the store
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+        entry_data["data"] = store.view(entry_data["accounts"])
+        if migrated:
+            # Persist the migrated layout right away
+            await save_data(hass, entry)
 
+@instrumented("save_data")
 async def save_data(hass: HomeAssistant, entry: ConfigEntry):
     """
-    Sauvegarde les données du budget dans le fichier.
+    Sauvegarde les données du budget dans le fichier, ou planifie l'écriture différée
+    (regroupée) du stockage de Home Assistant.
     """
-    data = hass.data[DOMAIN][entry.entry_id]["data"]
     storage_type = entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
     
-    if storage_type == STORAGE_TYPE_FILE:
-        # Save data to file asynchronously
-        file_path = get_storage_path(hass)
+    if storage_type in STORAGE_TYPES:
+        # Save the shared store (every account of every entry) asynchronously
+        store = get_store(hass, storage_type)
+        file_path = store.file_path
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            await hass.async_add_executor_job(_write_json_file, file_path, data)
+            metrics = get_entry_metrics(hass, entry.entry_id)
+            written = await store.async_save(metrics)
+            if written is None:
+                # Delayed write of the storage helper
+                if metrics is not None:
+                    metrics.increment("saves_scheduled")
+                _LOGGER.debug("Scheduled save of budget data: %s", file_path)
+                return
+            if metrics is not None:
+                metrics.set_value("last_bytes_written", written)
+                metrics.increment("bytes_written", written)
+                metrics.increment("saves")
             _LOGGER.info("Saved budget data to file: %s", file_path)
         except Exception as err:
             _LOGGER.error("Failed to save budget data: %s", err)
@@ -239,7 +746,7 @@ async def sync_recurring_items(hass: HomeAssistant, entry: ConfigEntry):
     Vérifie la date de fin (end_date) avant de créer les items.
     """
     _LOGGER.info("Synchronizing recurring items with current month items")
-    accounts = entry.data.get(CONF_ACCOUNTS, ["default"])
+    accounts = hass.data[DOMAIN][entry.entry_id]["accounts"]
     updated = False
     now = datetime.now()
     
@@ -248,23 +755,23 @@ async def sync_recurring_items(hass: HomeAssistant, entry: ConfigEntry):
         
         # Get existing recurring_ids in current month items
         income_recurring_ids = {
-            item.get("recurring_id") 
+            item.recurring_id 
             for item in account_data.get("income_items", []) 
-            if item.get("recurring_id")
+            if item.recurring_id
         }
         expense_recurring_ids = {
-            item.get("recurring_id") 
+            item.recurring_id 
             for item in account_data.get("expense_items", []) 
-            if item.get("recurring_id")
+            if item.recurring_id
         }
         
         # Check recurring incomes
         if "recurring_incomes" in account_data:
             for recurring_item in account_data["recurring_incomes"]:
-                recurring_id = recurring_item.get("id")
+                recurring_id = recurring_item.id
                 
                 # Check if end_date is in the past
-                end_date = recurring_item.get("end_date")
+                end_date = recurring_item.end_date
                 if end_date:
                     try:
                         end_dt = datetime.fromisoformat(end_date)
@@ -276,28 +783,28 @@ async def sync_recurring_items(hass: HomeAssistant, entry: ConfigEntry):
                 
                 if recurring_id not in income_recurring_ids:
                     # Create missing item
-                    new_item = {
-                        "id": str(uuid.uuid4()),
-                        "amount": recurring_item["amount"],
-                        "description": recurring_item["description"],
-                        "category": recurring_item.get("category", ""),
-                        "timestamp": now.isoformat(),
-                        "recurring_id": recurring_id,
-                    }
+                    new_item = BudgetItem(
+                        id=new_id(),
+                        amount=recurring_item.amount,
+                        description=recurring_item.description,
+                        category=recurring_item.category,
+                        timestamp=now.isoformat(),
+                        recurring_id=recurring_id,
+                    )
                     if "income_items" not in account_data:
                         account_data["income_items"] = []
                     account_data["income_items"].append(new_item)
                     _LOGGER.info("Created missing income item for recurring %s in account %s (amount: %.2f)", 
-                                 recurring_id, account, recurring_item["amount"])
+                                 recurring_id, account, recurring_item.amount)
                     updated = True
         
         # Check recurring expenses
         if "recurring_expenses" in account_data:
             for recurring_item in account_data["recurring_expenses"]:
-                recurring_id = recurring_item.get("id")
+                recurring_id = recurring_item.id
                 
                 # Check if end_date is in the past
-                end_date = recurring_item.get("end_date")
+                end_date = recurring_item.end_date
                 if end_date:
                     try:
                         end_dt = datetime.fromisoformat(end_date)
@@ -309,26 +816,24 @@ async def sync_recurring_items(hass: HomeAssistant, entry: ConfigEntry):
                 
                 if recurring_id not in expense_recurring_ids:
                     # Create missing item
-                    new_item = {
-                        "id": str(uuid.uuid4()),
-                        "amount": recurring_item["amount"],
-                        "description": recurring_item["description"],
-                        "category": recurring_item.get("category", ""),
-                        "timestamp": now.isoformat(),
-                        "recurring_id": recurring_id,
-                    }
+                    new_item = BudgetItem(
+                        id=new_id(),
+                        amount=recurring_item.amount,
+                        description=recurring_item.description,
+                        category=recurring_item.category,
+                        timestamp=now.isoformat(),
+                        recurring_id=recurring_id,
+                    )
                     if "expense_items" not in account_data:
                         account_data["expense_items"] = []
                     account_data["expense_items"].append(new_item)
                     _LOGGER.info("Created missing expense item for recurring %s in account %s (amount: %.2f)", 
-                                 recurring_id, account, recurring_item["amount"])
+                                 recurring_id, account, recurring_item.amount)
                     updated = True
         
         # Recalculate totals if items were added
         if updated:
-            account_data["income"] = sum(i["amount"] for i in account_data.get("income_items", []))
-            account_data["expenses"] = sum(i["amount"] for i in account_data.get("expense_items", []))
-            account_data["balance"] = account_data["income"] - account_data["expenses"]
+            update_totals(account_data)
             hass.data[DOMAIN][entry.entry_id]["data"][account] = account_data
     
     # Save if any changes were made
@@ -338,32 +843,73 @@ async def sync_recurring_items(hass: HomeAssistant, entry: ConfigEntry):
     else:
         _LOGGER.debug("Recurring items synchronization completed - no changes needed")
 
-async def archive_and_reset_data(hass: HomeAssistant, entry: ConfigEntry):
+def _due_accounts(entry_data: dict, now: datetime, force: bool = False) -> dict:
+    """
+    Retourne {compte: identifiant de période à archiver} des comptes dont la période enregistrée
+    est terminée. Avec ``force``, les autres comptes archivent aussi leurs éléments, sous
+    l'identifiant de la période précédente (comportement historique de reset_month).
     """
-    Archive les données du mois courant et réinitialise pour le nouveau mois.
+    due = {}
+    for account in entry_data["accounts"]:
+        account_data = entry_data["data"].get(account)
+        if account_data is None:
+            continue
+        period = account_period(entry_data["periods"], account)
+        current_start = period.start(now)
+        stored = stored_period_start(account_data)
+        if stored is not None and stored < current_start:
+            due[account] = period.period_id(stored)
+        elif force:
+            due[account] = period.period_id(period.previous_start(now))
+    return due
+
+@instrumented("archive_and_reset_data")
+async def archive_and_reset_data(hass: HomeAssistant, entry: ConfigEntry, force: bool = False):
+    """
+    Archive les éléments des comptes dont la période budgétaire est terminée (tous les comptes
+    avec ``force``) sous l'identifiant de cette période, puis les réinitialise pour la nouvelle.
     Applique les revenus et dépenses récurrents.
     Les totaux incluent les récurrents.
+    Les statistiques de dépenses par catégorie de chaque compte archivé reçoivent les totaux
+    de la période (sans relire l'historique), et son index de plages est prolongé de la période.
+    Applique ensuite la politique de rétention de l'historique (history_detail_months) et réarme
+    le minuteur de la prochaine fin de période.
     """
-    _LOGGER.info("Starting monthly archive and reset process")
-    now = datetime.now()
-    last_month = now.replace(day=1) - timedelta(days=1)
-    year_month_key = f"{last_month.year}_{last_month.month:02d}"
-    _LOGGER.info("Archiving data for %s", year_month_key)
-    
-    for account in entry.data.get(CONF_ACCOUNTS, ["default"]):
+    _LOGGER.info("Starting period archive and reset process")
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    aware_now = dt_util.now()
+    # Item timestamps and recurring end dates are naive local times
+    now = aware_now.replace(tzinfo=None)
+    due = _due_accounts(entry_data, aware_now, force)
+    if not due:
+        _async_schedule_period_end(hass, entry)
+        return
+
+    for account, year_month_key in due.items():
         _LOGGER.debug("Processing account: %s", account)
+        _LOGGER.info("Archiving data of %s for %s", account, year_month_key)
         account_data = hass.data[DOMAIN][entry.entry_id]["data"].get(account, {})
         if "history" not in account_data:
             account_data["history"] = {}
         
-        # Archive current month data
-        account_data["history"][year_month_key] = {
+        # Archive current month data (stored in the compact columnar layout)
+        archived_month = {
             "income": account_data.get("income", 0),
             "expenses": account_data.get("expenses", 0),
             "balance": account_data.get("balance", 0),
-            "income_items": account_data.get("income_items", []),
-            "expense_items": account_data.get("expense_items", []),
+            "income_items": items_to_dicts(account_data.get("income_items", [])),
+            "expense_items": items_to_dicts(account_data.get("expense_items", [])),
         }
+        for key in (ATTR_TRANSFERS_IN, ATTR_TRANSFERS_OUT):
+            if account_data.get(key):
+                archived_month[key] = account_data[key]
+        account_data["history"][year_month_key] = compact_month(archived_month)
+        entry_data["ranges"].extend(
+            account, year_month_key, account_data["history"][year_month_key], account_data["history"]
+        )
+        update_category_stats(
+            account_data.setdefault(STATS_KEY, {}), category_totals(account_data.get("expense_items", []))
+        )
         _LOGGER.info("Archived %s: income=%.2f, expenses=%.2f, balance=%.2f", 
                      account, account_data.get("income", 0), account_data.get("expenses", 0), account_data.get("balance", 0))
         
@@ -380,69 +926,177 @@ async def archive_and_reset_data(hass: HomeAssistant, entry: ConfigEntry):
             _LOGGER.debug("Applying %d recurring income(s) for account %s", recurring_count, account)
             for recurring_item in account_data["recurring_incomes"]:
                 # Check if end_date has passed
-                end_date = recurring_item.get("end_date")
+                end_date = recurring_item.end_date
                 if end_date:
                     try:
                         end_dt = datetime.fromisoformat(end_date)
                         if now > end_dt:
-                            _LOGGER.debug("Skipping expired recurring income %s (end_date: %s)", recurring_item["id"], end_date)
+                            _LOGGER.debug("Skipping expired recurring income %s (end_date: %s)", recurring_item.id, end_date)
                             continue
                     except (ValueError, TypeError) as err:
-                        _LOGGER.warning("Invalid end_date format for recurring income %s: %s", recurring_item["id"], err)
+                        _LOGGER.warning("Invalid end_date format for recurring income %s: %s", recurring_item.id, err)
                 
-                new_item = {
-                    "id": str(uuid.uuid4()),
-                    "amount": recurring_item["amount"],
-                    "description": recurring_item["description"],
-                    "category": recurring_item["category"],
-                    "timestamp": now.isoformat(),
-                    "recurring_id": recurring_item["id"],
-                }
+                new_item = BudgetItem(
+                    id=new_id(),
+                    amount=recurring_item.amount,
+                    description=recurring_item.description,
+                    category=recurring_item.category,
+                    timestamp=now.isoformat(),
+                    recurring_id=recurring_item.id,
+                )
                 account_data["income_items"].append(new_item)
-        # Update total income (only items, récurrents are already in items)
-        account_data["income"] = sum(i["amount"] for i in account_data["income_items"])
         if "recurring_expenses" in account_data:
             for recurring_item in account_data["recurring_expenses"]:
                 # Check if end_date has passed
-                end_date = recurring_item.get("end_date")
+                end_date = recurring_item.end_date
                 if end_date:
                     try:
                         end_dt = datetime.fromisoformat(end_date)
                         if now > end_dt:
-                            _LOGGER.debug("Skipping expired recurring expense %s (end_date: %s)", recurring_item["id"], end_date)
+                            _LOGGER.debug("Skipping expired recurring expense %s (end_date: %s)", recurring_item.id, end_date)
                             continue
                     except (ValueError, TypeError) as err:
-                        _LOGGER.warning("Invalid end_date format for recurring expense %s: %s", recurring_item["id"], err)
+                        _LOGGER.warning("Invalid end_date format for recurring expense %s: %s", recurring_item.id, err)
                 
-                new_item = {
-                    "id": str(uuid.uuid4()),
-                    "amount": recurring_item["amount"],
-                    "description": recurring_item["description"],
-                    "category": recurring_item["category"],
-                    "timestamp": now.isoformat(),
-                    "recurring_id": recurring_item["id"],
-                }
+                new_item = BudgetItem(
+                    id=new_id(),
+                    amount=recurring_item.amount,
+                    description=recurring_item.description,
+                    category=recurring_item.category,
+                    timestamp=now.isoformat(),
+                    recurring_id=recurring_item.id,
+                )
                 account_data["expense_items"].append(new_item)
-        # Update total expenses (only items, récurrents are already in items)
-        account_data["expenses"] = sum(i["amount"] for i in account_data["expense_items"])
-        account_data["balance"] = account_data["income"] - account_data["expenses"]
+        # Update totals (only items, récurrents are already in items)
+        update_totals(account_data)
+        account_data[PERIOD_START] = account_period(entry_data["periods"], account).start(aware_now).isoformat()
         
-        _LOGGER.info("New month initialized for %s: income=%.2f, expenses=%.2f, balance=%.2f", 
+        _LOGGER.info("New period initialized for %s: income=%.2f, expenses=%.2f, balance=%.2f", 
                      account, account_data["income"], account_data["expenses"], account_data["balance"])
         hass.data[DOMAIN][entry.entry_id]["data"][account] = account_data
+        if DATA_SEARCH in hass.data:
+            # Archived items keep their index entries, moved to the archived month
+            hass.data[DATA_SEARCH].async_archive(account, year_month_key, account_data)
+
+    # Older archived months keep only their per-category totals (saved with the reset)
+    if entry_data["history_detail_months"]:
+        try:
+            compacted = await async_compact_history(
+                hass,
+                entry_data["data"],
+                list(due),
+                entry_data["history_detail_months"],
+                entry_data["history_archive"],
+            )
+            for account in compacted:
+                async_update_search_index(hass, entry.entry_id, account)
+        except OSError as err:
+            _LOGGER.error("Failed to archive compacted history months: %s", err)
     new_data = dict(entry.data)
     new_data["last_reset"] = now.isoformat()
     hass.config_entries.async_update_entry(entry, data=new_data)
     await save_data(hass, entry)
     
-    _LOGGER.info("Monthly archive and reset completed successfully")
-    hass.bus.async_fire(
-        EVENT_MONTH_CHANGED, 
-        {"month": last_month.month, "year": last_month.year}
-    )
-    async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry.entry_id}")
+    _LOGGER.info("Period archive and reset completed successfully")
+    # One event per archived period, with the accounts closing it
+    periods = {}
+    for account, year_month_key in due.items():
+        periods.setdefault(year_month_key, []).append(account)
+    metrics = get_entry_metrics(hass, entry.entry_id)
+    for year_month_key, accounts in periods.items():
+        start = parse_period_id(year_month_key)
+        hass.bus.async_fire(
+            EVENT_MONTH_CHANGED, 
+            {"month": start.month, "year": start.year, "period": year_month_key, "accounts": accounts}
+        )
+        if metrics is not None:
+            metrics.increment("events_fired")
+    for account in due:
+        async_update_ingestion_guard(hass, entry.entry_id, account)
+        async_update_spending_totals(hass, entry.entry_id, account)
+        if DATA_ANOMALY in hass.data:
+            # New period: categories can be flagged again
+            hass.data[DATA_ANOMALY].async_forget(account)
+        _async_dispatch_data_updated(hass, entry.entry_id, account, reindex=False)
+    _async_schedule_period_end(hass, entry)
 
 # ---------------------- SERVICES ----------------------
+def _is_duplicate_item(hass: HomeAssistant, entry_id: str, account: str, list_key: str, call, timestamp: str) -> bool:
+    """
+    Indique si un ajout est un doublon : clé d'idempotence déjà reçue, ou (si check_duplicates)
+    élément du mois avec le même montant, le même jour et la même description normalisée.
+    """
+    content = None
+    if call.data.get(ATTR_CHECK_DUPLICATES):
+        content = content_key(list_key, call.data.get(ATTR_AMOUNT, 0), timestamp, call.data.get(ATTR_DESCRIPTION, ""))
+    reason = get_ingestion_guard(hass).find_duplicate(
+        account, hass.data[DOMAIN][entry_id]["data"][account], call.data.get(ATTR_IDEMPOTENCY_KEY), content
+    )
+    if reason is None:
+        return False
+    _LOGGER.info("Skipped duplicate %s %.2f for account %s (%s)", list_key[:-1], call.data.get(ATTR_AMOUNT, 0), account, reason)
+    metrics = get_entry_metrics(hass, entry_id)
+    if metrics is not None:
+        metrics.increment("duplicates_skipped")
+    return True
+
+def _check_added_expense(hass: HomeAssistant, entry_id: str, account: str, item: BudgetItem):
+    """
+    Ajoute une dépense aux totaux par catégorie de la période, vérifie les seuils de l'enveloppe
+    de sa catégorie, puis compare le total de la catégorie aux statistiques des périodes archivées
+    et déclenche budget_tracker_anomaly au premier dépassement du seuil de z-score de la catégorie
+    dans la période. Chaque vérification est en O(1).
+    """
+    entry_data = hass.data[DOMAIN][entry_id]
+    account_data = entry_data["data"][account]
+    spending = get_spending_totals(hass)
+    changes = spending.record(account, account_data, item)
+    _async_check_budgets(hass, entry_id, {account: changes})
+    anomaly = get_anomaly_detector(hass).check(
+        account, account_data, item, spending.total(account, account_data, item.category), entry_data["anomaly_threshold"]
+    )
+    if anomaly is None:
+        return
+    _LOGGER.info(
+        "Unusual spending in %s for account %s: %.2f (mean %.2f, z-score %.2f)",
+        anomaly["category"] or "uncategorized", account, anomaly["period_total"], anomaly["mean"], anomaly["z_score"],
+    )
+    hass.bus.async_fire(EVENT_ANOMALY, anomaly)
+    metrics = get_entry_metrics(hass, entry_id)
+    if metrics is not None:
+        metrics.increment("events_fired")
+
+def _instrument_service(hass: HomeAssistant, service: str, handler):
+    """
+    Enveloppe un handler de service pour mesurer sa durée dans les métriques de l'entrée du compte
+    et le profiler pendant une session de profilage.
+    """
+    name = f"service_{service}"
+
+    async def instrumented_handler(call):
+        account = call.data.get(ATTR_ACCOUNT, "default")
+        metrics = None
+        for entry_id, entry_data in hass.data[DOMAIN].items():
+            if account in entry_data["accounts"]:
+                metrics = get_entry_metrics(hass, entry_id)
+                break
+        profiler = get_active_profiler(hass)
+        if metrics is None and profiler is None:
+            return await handler(call)
+        if profiler is not None:
+            profiler.enter()
+        start = time.perf_counter()
+        try:
+            return await handler(call)
+        finally:
+            if metrics is not None:
+                metrics.record(name, time.perf_counter() - start)
+                metrics.increment("service_calls")
+            if profiler is not None:
+                profiler.exit(service_call=True)
+
+    return instrumented_handler
+
 def register_services(hass: HomeAssistant):
     """
     Enregistre tous les services de l'intégration Budget Tracker.
@@ -459,25 +1113,21 @@ def register_services(hass: HomeAssistant):
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
                 # Instead of setting the total directly, add an income item
-                item_id = str(uuid.uuid4())
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": "Income Entry (via deprecated service)",
-                    "category": "Legacy",
-                    "timestamp": datetime.now().isoformat(),
-                }
+                item_id = new_id()
+                item = BudgetItem(
+                    id=item_id,
+                    amount=amount,
+                    description="Income Entry (via deprecated service)",
+                    category="Legacy",
+                    timestamp=datetime.now().isoformat(),
+                )
                 if "income_items" not in entry_data["data"][account]:
                     entry_data["data"][account]["income_items"] = []
                 entry_data["data"][account]["income_items"].append(item)
-                entry_data["data"][account]["income"] = sum(i["amount"] for i in entry_data["data"][account]["income_items"])
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account]["income"] - entry_data["data"][account].get("expenses", 0)
-                )
+                update_totals(entry_data["data"][account])
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                await load_data(hass, entry)
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account)
                 return
         
         _LOGGER.warning("Account %s not found", account)
@@ -494,25 +1144,21 @@ def register_services(hass: HomeAssistant):
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
                 # Instead of setting the total directly, add an expense item
-                item_id = str(uuid.uuid4())
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": "Expense Entry (via deprecated service)",
-                    "category": "Legacy",
-                    "timestamp": datetime.now().isoformat(),
-                }
+                item_id = new_id()
+                item = BudgetItem(
+                    id=item_id,
+                    amount=amount,
+                    description="Expense Entry (via deprecated service)",
+                    category="Legacy",
+                    timestamp=datetime.now().isoformat(),
+                )
                 if "expense_items" not in entry_data["data"][account]:
                     entry_data["data"][account]["expense_items"] = []
                 entry_data["data"][account]["expense_items"].append(item)
-                entry_data["data"][account]["expenses"] = sum(i["amount"] for i in entry_data["data"][account]["expense_items"])
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account].get("income", 0) - entry_data["data"][account]["expenses"]
-                )
+                update_totals(entry_data["data"][account])
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                await load_data(hass, entry)
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account)
                 return
         
         _LOGGER.warning("Account %s not found", account)
@@ -527,10 +1173,10 @@ def register_services(hass: HomeAssistant):
         
         if year and month:
             # Archive specific month
-            for entry_id in hass.data[DOMAIN]:
+            for entry_id, entry_data in list(hass.data[DOMAIN].items()):
                 entry = hass.config_entries.async_get_entry(entry_id)
-                if not account or account in entry.data.get(CONF_ACCOUNTS, []):
-                    await archive_and_reset_data(hass, entry)
+                if not account or account in entry_data["accounts"]:
+                    await archive_and_reset_data(hass, entry, force=True)
     
     # Register services
     async def handle_add_income_item(call):
@@ -542,38 +1188,39 @@ def register_services(hass: HomeAssistant):
         amount = call.data.get(ATTR_AMOUNT, 0)
         description = call.data.get(ATTR_DESCRIPTION, "")
         category = call.data.get(ATTR_CATEGORY, "")
-        item_id = str(uuid.uuid4())
+        idempotency_key = call.data.get(ATTR_IDEMPOTENCY_KEY)
+        item_id = new_id()
         
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
+                category = _auto_category(hass, entry_id, category, description, amount)
+                timestamp = datetime.now().isoformat()
+                if _is_duplicate_item(hass, entry_id, account, "income_items", call, timestamp):
+                    return
                 # Create new item
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": description,
-                    "category": category,
-                    "timestamp": datetime.now().isoformat(),
-                }
+                item = BudgetItem(
+                    id=item_id,
+                    amount=amount,
+                    description=description,
+                    category=category,
+                    timestamp=timestamp,
+                    extra={ATTR_IDEMPOTENCY_KEY: idempotency_key} if idempotency_key else None,
+                )
                 # Add to income items
                 if "income_items" not in entry_data["data"][account]:
                     entry_data["data"][account]["income_items"] = []
                 entry_data["data"][account]["income_items"].append(item)
-                # Update total income (only items, no separate recurring total)
-                entry_data["data"][account]["income"] = sum(i["amount"] for i in entry_data["data"][account]["income_items"])
-                # Update balance
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account]["income"] - entry_data["data"][account].get("expenses", 0)
-                )
+                # Known before the save is awaited, so a concurrent retry is already a no-op
+                get_ingestion_guard(hass).record(account, entry_data["data"][account], "income_items", item)
+                # Update totals and balance (only items, no separate recurring total)
+                update_totals(entry_data["data"][account])
                 # Save the updated data
-                # Log the data in memory ve reload
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                # Recharge les données depuis le fichier pour garantir la cohérence en mémoire
-                await load_data(hass, entry)
 
                 _LOGGER.debug("Added income item %.2f for account %s (new total: %.2f)", amount, account, entry_data["data"][account]["income"])
                 # Notify sensors to update
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                 return
         _LOGGER.warning("Account %s not found", account)
 
@@ -586,37 +1233,40 @@ def register_services(hass: HomeAssistant):
         amount = call.data.get(ATTR_AMOUNT, 0)
         description = call.data.get(ATTR_DESCRIPTION, "")
         category = call.data.get(ATTR_CATEGORY, "")
-        item_id = str(uuid.uuid4())
+        idempotency_key = call.data.get(ATTR_IDEMPOTENCY_KEY)
+        item_id = new_id()
         
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
+                category = _auto_category(hass, entry_id, category, description, amount)
+                timestamp = datetime.now().isoformat()
+                if _is_duplicate_item(hass, entry_id, account, "expense_items", call, timestamp):
+                    return
                 # Create new item
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": description,
-                    "category": category,
-                    "timestamp": datetime.now().isoformat(),
-                }
+                item = BudgetItem(
+                    id=item_id,
+                    amount=amount,
+                    description=description,
+                    category=category,
+                    timestamp=timestamp,
+                    extra={ATTR_IDEMPOTENCY_KEY: idempotency_key} if idempotency_key else None,
+                )
                 # Add to expense items
                 if "expense_items" not in entry_data["data"][account]:
                     entry_data["data"][account]["expense_items"] = []
                 entry_data["data"][account]["expense_items"].append(item)
-                # Update total expenses (only items, no separate recurring total)
-                entry_data["data"][account]["expenses"] = sum(i["amount"] for i in entry_data["data"][account]["expense_items"])
-                # Update balance
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account].get("income", 0) - entry_data["data"][account]["expenses"]
-                )
+                # Known before the save is awaited, so a concurrent retry is already a no-op
+                get_ingestion_guard(hass).record(account, entry_data["data"][account], "expense_items", item)
+                _check_added_expense(hass, entry_id, account, item)
+                # Update totals and balance (only items, no separate recurring total)
+                update_totals(entry_data["data"][account])
                 # Save the updated data
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                # Recharge les données depuis le fichier pour garantir la cohérence en mémoire
-                await load_data(hass, entry)
                 
                 _LOGGER.debug("Added expense item %.2f for account %s (new total: %.2f)", amount, account, entry_data["data"][account]["expenses"])
                 # Notify sensors to update
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                 return
         _LOGGER.warning("Account %s not found", account)
 
@@ -632,35 +1282,40 @@ def register_services(hass: HomeAssistant):
             return
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
+                # Both items of a transfer are removed together
+                if any(
+                    item.id == item_id and transfer_id(item)
+                    for key in ("income_items", "expense_items")
+                    for item in entry_data["data"][account].get(key, [])
+                ):
+                    await async_apply_operations(
+                        hass, [{"op": OP_REMOVE, "account": account, "item_id": item_id}]
+                    )
+                    _LOGGER.debug("Removed transfer item %s from account %s", item_id, account)
+                    return
                 # Check in income items
                 if "income_items" in entry_data["data"][account]:
                     for i, item in enumerate(entry_data["data"][account]["income_items"]):
-                        if item.get("id") == item_id:
+                        if item.id == item_id:
                             entry_data["data"][account]["income_items"].pop(i)
                             # Recalculate total income (only items)
-                            entry_data["data"][account]["income"] = sum(i["amount"] for i in entry_data["data"][account]["income_items"])
-                            entry_data["data"][account]["balance"] = (
-                                entry_data["data"][account]["income"] - entry_data["data"][account].get("expenses", 0)
-                            )
+                            update_totals(entry_data["data"][account])
                             entry = hass.config_entries.async_get_entry(entry_id)
                             await save_data(hass, entry)
                             _LOGGER.debug("Removed income item %s from account %s (new total: %.2f)", item_id, account, entry_data["data"][account]["income"])
-                            async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                            _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                             return
                 # Check in expense items
                 if "expense_items" in entry_data["data"][account]:
                     for i, item in enumerate(entry_data["data"][account]["expense_items"]):
-                        if item.get("id") == item_id:
+                        if item.id == item_id:
                             entry_data["data"][account]["expense_items"].pop(i)
                             # Recalculate total expenses (only items)
-                            entry_data["data"][account]["expenses"] = sum(i["amount"] for i in entry_data["data"][account]["expense_items"])
-                            entry_data["data"][account]["balance"] = (
-                                entry_data["data"][account].get("income", 0) - entry_data["data"][account]["expenses"]
-                            )
+                            update_totals(entry_data["data"][account])
                             entry = hass.config_entries.async_get_entry(entry_id)
                             await save_data(hass, entry)
                             _LOGGER.debug("Removed expense item %s from account %s (new total: %.2f)", item_id, account, entry_data["data"][account]["expenses"])
-                            async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                            _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                             return
         _LOGGER.warning("Item %s not found for account %s", item_id, account)
 
@@ -683,7 +1338,7 @@ def register_services(hass: HomeAssistant):
                         before_count = len(account_data["income_items"])
                         account_data["income_items"] = [
                             item for item in account_data["income_items"]
-                            if item.get(ATTR_CATEGORY) != category_filter
+                            if item.category != category_filter
                         ]
                         if before_count != len(account_data["income_items"]):
                             modified = True
@@ -691,15 +1346,13 @@ def register_services(hass: HomeAssistant):
                         if account_data["income_items"]:
                             account_data["income_items"] = []
                             modified = True
-                    # Recalculate total income (only items)
-                    account_data["income"] = sum(i["amount"] for i in account_data.get("income_items", []))
                 # Clear expense items if requested
                 if clear_expenses and "expense_items" in account_data:
                     if category_filter:
                         before_count = len(account_data["expense_items"])
                         account_data["expense_items"] = [
                             item for item in account_data["expense_items"]
-                            if item.get(ATTR_CATEGORY) != category_filter
+                            if item.category != category_filter
                         ]
                         if before_count != len(account_data["expense_items"]):
                             modified = True
@@ -707,13 +1360,12 @@ def register_services(hass: HomeAssistant):
                         if account_data["expense_items"]:
                             account_data["expense_items"] = []
                             modified = True
-                    # Recalculate total expenses (only items)
-                    account_data["expenses"] = sum(i["amount"] for i in account_data.get("expense_items", []))
-                account_data["balance"] = account_data.get("income", 0) - account_data.get("expenses", 0)
+                # Recalculate totals (only items)
+                update_totals(account_data)
                 if modified:
                     entry = hass.config_entries.async_get_entry(entry_id)
                     await save_data(hass, entry)
-                    async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                    _async_dispatch_data_updated(hass, entry_id, account)
                     _LOGGER.info("Cleared items for account %s", account)
                 return
         _LOGGER.warning("Account %s not found", account)
@@ -729,21 +1381,22 @@ def register_services(hass: HomeAssistant):
         category = call.data.get(ATTR_CATEGORY, "")
         day_of_month = call.data.get(ATTR_DAY_OF_MONTH, 1)
         end_date = call.data.get(ATTR_END_DATE)  # Optional, format: YYYY-MM-DD
-        item_id = str(uuid.uuid4())
+        item_id = new_id()
         
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": description,
-                    "category": category,
-                    "day_of_month": day_of_month,
-                    "created_at": datetime.now().isoformat(),
-                }
+                category = _auto_category(hass, entry_id, category, description, amount)
+                item = RecurringRule(
+                    id=item_id,
+                    amount=amount,
+                    description=description,
+                    category=category,
+                    day_of_month=day_of_month,
+                    created_at=datetime.now().isoformat(),
+                )
                 # Add end_date if provided
                 if end_date:
-                    item["end_date"] = end_date
+                    item.end_date = end_date
                     
                 if "recurring_incomes" not in entry_data["data"][account]:
                     entry_data["data"][account]["recurring_incomes"] = []
@@ -764,25 +1417,22 @@ def register_services(hass: HomeAssistant):
                         _LOGGER.warning("Invalid end_date format for recurring income %s: %s", item_id, err)
                 
                 if should_create:
-                    new_item = {
-                        "id": str(uuid.uuid4()),
-                        "amount": amount,
-                        "description": description,
-                        "category": category,
-                        "timestamp": datetime.now().isoformat(),
-                        "recurring_id": item_id,
-                    }
+                    new_item = BudgetItem(
+                        id=new_id(),
+                        amount=amount,
+                        description=description,
+                        category=category,
+                        timestamp=datetime.now().isoformat(),
+                        recurring_id=item_id,
+                    )
                     if "income_items" not in entry_data["data"][account]:
                         entry_data["data"][account]["income_items"] = []
                     entry_data["data"][account]["income_items"].append(new_item)
                 # Update total income (only items, recurring items are created above)
-                entry_data["data"][account]["income"] = sum(i["amount"] for i in entry_data["data"][account]["income_items"])
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account]["income"] - entry_data["data"][account].get("expenses", 0)
-                )
+                update_totals(entry_data["data"][account])
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                 return
         _LOGGER.warning("Account %s not found", account)
 
@@ -797,21 +1447,22 @@ def register_services(hass: HomeAssistant):
         category = call.data.get(ATTR_CATEGORY, "")
         day_of_month = call.data.get(ATTR_DAY_OF_MONTH, 1)
         end_date = call.data.get(ATTR_END_DATE)  # Optional, format: YYYY-MM-DD
-        item_id = str(uuid.uuid4())
+        item_id = new_id()
         
         for entry_id, entry_data in hass.data[DOMAIN].items():
             if account in entry_data["accounts"]:
-                item = {
-                    "id": item_id,
-                    "amount": amount,
-                    "description": description,
-                    "category": category,
-                    "day_of_month": day_of_month,
-                    "created_at": datetime.now().isoformat(),
-                }
+                category = _auto_category(hass, entry_id, category, description, amount)
+                item = RecurringRule(
+                    id=item_id,
+                    amount=amount,
+                    description=description,
+                    category=category,
+                    day_of_month=day_of_month,
+                    created_at=datetime.now().isoformat(),
+                )
                 # Add end_date if provided
                 if end_date:
-                    item["end_date"] = end_date
+                    item.end_date = end_date
                     
                 if "recurring_expenses" not in entry_data["data"][account]:
                     entry_data["data"][account]["recurring_expenses"] = []
@@ -832,25 +1483,22 @@ def register_services(hass: HomeAssistant):
                         _LOGGER.warning("Invalid end_date format for recurring expense %s: %s", item_id, err)
                 
                 if should_create:
-                    new_item = {
-                        "id": str(uuid.uuid4()),
-                        "amount": amount,
-                        "description": description,
-                        "category": category,
-                        "timestamp": datetime.now().isoformat(),
-                        "recurring_id": item_id,
-                    }
+                    new_item = BudgetItem(
+                        id=new_id(),
+                        amount=amount,
+                        description=description,
+                        category=category,
+                        timestamp=datetime.now().isoformat(),
+                        recurring_id=item_id,
+                    )
                     if "expense_items" not in entry_data["data"][account]:
                         entry_data["data"][account]["expense_items"] = []
                     entry_data["data"][account]["expense_items"].append(new_item)
                 # Update total expenses (only items, recurring items are created above)
-                entry_data["data"][account]["expenses"] = sum(i["amount"] for i in entry_data["data"][account]["expense_items"])
-                entry_data["data"][account]["balance"] = (
-                    entry_data["data"][account].get("income", 0) - entry_data["data"][account]["expenses"]
-                )
+                update_totals(entry_data["data"][account])
                 entry = hass.config_entries.async_get_entry(entry_id)
                 await save_data(hass, entry)
-                async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                _async_dispatch_data_updated(hass, entry_id, account, [item_id])
                 return
         _LOGGER.warning("Account %s not found", account)
 
@@ -870,13 +1518,13 @@ def register_services(hass: HomeAssistant):
                 # Check in recurring income items
                 if "recurring_incomes" in entry_data["data"][account]:
                     for i, item in enumerate(entry_data["data"][account]["recurring_incomes"]):
-                        if item.get("id") == item_id:
+                        if item.id == item_id:
                             entry_data["data"][account]["recurring_incomes"].pop(i)
                             # Remove all income items linked to this recurring
                             if "income_items" in entry_data["data"][account]:
                                 entry_data["data"][account]["income_items"] = [
                                     it for it in entry_data["data"][account]["income_items"]
-                                    if it.get("recurring_id") != item_id
+                                    if it.recurring_id != item_id
                                 ]
                             updated = True
                             _LOGGER.debug("Removed recurring income %s and its related items from account %s", item_id, account)
@@ -884,70 +1532,199 @@ def register_services(hass: HomeAssistant):
                 # Check in recurring expense items
                 if "recurring_expenses" in entry_data["data"][account]:
                     for i, item in enumerate(entry_data["data"][account]["recurring_expenses"]):
-                        if item.get("id") == item_id:
+                        if item.id == item_id:
                             entry_data["data"][account]["recurring_expenses"].pop(i)
                             # Remove all expense items linked to this recurring
                             if "expense_items" in entry_data["data"][account]:
                                 entry_data["data"][account]["expense_items"] = [
                                     it for it in entry_data["data"][account]["expense_items"]
-                                    if it.get("recurring_id") != item_id
+                                    if it.recurring_id != item_id
                                 ]
                             updated = True
                             _LOGGER.debug("Removed recurring expense %s and its related items from account %s", item_id, account)
                             break
                 if updated:
                     # Recalculate totals after removal (only items)
-                    entry_data["data"][account]["income"] = sum(i["amount"] for i in entry_data["data"][account].get("income_items", []))
-                    entry_data["data"][account]["expenses"] = sum(i["amount"] for i in entry_data["data"][account].get("expense_items", []))
-                    entry_data["data"][account]["balance"] = entry_data["data"][account]["income"] - entry_data["data"][account]["expenses"]
+                    update_totals(entry_data["data"][account])
                     entry = hass.config_entries.async_get_entry(entry_id)
                     await save_data(hass, entry)
                     _LOGGER.info("Removed recurring item %s from account %s (new income: %.2f, new expenses: %.2f)", 
                                  item_id, account, entry_data["data"][account]["income"], entry_data["data"][account]["expenses"])
-                    async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
+                    _async_dispatch_data_updated(hass, entry_id, account)
                     return
         _LOGGER.warning("Recurring item %s not found for account %s", item_id, account)
 
+    async def handle_start_profiling(call):
+        """
+        Démarre une session de profilage des services, de save_data et de la mise à jour des capteurs.
+        S'arrête après N appels de service et/ou N secondes (60 secondes si rien n'est précisé).
+        """
+        max_calls = call.data.get(ATTR_CALLS)
+        duration = call.data.get(ATTR_DURATION)
+        if not max_calls and not duration:
+            duration = 60
+        async_start_profiling(hass, max_calls, duration, call.data.get(ATTR_TOP, 25))
+
+    async def handle_stop_profiling(call):
+        """
+        Arrête la session de profilage et écrit les statistiques dans le dossier de configuration.
+        """
+        await async_stop_profiling(hass)
+
+    async def handle_transfer(call):
+        """
+        Transfère un montant d'un compte vers un autre : une dépense dans le compte source et un
+        revenu dans le compte cible, liés, créés ensemble et exclus des totaux de revenus/dépenses.
+        """
+        try:
+            await async_apply_operations(hass, [{
+                "op": OP_TRANSFER,
+                "account": call.data.get(ATTR_ACCOUNT, "default"),
+                "to_account": call.data[ATTR_TO_ACCOUNT],
+                "amount": call.data[ATTR_AMOUNT],
+                "description": call.data.get(ATTR_DESCRIPTION, ""),
+                "category": call.data.get(ATTR_CATEGORY, ""),
+            }])
+        except MutationError as err:
+            _LOGGER.warning("Transfer failed: %s", err)
+
+    async def handle_recategorize(call):
+        """
+        Applique les règles de catégorisation aux éléments du mois et de l'historique (éléments
+        sans catégorie, ou tous avec overwrite), dans l'executor, puis recalcule les statistiques
+        de dépenses par catégorie et l'index de plages si l'historique a changé. Les données ne sont remplacées
+        que si elles n'ont pas changé entre-temps, puis enregistrées une fois par entrée.
+        Sans compte, s'applique à tous les comptes.
+        """
+        account = call.data.get(ATTR_ACCOUNT)
+        overwrite = call.data.get(ATTR_OVERWRITE, False)
+        include_history = call.data.get(ATTR_INCLUDE_HISTORY, True)
+        for entry_id, entry_data in list(hass.data[DOMAIN].items()):
+            categorizer = entry_data["categorizer"]
+            accounts = [account] if account else list(entry_data["accounts"])
+            accounts = [name for name in accounts if name in entry_data["accounts"]]
+            if not categorizer or not accounts:
+                continue
+            changed_accounts = []
+            for name in accounts:
+                account_data = entry_data["data"][name]
+                # Lists and month dicts are replaced, never mutated, so shallow copies are a snapshot
+                current = {key: list(account_data.get(key, [])) for key in ("income_items", "expense_items")}
+                history = dict(account_data.get("history", {})) if include_history else {}
+                lists, months, changed = await hass.async_add_executor_job(
+                    recategorize_account, categorizer, current, history, overwrite
+                )
+                if not changed:
+                    continue
+                account_data = entry_data["data"][name]
+                for key, items in lists.items():
+                    if [item.id for item in account_data.get(key, [])] == [item.id for item in current[key]]:
+                        account_data[key] = items
+                for year_month, month in months.items():
+                    if account_data.get("history", {}).get(year_month) is history[year_month]:
+                        account_data["history"][year_month] = month
+                if months:
+                    # Archived category totals changed: their statistics are computed again
+                    stats = await hass.async_add_executor_job(
+                        history_category_stats, dict(account_data["history"])
+                    )
+                    entry_data["data"][name][STATS_KEY] = stats
+                    entry_data["ranges"].set(
+                        name, await hass.async_add_executor_job(build_index, dict(account_data["history"]))
+                    )
+                changed_accounts.append(name)
+                _LOGGER.info("Recategorized %d item(s) of account %s", changed, name)
+            if not changed_accounts:
+                continue
+            entry = hass.config_entries.async_get_entry(entry_id)
+            await save_data(hass, entry)
+            for name in changed_accounts:
+                _async_dispatch_data_updated(hass, entry_id, name)
+
+    async def handle_compact_history(call):
+        """
+        Réduit les mois archivés plus anciens que les N derniers à leurs totaux par catégorie,
+        après avoir ajouté leurs éléments au fichier d'archive compressé (si activé).
+        Sans compte, s'applique à tous les comptes.
+        """
+        account = call.data.get(ATTR_ACCOUNT)
+        for entry_id, entry_data in list(hass.data[DOMAIN].items()):
+            accounts = [account] if account else list(entry_data["accounts"])
+            accounts = [name for name in accounts if name in entry_data["accounts"]]
+            keep_months = call.data.get(ATTR_KEEP_MONTHS, entry_data["history_detail_months"])
+            if not accounts or not keep_months:
+                continue
+            compacted = await async_compact_history(
+                hass,
+                entry_data["data"],
+                accounts,
+                keep_months,
+                call.data.get(ATTR_ARCHIVE, entry_data["history_archive"]),
+            )
+            if not compacted:
+                continue
+            entry = hass.config_entries.async_get_entry(entry_id)
+            await save_data(hass, entry)
+            for name in compacted:
+                _async_dispatch_data_updated(hass, entry_id, name)
+
     # Register new item services
     hass.services.async_register(
         DOMAIN, 
         SERVICE_ADD_INCOME_ITEM, 
-        handle_add_income_item, 
+        _instrument_service(hass, SERVICE_ADD_INCOME_ITEM, handle_add_income_item), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_AMOUNT): vol.Coerce(float),
             vol.Optional(ATTR_DESCRIPTION, default=""): cv.string,
             vol.Optional(ATTR_CATEGORY, default=""): cv.string,
+            vol.Optional(ATTR_IDEMPOTENCY_KEY): vol.All(cv.string, vol.Length(min=1, max=255)),
+            vol.Optional(ATTR_CHECK_DUPLICATES, default=False): cv.boolean,
         })
     )
     
     hass.services.async_register(
         DOMAIN, 
         SERVICE_ADD_EXPENSE_ITEM, 
-        handle_add_expense_item, 
+        _instrument_service(hass, SERVICE_ADD_EXPENSE_ITEM, handle_add_expense_item), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_AMOUNT): vol.Coerce(float),
             vol.Optional(ATTR_DESCRIPTION, default=""): cv.string,
             vol.Optional(ATTR_CATEGORY, default=""): cv.string,
+            vol.Optional(ATTR_IDEMPOTENCY_KEY): vol.All(cv.string, vol.Length(min=1, max=255)),
+            vol.Optional(ATTR_CHECK_DUPLICATES, default=False): cv.boolean,
         })
     )
     
     hass.services.async_register(
         DOMAIN, 
         SERVICE_REMOVE_ITEM, 
-        handle_remove_item, 
+        _instrument_service(hass, SERVICE_REMOVE_ITEM, handle_remove_item), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_ITEM_ID): cv.string,
         })
     )
     
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRANSFER,
+        _instrument_service(hass, SERVICE_TRANSFER, handle_transfer),
+        vol.Schema({
+            vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
+            vol.Required(ATTR_TO_ACCOUNT): cv.string,
+            vol.Required(ATTR_AMOUNT): vol.All(vol.Coerce(float), vol.Range(min=0.01)),
+            vol.Optional(ATTR_DESCRIPTION, default=""): cv.string,
+            vol.Optional(ATTR_CATEGORY, default=""): cv.string,
+        })
+    )
+
     # Register recurring item services
     hass.services.async_register(
         DOMAIN, 
         SERVICE_ADD_RECURRING_INCOME, 
-        handle_add_recurring_income, 
+        _instrument_service(hass, SERVICE_ADD_RECURRING_INCOME, handle_add_recurring_income), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_AMOUNT): vol.Coerce(float),
@@ -963,7 +1740,7 @@ def register_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, 
         SERVICE_ADD_RECURRING_EXPENSE, 
-        handle_add_recurring_expense, 
+        _instrument_service(hass, SERVICE_ADD_RECURRING_EXPENSE, handle_add_recurring_expense), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_AMOUNT): vol.Coerce(float),
@@ -979,7 +1756,7 @@ def register_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, 
         SERVICE_REMOVE_RECURRING_ITEM, 
-        handle_remove_recurring_item, 
+        _instrument_service(hass, SERVICE_REMOVE_RECURRING_ITEM, handle_remove_recurring_item), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Required(ATTR_ITEM_ID): cv.string,
@@ -990,7 +1767,7 @@ def register_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, 
         SERVICE_CLEAR_MONTH_ITEMS, 
-        handle_clear_month_items, 
+        _instrument_service(hass, SERVICE_CLEAR_MONTH_ITEMS, handle_clear_month_items), 
         vol.Schema({
             vol.Optional(ATTR_ACCOUNT, default="default"): cv.string,
             vol.Optional("clear_income", default=True): cv.boolean,
@@ -999,6 +1776,47 @@ def register_services(hass: HomeAssistant):
         })
     )
 
+    # Register profiling services
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_PROFILING,
+        handle_start_profiling,
+        vol.Schema({
+            vol.Optional(ATTR_CALLS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(ATTR_TOP, default=25): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        })
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_PROFILING,
+        handle_stop_profiling,
+        vol.Schema({})
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECATEGORIZE,
+        _instrument_service(hass, SERVICE_RECATEGORIZE, handle_recategorize),
+        vol.Schema({
+            vol.Optional(ATTR_ACCOUNT): cv.string,
+            vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+            vol.Optional(ATTR_INCLUDE_HISTORY, default=True): cv.boolean,
+        })
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPACT_HISTORY,
+        _instrument_service(hass, SERVICE_COMPACT_HISTORY, handle_compact_history),
+        vol.Schema({
+            vol.Optional(ATTR_ACCOUNT): cv.string,
+            vol.Optional(ATTR_KEEP_MONTHS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(ATTR_ARCHIVE): cv.boolean,
+        })
+    )
+
 # Need to import this after function definitions to avoid circular imports
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 
@@ -1006,12 +1824,5 @@ async def notify_data_update(hass, entry_id, account=None):
     """
     Notifie tous les composants d'une mise à jour des données (sensors et frontend).
     """
-    # Use the dispatcher for sensor updates
-    async_dispatcher_send(hass, f"{DOMAIN}_data_updated_{entry_id}")
-    
-    # Use the frontend integration helper to notify frontend components
-    event_data = {"entry_id": entry_id}
-    if account:
-        event_data["account"] = account
-        
-    notify_frontend(hass, f"{DOMAIN}_data_updated", event_data)
+    # Use the dispatcher for sensor updates; the frontend event is coalesced by the notifier
+    _async_dispatch_data_updated(hass, entry_id, account)
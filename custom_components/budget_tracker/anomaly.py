@@ -0,0 +1,138 @@
+"""Per-category spending statistics of archived periods and detection of unusual expenses."""
+import math
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_ANOMALY
+from .models import TRANSFER_ID, transfer_id
+from .schema import is_summary, month_category_totals, month_items
+
+# Account data key holding {category: [periods, mean, M2]} of the archived expense totals
+STATS_KEY = "category_stats"
+# Archived periods of a category needed before its spending is checked
+MIN_PERIODS = 3
+# Floor of the standard deviation, so a category with constant spending is not flagged for a cent
+MIN_STD_DEV = 1.0
+
+
+def welford_add(stats, value) -> list:
+    """Return ``[count, mean, M2]`` with ``value`` added (Welford's online algorithm)."""
+    count, mean, m2 = stats or (0, 0.0, 0.0)
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return [count, mean, m2]
+
+
+def std_dev(stats) -> float:
+    """Return the sample standard deviation of ``[count, mean, M2]`` (0 below two values)."""
+    count, _mean, m2 = stats
+    return math.sqrt(m2 / (count - 1)) if count > 1 and m2 > 0 else 0.0
+
+
+def category_totals(items) -> dict:
+    """Return {category: amount} of expense items (models or dicts), transfers excluded."""
+    totals = {}
+    for item in items:
+        if isinstance(item, dict):
+            if TRANSFER_ID in item:
+                continue
+            category, amount = item.get("category"), item.get("amount")
+        else:
+            if transfer_id(item) is not None:
+                continue
+            category, amount = item.category, item.amount
+        category = category or ""
+        totals[category] = totals.get(category, 0) + (amount or 0)
+    return {category: round(amount, 2) for category, amount in totals.items()}
+
+
+def update_category_stats(stats: dict, totals: dict) -> dict:
+    """
+    Add the per-category totals of one archived period to ``stats`` in place. Categories seen in
+    earlier periods without expense in this one count a zero. O(categories), history is not read.
+    """
+    for category in set(stats) | set(totals):
+        stats[category] = welford_add(stats.get(category), totals.get(category, 0))
+    return stats
+
+
+def history_category_stats(history: dict) -> dict:
+    """
+    Return the statistics of every archived period of an account, in period order (a full
+    read of the history: only for migrations and recategorizations).
+    """
+    stats = {}
+    for period_id in sorted(history):
+        month = history[period_id]
+        if not isinstance(month, dict):
+            continue
+        if is_summary(month):
+            totals = month_category_totals(month, "expense_items")
+        else:
+            totals = category_totals(month_items(month, "expense_items"))
+        update_category_stats(stats, totals)
+    return stats
+
+
+class AnomalyDetector:
+    """
+    Flags expenses pushing the spending of a category in the current period far above its
+    archived periods: ``(period total - mean) / standard deviation`` over a threshold. The
+    statistics are stored with each account and updated once per archived period, the current
+    total comes from the running spending totals, so a check is O(1). A category is flagged at
+    most once per period.
+    """
+
+    def __init__(self):
+        """Initialize the detector."""
+        self._flagged = {}
+
+    def check(self, account: str, account_data: dict, item, total: float, threshold: float):
+        """
+        Return the anomaly event data if an expense just added makes ``total``, the current
+        period total of its category, an outlier, else None.
+        """
+        if not threshold or transfer_id(item) is not None:
+            return None
+        category = item.category or ""
+        stats = account_data.get(STATS_KEY, {}).get(category)
+        if stats is None or stats[0] < MIN_PERIODS:
+            return None
+        flagged = self._flagged.setdefault(account, set())
+        if category in flagged:
+            return None
+        _count, mean, _m2 = stats
+        deviation = max(std_dev(stats), MIN_STD_DEV)
+        z_score = (total - mean) / deviation
+        if z_score < threshold:
+            return None
+        flagged.add(category)
+        return {
+            "account": account,
+            "category": category,
+            "item_id": item.id,
+            "amount": item.amount,
+            "description": item.description,
+            "period_total": round(total, 2),
+            "mean": round(mean, 2),
+            "std_dev": round(deviation, 2),
+            "z_score": round(z_score, 2),
+            "threshold": threshold,
+            "periods": stats[0],
+        }
+
+    @callback
+    def async_forget(self, account: str) -> None:
+        """Drop the flagged categories of an account (new period, or removed account)."""
+        self._flagged.pop(account, None)
+
+
+def get_anomaly_detector(hass: HomeAssistant) -> AnomalyDetector:
+    """Return the domain-level anomaly detector, creating it on first use."""
+    detector = hass.data.get(DATA_ANOMALY)
+    if detector is None:
+        detector = hass.data[DATA_ANOMALY] = AnomalyDetector()
+    return detector
+
@@ -0,0 +1,226 @@
+"""Automatic categorization of items from description patterns and amount ranges."""
+import re
+import unicodedata
+
+from .models import ITEM_LISTS, BudgetItem
+from .schema import compact_month, expand_month, is_compact, is_summary
+from .search import normalize
+
+# Characters making a pattern alternative a regular expression rather than literal text
+_REGEX_CHARS = frozenset(".^$*+?{}[]\\()")
+# "pattern => category" with an optional "[min..max]" amount range (either bound may be omitted)
+_RULE_RE = re.compile(
+    r"^(?P<pattern>.*?)\s*=>\s*(?P<category>.*?)"
+    r"(?:\s*\[\s*(?P<min>\d+(?:[.,]\d+)?)?\s*\.\.\s*(?P<max>\d+(?:[.,]\d+)?)?\s*\])?\s*$"
+)
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _amount(value):
+    return float(value.replace(",", ".")) if value else None
+
+
+class CategoryRule:
+    """Items whose description matches ``pattern`` and amount is in range get ``category``."""
+
+    __slots__ = ("pattern", "category", "min_amount", "max_amount")
+
+    def __init__(self, pattern: str, category: str, min_amount=None, max_amount=None):
+        """Initialize the rule."""
+        self.pattern = pattern
+        self.category = category
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def accepts(self, amount) -> bool:
+        """Return True if ``amount`` is in the range of the rule."""
+        amount = abs(amount or 0)
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        return self.max_amount is None or amount <= self.max_amount
+
+
+def parse_rules(text: str) -> list:
+    """
+    Parse the rules option, one ``pattern => category [min..max]`` per line, in priority order.
+    Patterns are case and accent insensitive regular expressions. Raises ValueError.
+    """
+    rules = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _RULE_RE.match(line)
+        if match is None or not match["category"]:
+            raise ValueError(f"Invalid categorization rule {line!r}")
+        pattern = _strip_accents(match["pattern"])
+        try:
+            re.compile(pattern)
+        except re.error as err:
+            raise ValueError(f"Invalid pattern {match['pattern']!r}: {err}") from None
+        rules.append(
+            CategoryRule(pattern, match["category"], _amount(match["min"]), _amount(match["max"]))
+        )
+    return rules
+
+
+def _literals(pattern: str):
+    """Return the normalized alternatives of a pattern made of literal text only, else None."""
+    alternatives = pattern.split("|")
+    if any(not alternative or _REGEX_CHARS & set(alternative) for alternative in alternatives):
+        return None
+    return [normalize(alternative) for alternative in alternatives]
+
+
+class _Automaton:
+    """Aho-Corasick automaton finding every keyword occurring in a text in one pass."""
+
+    def __init__(self, keywords: list):
+        """Build the automaton of ``keywords`` ([(text, value)])."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [frozenset()]
+        for text, value in keywords:
+            state = 0
+            for char in text:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                state = following
+            self._out[state] = self._out[state] | {value}
+        # Breadth-first failure links; each state also outputs the values of its failure state
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(char, 0)
+                self._out[following] = self._out[following] | self._out[self._fail[following]]
+
+    def find(self, text: str) -> set:
+        """Return the values of the keywords occurring in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class Categorizer:
+    """
+    Rules compiled into one combined matcher: the literal patterns (the common case, such as
+    ``carrefour|lidl``) into an Aho-Corasick automaton, the other ones into one regular expression
+    with an optional lookahead per rule. Both find every matching rule in a single pass over the
+    description; the first rule, in priority order, accepting the amount wins.
+    """
+
+    def __init__(self, rules: list):
+        """Compile the rules."""
+        self.rules = rules
+        keywords = []
+        expressions = []
+        for index, rule in enumerate(rules):
+            literals = _literals(rule.pattern)
+            if literals is None:
+                expressions.append(f"(?=.*?(?P<_r{index}>{rule.pattern}))?")
+            else:
+                keywords.extend((literal, index) for literal in literals)
+        self._automaton = _Automaton(keywords) if keywords else None
+        self._regex = re.compile("".join(expressions), re.IGNORECASE | re.DOTALL) if expressions else None
+        self._groups = (
+            {group: int(name[2:]) for name, group in self._regex.groupindex.items() if name.startswith("_r")}
+            if expressions else {}
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def category(self, description, amount):
+        """Return the category of an item, or None if no rule applies."""
+        if not self.rules:
+            return None
+        text = normalize(description)
+        matched = self._automaton.find(text) if self._automaton is not None else set()
+        if self._regex is not None:
+            match = self._regex.match(text)
+            if match.lastindex is not None:
+                matched.update(
+                    index for group, index in self._groups.items() if match.start(group) >= 0
+                )
+        for index in sorted(matched):
+            rule = self.rules[index]
+            if rule.accepts(amount):
+                return rule.category
+        return None
+
+
+def _with_category(item, category):
+    if isinstance(item, dict):
+        return {**item, "category": category}
+    values = {slot: getattr(item, slot) for slot in BudgetItem.__slots__}
+    values["category"] = category
+    return BudgetItem(**values)
+
+
+def _recategorize_items(categorizer: Categorizer, items: list, overwrite: bool):
+    """Return the recategorized copy of ``items`` and the number of changed items."""
+    result = []
+    changed = 0
+    for item in items:
+        get = item.get if isinstance(item, dict) else lambda key, item=item: getattr(item, key)
+        current = get("category") or ""
+        if current and not overwrite:
+            result.append(item)
+            continue
+        category = categorizer.category(get("description"), get("amount"))
+        if category is None or category == current:
+            result.append(item)
+            continue
+        result.append(_with_category(item, category))
+        changed += 1
+    return result, changed
+
+
+def recategorize_account(
+    categorizer: Categorizer, current: dict, history: dict, overwrite: bool = False
+) -> tuple:
+    """
+    Apply the rules to a snapshot of an account (executor): ``current`` item lists and archived
+    months. Returns ({list key: items}, {month: month data}, number of changed items) with only
+    the changed lists and months. Months reduced to category totals are left unchanged.
+    """
+    lists = {}
+    months = {}
+    total = 0
+    for key, items in current.items():
+        items, changed = _recategorize_items(categorizer, items, overwrite)
+        if changed:
+            lists[key] = items
+            total += changed
+    for year_month, month in history.items():
+        if not isinstance(month, dict) or is_summary(month):
+            continue
+        expanded = dict(expand_month(month))
+        month_changed = 0
+        for key in ITEM_LISTS:
+            if key in expanded:
+                expanded[key], changed = _recategorize_items(categorizer, expanded[key], overwrite)
+                month_changed += changed
+        if month_changed:
+            months[year_month] = compact_month(expanded) if is_compact(month) else expanded
+            total += month_changed
+    return lists, months, total
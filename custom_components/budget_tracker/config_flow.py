@@ -1,58 +1,50 @@
 """Config flow for Budget Tracker integration."""
 from typing import Any, Dict, Optional
 import voluptuous as vol
-import json
-import os
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
 
 from .const import (
     DOMAIN,
-    NAME,
     CONF_ACCOUNTS,
+    CONF_NOTIFY_INTERVAL,
+    CONF_HISTORY_DETAIL_MONTHS,
+    CONF_HISTORY_ARCHIVE,
+    CONF_BUDGET_PERIODS,
+    CONF_CATEGORY_RULES,
+    CONF_ANOMALY_THRESHOLD,
+    CONF_CATEGORY_BUDGETS,
+    CONF_BUDGET_THRESHOLDS,
+    CONF_HOUSEHOLD_SENSORS,
+    CONF_ACCOUNT_GROUPS,
     CONF_STORAGE_TYPE,
-    STORAGE_TYPE_FILE,
+    STORAGE_TYPES,
+    DEFAULT_NOTIFY_INTERVAL,
+    DEFAULT_HISTORY_DETAIL_MONTHS,
+    DEFAULT_HISTORY_ARCHIVE,
+    DEFAULT_BUDGET_PERIODS,
+    DEFAULT_CATEGORY_RULES,
+    DEFAULT_ANOMALY_THRESHOLD,
+    DEFAULT_CATEGORY_BUDGETS,
+    DEFAULT_BUDGET_THRESHOLDS,
+    DEFAULT_HOUSEHOLD_SENSORS,
+    DEFAULT_ACCOUNT_GROUPS,
     DEFAULT_STORAGE_TYPE,
-    DATA_STORAGE_FILE,
 )
+from .categorize import parse_rules
+from .envelopes import parse_budgets, parse_thresholds
+from .household import parse_groups
+from .periods import parse_periods
+from .store import get_store
 
 class BudgetTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Budget Tracker."""
 
     VERSION = 1
 
-    def add_device_node_to_storage(self, account_name):
-        """
-        Create a node for the account in DATA_STORAGE_FILE if absent.
-        """
-        if not os.path.exists(DATA_STORAGE_FILE):
-            data = {}
-        else:
-            try:
-                with open(DATA_STORAGE_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except Exception:
-                data = {}
-        if account_name not in data:
-            data[account_name] = {
-                "income": 0, 
-                "expenses": 0, 
-                "balance": 0, 
-                "income_items": [], 
-                "expense_items": [], 
-                "recurring_incomes": [],
-                "recurring_expenses": [],
-                "history": {}
-            }
-            with open(DATA_STORAGE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        return False
-
     async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
         """Handle the initial step."""
         errors = {}
@@ -63,14 +55,15 @@ class BudgetTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             if not accounts:
                 errors[CONF_ACCOUNTS] = "no_accounts"
             else:
-                for account in accounts:
-                    self.add_device_node_to_storage(account)
+                # Create the account nodes in one write, done in the executor
+                storage_type = user_input.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
+                await get_store(self.hass, storage_type).async_update_accounts(added=accounts)
                 # Store the validated data
                 return self.async_create_entry(
                     title=", ".join(accounts),
                     data={
                         CONF_ACCOUNTS: accounts,
-                        CONF_STORAGE_TYPE: user_input.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE),
+                        CONF_STORAGE_TYPE: storage_type,
                     },
                 )
 
@@ -81,7 +74,7 @@ class BudgetTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 {
                     vol.Required(CONF_ACCOUNTS, default="default"): str,
                     vol.Optional(CONF_STORAGE_TYPE, default=DEFAULT_STORAGE_TYPE): vol.In(
-                        [STORAGE_TYPE_FILE]
+                        STORAGE_TYPES
                     ),
                 }
             ),
@@ -109,23 +102,112 @@ class BudgetTrackerOptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             # Validate accounts
             accounts = [a.strip() for a in user_input[CONF_ACCOUNTS].split(",") if a.strip()]
+            periods = user_input.get(CONF_BUDGET_PERIODS, DEFAULT_BUDGET_PERIODS)
+            try:
+                parse_periods(periods)
+            except ValueError:
+                errors[CONF_BUDGET_PERIODS] = "invalid_periods"
+            rules = user_input.get(CONF_CATEGORY_RULES, DEFAULT_CATEGORY_RULES)
+            try:
+                parse_rules(rules)
+            except ValueError:
+                errors[CONF_CATEGORY_RULES] = "invalid_rules"
+            budgets = user_input.get(CONF_CATEGORY_BUDGETS, DEFAULT_CATEGORY_BUDGETS)
+            try:
+                parse_budgets(budgets)
+            except ValueError:
+                errors[CONF_CATEGORY_BUDGETS] = "invalid_budgets"
+            thresholds = user_input.get(CONF_BUDGET_THRESHOLDS, DEFAULT_BUDGET_THRESHOLDS)
+            try:
+                parse_thresholds(thresholds)
+            except ValueError:
+                errors[CONF_BUDGET_THRESHOLDS] = "invalid_thresholds"
+            groups = user_input.get(CONF_ACCOUNT_GROUPS, DEFAULT_ACCOUNT_GROUPS)
+            try:
+                parse_groups(groups)
+            except ValueError:
+                errors[CONF_ACCOUNT_GROUPS] = "invalid_groups"
             if not accounts:
                 errors[CONF_ACCOUNTS] = "no_accounts"
-            else:
+            elif not errors:
+                # Applied in place by the entry's update listener (no reload)
                 return self.async_create_entry(
                     title=", ".join(accounts),
                     data={
                         CONF_ACCOUNTS: accounts,
                         CONF_STORAGE_TYPE: user_input.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE),
+                        CONF_NOTIFY_INTERVAL: user_input.get(CONF_NOTIFY_INTERVAL, DEFAULT_NOTIFY_INTERVAL),
+                        CONF_HISTORY_DETAIL_MONTHS: user_input.get(
+                            CONF_HISTORY_DETAIL_MONTHS, DEFAULT_HISTORY_DETAIL_MONTHS
+                        ),
+                        CONF_HISTORY_ARCHIVE: user_input.get(CONF_HISTORY_ARCHIVE, DEFAULT_HISTORY_ARCHIVE),
+                        CONF_BUDGET_PERIODS: periods,
+                        CONF_CATEGORY_RULES: rules,
+                        CONF_ANOMALY_THRESHOLD: user_input.get(
+                            CONF_ANOMALY_THRESHOLD, DEFAULT_ANOMALY_THRESHOLD
+                        ),
+                        CONF_CATEGORY_BUDGETS: budgets,
+                        CONF_BUDGET_THRESHOLDS: thresholds,
+                        CONF_HOUSEHOLD_SENSORS: user_input.get(
+                            CONF_HOUSEHOLD_SENSORS, DEFAULT_HOUSEHOLD_SENSORS
+                        ),
+                        CONF_ACCOUNT_GROUPS: groups,
                     },
                 )
 
         # Get current values or defaults
-        current_accounts = self.config_entry.data.get(CONF_ACCOUNTS, ["default"])
+        current_accounts = self.config_entry.options.get(
+            CONF_ACCOUNTS, self.config_entry.data.get(CONF_ACCOUNTS, ["default"])
+        )
         if isinstance(current_accounts, list):
             current_accounts = ", ".join(current_accounts)
         
         current_storage_type = self.config_entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
+        current_notify_interval = self.config_entry.options.get(
+            CONF_NOTIFY_INTERVAL,
+            self.config_entry.data.get(CONF_NOTIFY_INTERVAL, DEFAULT_NOTIFY_INTERVAL),
+        )
+        current_detail_months = self.config_entry.options.get(
+            CONF_HISTORY_DETAIL_MONTHS,
+            self.config_entry.data.get(CONF_HISTORY_DETAIL_MONTHS, DEFAULT_HISTORY_DETAIL_MONTHS),
+        )
+        current_archive = self.config_entry.options.get(
+            CONF_HISTORY_ARCHIVE,
+            self.config_entry.data.get(CONF_HISTORY_ARCHIVE, DEFAULT_HISTORY_ARCHIVE),
+        )
+
+        current_periods = self.config_entry.options.get(
+            CONF_BUDGET_PERIODS,
+            self.config_entry.data.get(CONF_BUDGET_PERIODS, DEFAULT_BUDGET_PERIODS),
+        )
+
+        current_rules = self.config_entry.options.get(
+            CONF_CATEGORY_RULES,
+            self.config_entry.data.get(CONF_CATEGORY_RULES, DEFAULT_CATEGORY_RULES),
+        )
+
+        current_threshold = self.config_entry.options.get(
+            CONF_ANOMALY_THRESHOLD,
+            self.config_entry.data.get(CONF_ANOMALY_THRESHOLD, DEFAULT_ANOMALY_THRESHOLD),
+        )
+
+        current_budgets = self.config_entry.options.get(
+            CONF_CATEGORY_BUDGETS,
+            self.config_entry.data.get(CONF_CATEGORY_BUDGETS, DEFAULT_CATEGORY_BUDGETS),
+        )
+        current_thresholds = self.config_entry.options.get(
+            CONF_BUDGET_THRESHOLDS,
+            self.config_entry.data.get(CONF_BUDGET_THRESHOLDS, DEFAULT_BUDGET_THRESHOLDS),
+        )
+
+        current_household = self.config_entry.options.get(
+            CONF_HOUSEHOLD_SENSORS,
+            self.config_entry.data.get(CONF_HOUSEHOLD_SENSORS, DEFAULT_HOUSEHOLD_SENSORS),
+        )
+        current_groups = self.config_entry.options.get(
+            CONF_ACCOUNT_GROUPS,
+            self.config_entry.data.get(CONF_ACCOUNT_GROUPS, DEFAULT_ACCOUNT_GROUPS),
+        )
 
         # Show form (no name field)
         return self.async_show_form(
@@ -133,9 +215,30 @@ class BudgetTrackerOptionsFlowHandler(config_entries.OptionsFlow):
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_ACCOUNTS, default=current_accounts): str,
+                    # The storage type is chosen when the entry is created
                     vol.Required(CONF_STORAGE_TYPE, default=current_storage_type): vol.In(
-                        [STORAGE_TYPE_FILE]
+                        [current_storage_type]
+                    ),
+                    vol.Optional(CONF_NOTIFY_INTERVAL, default=current_notify_interval): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=60)
+                    ),
+                    vol.Optional(CONF_HISTORY_DETAIL_MONTHS, default=current_detail_months): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=240)
+                    ),
+                    vol.Optional(CONF_HISTORY_ARCHIVE, default=current_archive): bool,
+                    vol.Optional(CONF_BUDGET_PERIODS, default=current_periods): str,
+                    vol.Optional(CONF_CATEGORY_RULES, default=current_rules): TextSelector(
+                        TextSelectorConfig(multiline=True)
+                    ),
+                    vol.Optional(CONF_ANOMALY_THRESHOLD, default=current_threshold): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=10)
+                    ),
+                    vol.Optional(CONF_CATEGORY_BUDGETS, default=current_budgets): TextSelector(
+                        TextSelectorConfig(multiline=True)
                     ),
+                    vol.Optional(CONF_BUDGET_THRESHOLDS, default=current_thresholds): str,
+                    vol.Optional(CONF_HOUSEHOLD_SENSORS, default=current_household): bool,
+                    vol.Optional(CONF_ACCOUNT_GROUPS, default=current_groups): str,
                 }
             ),
             errors=errors,
@@ -8,10 +8,41 @@ VERSION = "0.6.0"
 # Configuration
 CONF_ACCOUNTS = "accounts"
 CONF_STORAGE_TYPE = "storage_type"
+CONF_NOTIFY_INTERVAL = "notify_interval"
+CONF_HISTORY_DETAIL_MONTHS = "history_detail_months"
+CONF_HISTORY_ARCHIVE = "history_archive"
+CONF_BUDGET_PERIODS = "budget_periods"
+CONF_CATEGORY_RULES = "category_rules"
+CONF_ANOMALY_THRESHOLD = "anomaly_threshold"
+CONF_CATEGORY_BUDGETS = "category_budgets"
+CONF_BUDGET_THRESHOLDS = "budget_thresholds"
+CONF_HOUSEHOLD_SENSORS = "household_sensors"
+CONF_ACCOUNT_GROUPS = "account_groups"
 
 STORAGE_TYPE_FILE = "file"
+# Home Assistant storage helper (.storage/budget_tracker.data): atomic, delayed writes
+STORAGE_TYPE_STORE = "store"
+STORAGE_TYPES = [STORAGE_TYPE_FILE, STORAGE_TYPE_STORE]
 
 DEFAULT_STORAGE_TYPE = STORAGE_TYPE_FILE
+# Minimum delay between two frontend update events for the same account (seconds)
+DEFAULT_NOTIFY_INTERVAL = 1.0
+# Archived months keeping their items (older ones keep per-category totals); 0 keeps everything
+DEFAULT_HISTORY_DETAIL_MONTHS = 0
+DEFAULT_HISTORY_ARCHIVE = True
+# Budget period of each account ("account=monthly:25, weekly:monday"); empty means calendar months
+DEFAULT_BUDGET_PERIODS = ""
+# Auto-categorization rules, one "pattern => category [min..max]" per line
+DEFAULT_CATEGORY_RULES = ""
+# z-score over which an expense makes its category's spending unusual; 0 disables the check
+DEFAULT_ANOMALY_THRESHOLD = 3.0
+# Spending limit per budget period of categories, one "[account:] category = limit" per line
+DEFAULT_CATEGORY_BUDGETS = ""
+# Percentages of a category limit firing an event when its spending reaches them
+DEFAULT_BUDGET_THRESHOLDS = "80, 100"
+# Consolidated sensors of all accounts, and of account groups ("famille=courant+epargne, ...")
+DEFAULT_HOUSEHOLD_SENSORS = False
+DEFAULT_ACCOUNT_GROUPS = ""
 
 # Services
 SERVICE_SET_INCOME = "set_income"
@@ -24,6 +55,11 @@ SERVICE_ADD_RECURRING_INCOME = "add_recurring_income"
 SERVICE_ADD_RECURRING_EXPENSE = "add_recurring_expense"
 SERVICE_REMOVE_RECURRING_ITEM = "remove_recurring_item"
 SERVICE_CLEAR_MONTH_ITEMS = "clear_month_items"
+SERVICE_START_PROFILING = "start_profiling"
+SERVICE_STOP_PROFILING = "stop_profiling"
+SERVICE_COMPACT_HISTORY = "compact_history"
+SERVICE_TRANSFER = "transfer"
+SERVICE_RECATEGORIZE = "recategorize"
 
 # Attributes
 ATTR_ACCOUNT = "account"
@@ -42,6 +78,16 @@ ATTR_RECURRING_INCOMES = "recurring_incomes"
 ATTR_RECURRING_EXPENSES = "recurring_expenses"
 ATTR_DAY_OF_MONTH = "day_of_month"
 ATTR_END_DATE = "end_date"
+ATTR_CALLS = "calls"
+ATTR_DURATION = "duration"
+ATTR_TOP = "top"
+ATTR_KEEP_MONTHS = "keep_months"
+ATTR_ARCHIVE = "archive"
+ATTR_IDEMPOTENCY_KEY = "idempotency_key"
+ATTR_CHECK_DUPLICATES = "check_duplicates"
+ATTR_TO_ACCOUNT = "to_account"
+ATTR_OVERWRITE = "overwrite"
+ATTR_INCLUDE_HISTORY = "include_history"
 
 # Sensor names
 INCOME_SENSOR = "income_current_month"
@@ -53,6 +99,30 @@ SCAN_INTERVAL = timedelta(minutes=5)
 
 # Data storage
 DATA_STORAGE_FILE = "budget_tracker_data.json"
+# Key of the Home Assistant storage helper backend, and delay coalescing its writes (seconds)
+STORAGE_KEY = f"{DOMAIN}.data"
+STORAGE_SAVE_DELAY = 5
+# Items of the compacted archived months (gzip members of JSON lines)
+DATA_ARCHIVE_FILE = "budget_tracker_archive.jsonl.gz"
+
+# hass.data key of the running profiler
+DATA_PROFILER = f"{DOMAIN}_profiler"
+# hass.data key of the coalescing frontend notifier
+DATA_NOTIFIER = f"{DOMAIN}_notifier"
+# hass.data key of the budget data stores shared by all entries, by storage type
+DATA_STORE = f"{DOMAIN}_store"
+# hass.data key of the item search index
+DATA_SEARCH = f"{DOMAIN}_search"
+# hass.data key of the idempotency and duplicate detection indexes
+DATA_DEDUP = f"{DOMAIN}_dedup"
+# hass.data key of the unusual spending detector
+DATA_ANOMALY = f"{DOMAIN}_anomaly"
+# hass.data key of the running per-category expense totals
+DATA_SPENDING = f"{DOMAIN}_spending"
+# hass.data key of the consolidated household and account group totals
+DATA_HOUSEHOLD = f"{DOMAIN}_household"
 
 # Events
-EVENT_MONTH_CHANGED = f"{DOMAIN}_month_changed"
\ No newline at end of file
+EVENT_MONTH_CHANGED = f"{DOMAIN}_month_changed"
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+EVENT_THRESHOLD_CROSSED = f"{DOMAIN}_threshold_crossed"
\ No newline at end of file
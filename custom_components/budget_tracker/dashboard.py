@@ -0,0 +1,156 @@
+"""Cached per-account view models served to the dashboards."""
+import calendar
+from datetime import date, datetime
+import heapq
+
+from homeassistant.util import slugify
+
+from .ids import order_key
+from .models import ATTR_TRANSFERS_IN, ATTR_TRANSFERS_OUT, items_to_dicts, transfer_id
+
+# Number of entries in the summary lists
+TOP_CATEGORIES = 5
+LAST_ITEMS = 10
+UPCOMING_RECURRING = 10
+
+
+def _next_occurrence(day_of_month, today: date) -> date:
+    """Return the next date (today included) falling on ``day_of_month``."""
+    year, month = today.year, today.month
+    for _ in range(2):
+        day = min(max(int(day_of_month or 1), 1), calendar.monthrange(year, month)[1])
+        if day >= today.day or (year, month) != (today.year, today.month):
+            return date(year, month, day)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return today
+
+
+def _is_expired(rule, today: date) -> bool:
+    if not rule.end_date:
+        return False
+    try:
+        return datetime.fromisoformat(rule.end_date).date() < today
+    except (ValueError, TypeError):
+        return False
+
+
+def _top_categories(items, limit=TOP_CATEGORIES) -> list:
+    totals = {}
+    for item in items:
+        category = item.category or ""
+        total, count = totals.get(category, (0, 0))
+        totals[category] = (total + item.amount, count + 1)
+    return [
+        {"category": category, "amount": total, "count": count}
+        for category, (total, count) in heapq.nlargest(
+            limit, totals.items(), key=lambda entry: entry[1][0]
+        )
+    ]
+
+
+def _last_items(account_data: dict, limit=LAST_ITEMS) -> list:
+    tagged = [("income", item) for item in account_data.get("income_items", [])]
+    tagged += [("expense", item) for item in account_data.get("expense_items", [])]
+    latest = heapq.nlargest(limit, tagged, key=lambda entry: order_key(entry[1].id, entry[1].timestamp))
+    return [{**item.as_dict(), "type": item_type} for item_type, item in latest]
+
+
+def _upcoming_recurring(account_data: dict, today: date, limit=UPCOMING_RECURRING) -> list:
+    upcoming = []
+    for key, rule_type in (("recurring_incomes", "income"), ("recurring_expenses", "expense")):
+        for rule in account_data.get(key, []):
+            if _is_expired(rule, today):
+                continue
+            upcoming.append((_next_occurrence(rule.day_of_month, today), rule_type, rule))
+    upcoming = heapq.nsmallest(limit, upcoming, key=lambda entry: entry[0])
+    return [
+        {**rule.as_dict(), "type": rule_type, "next_date": next_date.isoformat()}
+        for next_date, rule_type, rule in upcoming
+    ]
+
+
+def build_account_summary(account: str, account_data: dict, today: date) -> dict:
+    """Build the dashboard summary of an account."""
+    return {
+        "name": account,
+        "slug": slugify(account),
+        "income": account_data.get("income", 0),
+        "expenses": account_data.get("expenses", 0),
+        "balance": account_data.get("balance", 0),
+        ATTR_TRANSFERS_IN: account_data.get(ATTR_TRANSFERS_IN, 0),
+        ATTR_TRANSFERS_OUT: account_data.get(ATTR_TRANSFERS_OUT, 0),
+        "item_counts": {
+            key: len(account_data.get(key, []))
+            for key in ("income_items", "expense_items", "recurring_incomes", "recurring_expenses")
+        },
+        "top_categories": _top_categories(
+            item for item in account_data.get("expense_items", []) if not transfer_id(item)
+        ),
+        "upcoming_recurring": _upcoming_recurring(account_data, today),
+        "last_items": _last_items(account_data),
+        "archived_months": len(account_data.get("history", {})),
+    }
+
+
+def build_account_view(account: str, account_data: dict) -> dict:
+    """Build the full view model of an account (totals, items, rules and monthly history totals)."""
+    return {
+        "name": account,
+        "slug": slugify(account),
+        "income": account_data.get("income", 0),
+        "expenses": account_data.get("expenses", 0),
+        "balance": account_data.get("balance", 0),
+        ATTR_TRANSFERS_IN: account_data.get(ATTR_TRANSFERS_IN, 0),
+        ATTR_TRANSFERS_OUT: account_data.get(ATTR_TRANSFERS_OUT, 0),
+        "income_items": items_to_dicts(account_data.get("income_items", [])),
+        "expense_items": items_to_dicts(account_data.get("expense_items", [])),
+        "recurring_incomes": items_to_dicts(account_data.get("recurring_incomes", [])),
+        "recurring_expenses": items_to_dicts(account_data.get("recurring_expenses", [])),
+        "history": {
+            year_month: {
+                "income": month.get("income", 0),
+                "expenses": month.get("expenses", 0),
+                "balance": month.get("balance", 0),
+            }
+            for year_month, month in sorted(account_data.get("history", {}).items())
+        },
+    }
+
+
+class ViewCache:
+    """
+    View models of the accounts of an entry, computed once per change.
+    Mutations invalidate only the account they touched.
+    """
+
+    def __init__(self, metrics=None):
+        """Initialize the cache."""
+        self._views = {}
+        self._metrics = metrics
+
+    def get(self, kind: str, account: str, account_data: dict) -> dict:
+        """Return the cached ``kind`` view ("summary" or "view") of an account, building it if needed."""
+        today = date.today() if kind == "summary" else None
+        key = (kind, account)
+        cached = self._views.get(key)
+        # Summaries depend on the current date (upcoming recurring charges)
+        if cached is not None and cached[0] == today:
+            if self._metrics is not None:
+                self._metrics.increment("view_cache_hits")
+            return cached[1]
+        if self._metrics is not None:
+            self._metrics.increment("view_cache_misses")
+        if kind == "summary":
+            view = build_account_summary(account, account_data, today)
+        else:
+            view = build_account_view(account, account_data)
+        self._views[key] = (today, view)
+        return view
+
+    def invalidate(self, account: str = None) -> None:
+        """Drop the views of an account, or of every account."""
+        if account is None:
+            self._views.clear()
+            return
+        self._views.pop(("summary", account), None)
+        self._views.pop(("view", account), None)
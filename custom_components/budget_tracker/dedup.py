@@ -0,0 +1,154 @@
+"""Idempotency keys and duplicate detection for the items added by services."""
+from collections import OrderedDict
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import ATTR_IDEMPOTENCY_KEY, DATA_DEDUP, DOMAIN
+from .search import normalize
+
+# Idempotency keys remembered per account (least recently used ones are forgotten first)
+IDEMPOTENCY_KEYS = 1000
+_ITEM_LISTS = ("income_items", "expense_items")
+
+
+def content_key(list_key: str, amount, timestamp, description) -> tuple:
+    """Return the duplicate detection key of an item: type, amount in cents, day and normalized description."""
+    try:
+        day = datetime.fromisoformat(timestamp).date().isoformat()
+    except (TypeError, ValueError):
+        day = None
+    return (list_key, round((amount or 0) * 100), day, " ".join(normalize(description).split()))
+
+
+def _item_key(list_key: str, item) -> tuple:
+    return content_key(list_key, item.amount, item.timestamp, item.description)
+
+
+def _idempotency_key(item):
+    return item.extra.get(ATTR_IDEMPOTENCY_KEY) if item.extra else None
+
+
+class _AccountGuard:
+    """Idempotency keys and content keys of one account's current items."""
+
+    def __init__(self, account_data: dict):
+        """Seed the keys from the current items of the account."""
+        self.keys = OrderedDict()
+        # item id -> content key, and content key -> number of current items having it
+        self.items = {}
+        self.contents = {}
+        for list_key in _ITEM_LISTS:
+            for item in account_data.get(list_key, []):
+                self.add(list_key, item)
+
+    def add(self, list_key: str, item) -> None:
+        key = _idempotency_key(item)
+        if key is not None:
+            self.keys[key] = item.id
+            self.keys.move_to_end(key)
+            while len(self.keys) > IDEMPOTENCY_KEYS:
+                self.keys.popitem(last=False)
+        content = _item_key(list_key, item)
+        self.items[item.id] = content
+        self.contents[content] = self.contents.get(content, 0) + 1
+
+    def discard(self, item_id) -> None:
+        content = self.items.pop(item_id, None)
+        if content is None:
+            return
+        remaining = self.contents[content] - 1
+        if remaining:
+            self.contents[content] = remaining
+        else:
+            del self.contents[content]
+
+
+class IngestionGuard:
+    """
+    Per-account indexes making retried and overlapping adds O(1) no-ops: a bounded map of
+    idempotency keys and a count of the content keys of the current items. Built from the
+    current items on the first add of an account, then kept up to date by the dispatch path.
+    """
+
+    def __init__(self):
+        """Initialize the guard."""
+        self._accounts = {}
+
+    def _guard(self, account: str, account_data: dict) -> _AccountGuard:
+        guard = self._accounts.get(account)
+        if guard is None:
+            guard = self._accounts[account] = _AccountGuard(account_data)
+        return guard
+
+    def find_duplicate(
+        self, account: str, account_data: dict, idempotency_key=None, content=None
+    ):
+        """
+        Return why an add is a duplicate ("idempotency_key" or "content"), or None:
+        a known idempotency key, or a current item with the same ``content`` key.
+        """
+        guard = self._guard(account, account_data)
+        if idempotency_key is not None and idempotency_key in guard.keys:
+            guard.keys.move_to_end(idempotency_key)
+            return "idempotency_key"
+        if content is not None and content in guard.contents:
+            return "content"
+        return None
+
+    def record(self, account: str, account_data: dict, list_key: str, item) -> None:
+        """Register an item just added to the current month."""
+        guard = self._guard(account, account_data)
+        guard.discard(item.id)
+        guard.add(list_key, item)
+
+    @callback
+    def async_update(self, account: str, account_data: dict, ids=None) -> None:
+        """
+        Apply a change of an account: refresh the content keys of ``ids`` (idempotency keys
+        of removed items are kept, a retry stays a no-op), or of every item if None.
+        """
+        guard = self._accounts.get(account)
+        if guard is None:
+            return
+        if ids is None:
+            keys = guard.keys
+            guard = self._accounts[account] = _AccountGuard(account_data)
+            # Keys of items archived or removed since stay known, newer ones last
+            keys.update(guard.keys)
+            guard.keys = keys
+            while len(guard.keys) > IDEMPOTENCY_KEYS:
+                guard.keys.popitem(last=False)
+            return
+        ids = set(ids)
+        for item_id in ids:
+            guard.discard(item_id)
+        for list_key in _ITEM_LISTS:
+            for item in account_data.get(list_key, []):
+                if item.id in ids or item.recurring_id in ids:
+                    guard.discard(item.id)
+                    guard.add(list_key, item)
+
+    @callback
+    def async_forget(self, account: str) -> None:
+        """Drop the indexes of a removed account."""
+        self._accounts.pop(account, None)
+
+
+def get_ingestion_guard(hass: HomeAssistant) -> IngestionGuard:
+    """Return the domain-level ingestion guard, creating it on first use."""
+    guard = hass.data.get(DATA_DEDUP)
+    if guard is None:
+        guard = hass.data[DATA_DEDUP] = IngestionGuard()
+    return guard
+
+
+@callback
+def async_update_ingestion_guard(hass: HomeAssistant, entry_id: str, account: str = None, items=None) -> None:
+    """Apply a data change of an account (or of every account of an entry) to the ingestion guard."""
+    guard = hass.data.get(DATA_DEDUP)
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if guard is None or entry_data is None:
+        return
+    for name in [account] if account else entry_data["accounts"]:
+        guard.async_update(name, entry_data["data"].get(name, {}), items)
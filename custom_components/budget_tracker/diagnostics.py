@@ -0,0 +1,58 @@
+"""Diagnostics support for Budget Tracker."""
+import os
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import get_entry_accounts
+from .const import CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE, DOMAIN
+from .instrumentation import get_entry_metrics
+from .schema import SCHEMA_VERSION, month_item_count
+from .store import get_store
+
+
+def _storage_size(file_path: str) -> int:
+    return os.path.getsize(file_path) if os.path.exists(file_path) else 0
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    data = entry_data.get("data", {})
+    metrics = get_entry_metrics(hass, entry.entry_id)
+
+    accounts = {}
+    for account in entry_data.get("accounts", get_entry_accounts(entry)):
+        account_data = data.get(account, {})
+        history = account_data.get("history", {})
+        accounts[account] = {
+            "income_items": len(account_data.get("income_items", [])),
+            "expense_items": len(account_data.get("expense_items", [])),
+            "recurring_incomes": len(account_data.get("recurring_incomes", [])),
+            "recurring_expenses": len(account_data.get("recurring_expenses", [])),
+            "history_months": len(history),
+            "history_items": sum(
+                month_item_count(month, "income_items") + month_item_count(month, "expense_items")
+                for month in history.values()
+            ),
+        }
+
+    storage_type = entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE)
+    file_path = get_store(hass, storage_type).file_path
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+        },
+        "storage": {
+            "type": storage_type,
+            "path": file_path,
+            "schema_version": SCHEMA_VERSION,
+            "size_bytes": await hass.async_add_executor_job(_storage_size, file_path),
+        },
+        "accounts": accounts,
+        "metrics": metrics.as_dict() if metrics is not None else {},
+    }
@@ -0,0 +1,75 @@
+"""Category budget envelopes: spending limits per budget period and their alert thresholds."""
+import re
+
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+# "[account:] category = limit"
+_BUDGET_RE = re.compile(r"^(?:(?P<account>[^:=]+?)\s*:\s*)?(?P<category>[^=]*?)\s*=\s*(?P<limit>\d+(?:[.,]\d+)?)\s*$")
+
+
+def parse_budgets(text: str) -> dict:
+    """
+    Parse the envelopes option, one ``[account:] category = limit`` per line. A line without
+    account applies to every account; an account's own line for a category overrides it.
+    Returns {account or None: {category: limit}}. Raises ValueError.
+    """
+    budgets = {}
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _BUDGET_RE.match(line)
+        if match is None or not match["category"]:
+            raise ValueError(f"Invalid budget {line!r}")
+        limit = float(match["limit"].replace(",", "."))
+        if limit <= 0:
+            raise ValueError(f"Invalid limit in {line!r}")
+        budgets.setdefault(match["account"], {})[match["category"]] = limit
+    return budgets
+
+
+def parse_thresholds(text: str) -> list:
+    """Parse the alert thresholds option: comma separated percentages of the limit, sorted."""
+    thresholds = set()
+    for value in (text or "").split(","):
+        value = value.strip().rstrip("%").strip()
+        if not value:
+            continue
+        try:
+            threshold = float(value.replace(",", "."))
+        except ValueError:
+            raise ValueError(f"Invalid threshold {value!r}") from None
+        if threshold <= 0:
+            raise ValueError(f"Invalid threshold {value!r}")
+        thresholds.add(threshold)
+    return sorted(thresholds)
+
+
+def account_budgets(budgets: dict, account: str) -> dict:
+    """Return {category: limit} of an account from parsed budgets."""
+    return {**budgets.get(None, {}), **budgets.get(account, {})}
+
+
+def envelope_unique_id(account: str, category: str) -> str:
+    """Return the unique id of the remaining amount sensor of an envelope."""
+    return f"{DOMAIN}_{account}_budget_{slugify(category) or 'uncategorized'}"
+
+
+def crossed_thresholds(limit: float, thresholds: list, previous: float, total: float) -> list:
+    """Return the thresholds (percentages of ``limit``) a total crossed upwards from ``previous``."""
+    return [
+        threshold for threshold in thresholds
+        if previous < limit * threshold / 100 <= total
+    ]
+
+
+def envelope_state(limit: float, spent: float) -> dict:
+    """Return the remaining amount and used percentage of an envelope."""
+    return {
+        "limit": limit,
+        "spent": round(spent, 2),
+        "remaining": round(limit - spent, 2),
+        "percent": round(spent / limit * 100, 1),
+    }
@@ -0,0 +1,186 @@
+"""Cash-flow forecasts of the accounts from their recurring rules and past spending."""
+from datetime import date, datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .models import TRANSFER_ID, transfer_id
+from .periods import PERIOD_START, account_period, add_months, stored_period_start
+from .schema import is_summary, month_items
+
+# Months projected ahead of the start of the current period
+FORECAST_MONTHS = 12
+# Most recent archived periods averaged for the non-recurring spending
+AVERAGE_PERIODS = 12
+
+
+def _non_recurring_spending(items) -> float:
+    """Return the total of expense items (models or dicts) not made by a rule, transfers excluded."""
+    total = 0
+    for item in items:
+        if isinstance(item, dict):
+            if item.get("recurring_id") or TRANSFER_ID in item:
+                continue
+            total += item.get("amount") or 0
+        elif not item.recurring_id and transfer_id(item) is None:
+            total += item.amount or 0
+    return total
+
+
+def average_spending(history: dict, periods: int = AVERAGE_PERIODS) -> float:
+    """
+    Return the average non-recurring spending of the most recent archived periods keeping their
+    items (periods reduced to category totals cannot tell recurring items apart), 0 without any.
+    """
+    totals = []
+    for period_id in sorted(history, reverse=True):
+        month = history[period_id]
+        if not isinstance(month, dict) or is_summary(month):
+            continue
+        totals.append(_non_recurring_spending(month_items(month, "expense_items")))
+        if len(totals) == periods:
+            break
+    return sum(totals) / len(totals) if totals else 0.0
+
+
+def _end_date(rule):
+    if not rule.end_date:
+        return None
+    try:
+        return datetime.fromisoformat(rule.end_date).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def _rules_total(rules, period, start: date) -> float:
+    """Return the amount of the rules still active on their day of the period starting on ``start``."""
+    total = 0
+    for rule in rules:
+        end = _end_date(rule)
+        if end is None or period.occurrence(start, rule.day_of_month) <= end:
+            total += rule.amount or 0
+    return total
+
+
+def build_forecast(account_data: dict, period, now: datetime, average: float) -> dict:
+    """
+    Project the balance of an account at the end of its current period and over the next
+    ``FORECAST_MONTHS`` months. Items of the current period (its recurring items included) are
+    already in its balance; the non-recurring spending still expected is what remains of the
+    ``average`` once the current non-recurring expenses are deducted. Each following period
+    books the rules active on their day (``end_date``) and the average spending.
+    """
+    start = stored_period_start(account_data) or period.start(now)
+    end = period.next_start(start)
+    spent = _non_recurring_spending(account_data.get("expense_items", []))
+    remaining = max(average - spent, 0)
+    balance = account_data.get("balance", 0)
+    end_balance = balance - remaining
+
+    first_day = dt_util.as_local(start).date()
+    horizon = dt_util.start_of_local_day(add_months(first_day, FORECAST_MONTHS))
+    cumulative = end_balance
+    projected = []
+    period_start = end
+    while period_start < horizon:
+        day = dt_util.as_local(period_start).date()
+        income = _rules_total(account_data.get("recurring_incomes", []), period, day)
+        expenses = _rules_total(account_data.get("recurring_expenses", []), period, day) + average
+        cumulative += income - expenses
+        projected.append({
+            "period": period.period_id(period_start),
+            "start": day.isoformat(),
+            "income": round(income, 2),
+            "expenses": round(expenses, 2),
+            "balance": round(income - expenses, 2),
+            "cumulative_balance": round(cumulative, 2),
+        })
+        period_start = period.next_start(period_start)
+    return {
+        "period_start": start.isoformat(),
+        "period_end": end.isoformat(),
+        "balance": balance,
+        "spent": round(spent, 2),
+        "average_spending": round(average, 2),
+        "remaining_spending": round(remaining, 2),
+        "end_of_period_balance": round(end_balance, 2),
+        "horizon_end": horizon.isoformat(),
+        "horizon_balance": round(cumulative, 2),
+        "periods": projected,
+    }
+
+
+def _rules_key(rules) -> tuple:
+    return tuple((rule.id, rule.amount, rule.day_of_month, rule.end_date) for rule in rules)
+
+
+class ForecastCache:
+    """
+    Forecasts of the accounts of an entry. A change of an account only marks its forecast
+    stale; the next read compares the inputs of the forecast (totals, current period, period
+    definition, rules, history) and computes it again only if one of them changed. The average
+    spending is kept separately, computed again only when the history changes.
+    """
+
+    def __init__(self, metrics=None):
+        """Initialize the cache."""
+        self._forecasts = {}
+        self._averages = {}
+        self._stale = set()
+        self._metrics = metrics
+
+    def get(self, account: str, account_data: dict, period, now: datetime = None) -> dict:
+        """Return the forecast of an account, computing it if its inputs changed."""
+        cached = self._forecasts.get(account)
+        if cached is not None and account not in self._stale:
+            self._count("forecast_cache_hits")
+            return cached[1]
+        history = account_data.get("history", {})
+        key = (
+            account_data.get("income", 0),
+            account_data.get("expenses", 0),
+            account_data.get("balance", 0),
+            account_data.get(PERIOD_START),
+            str(period),
+            _rules_key(account_data.get("recurring_incomes", [])),
+            _rules_key(account_data.get("recurring_expenses", [])),
+            len(history),
+            max(history, default=None),
+        )
+        self._stale.discard(account)
+        if cached is not None and cached[0] == key:
+            self._count("forecast_cache_hits")
+            return cached[1]
+        self._count("forecast_cache_misses")
+        average = self._averages.get(account)
+        if average is None or average[0] != key[-2:]:
+            average = self._averages[account] = (key[-2:], average_spending(history))
+        forecast = build_forecast(account_data, period, now or dt_util.now(), average[1])
+        self._forecasts[account] = (key, forecast)
+        return forecast
+
+    def invalidate(self, account: str = None) -> None:
+        """Mark the forecast of an account, or of every account, as possibly stale."""
+        if account is None:
+            self._stale.update(self._forecasts)
+            return
+        self._stale.add(account)
+
+    def forget(self, account: str) -> None:
+        """Drop the forecast of a removed account."""
+        self._forecasts.pop(account, None)
+        self._averages.pop(account, None)
+        self._stale.discard(account)
+
+    def _count(self, name: str) -> None:
+        if self._metrics is not None:
+            self._metrics.increment(name)
+
+
+def get_account_forecast(hass: HomeAssistant, entry_id: str, account: str) -> dict:
+    """Return the cached forecast of an account of an entry."""
+    entry_data = hass.data[DOMAIN][entry_id]
+    return entry_data["forecasts"].get(
+        account, entry_data["data"].get(account, {}), account_period(entry_data["periods"], account)
+    )
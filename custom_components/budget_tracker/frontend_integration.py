@@ -1,18 +1,39 @@
 """Helper functions for Budget Tracker frontend integration and real-time updates."""
+import itertools
 import logging
-import json
+import time
+import uuid
 import voluptuous as vol
 from datetime import datetime
 from homeassistant.components import websocket_api
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import slugify
+
+from .const import DATA_NOTIFIER, DEFAULT_NOTIFY_INTERVAL, DOMAIN
+from .forecast import get_account_forecast
+from .mutations import ITEM_TYPES, OPERATIONS, MutationError
+from .ranges import get_range_totals, parse_bound
+from .search import get_search_index
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snapshot versions are "<boot token>-<revision>": the token changes on every restart,
+# revisions come from one process-wide counter so they never repeat within a run.
+_BOOT_TOKEN = uuid.uuid4().hex[:8]
+_REVISIONS = itertools.count(1)
+
 async def setup_frontend_integration(hass: HomeAssistant):
     """Set up websocket API and real-time updates for Budget Tracker."""
     
     # Register websocket commands
     websocket_api.async_register_command(hass, websocket_subscribe_budget_tracker_updates)
+    websocket_api.async_register_command(hass, websocket_get_snapshot)
+    websocket_api.async_register_command(hass, websocket_get_dashboard)
+    websocket_api.async_register_command(hass, websocket_mutate)
+    websocket_api.async_register_command(hass, websocket_search)
+    websocket_api.async_register_command(hass, websocket_forecast)
+    websocket_api.async_register_command(hass, websocket_range_totals)
     
     # Return success
     return True
@@ -47,6 +68,175 @@ def websocket_subscribe_budget_tracker_updates(hass, connection, msg):
     
     connection.send_message(websocket_api.result_message(msg["id"]))
 
+@callback
+def async_bump_revision(hass: HomeAssistant, entry_id: str, account: str = None):
+    """Mark an account (or every account of an entry) as changed."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if entry_data is None:
+        return
+    revision = next(_REVISIONS)
+    revisions = entry_data.setdefault("revisions", {})
+    for name in [account] if account else entry_data["accounts"]:
+        revisions[name] = revision
+    views = entry_data.get("views")
+    if views is not None:
+        views.invalidate(account)
+    forecasts = entry_data.get("forecasts")
+    if forecasts is not None:
+        forecasts.invalidate(account)
+
+
+def _select_accounts(hass: HomeAssistant, requested):
+    """Return (account, entry_id) pairs matching requested names or slugs (all if None)."""
+    selected = []
+    for entry_id, entry_data in hass.data.get(DOMAIN, {}).items():
+        for account in entry_data["accounts"]:
+            if requested is None or account in requested or slugify(account) in requested:
+                selected.append((account, entry_id))
+    return selected
+
+
+@callback
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/get_snapshot",
+    vol.Optional("accounts"): [str],
+    vol.Optional("version"): str,
+})
+def websocket_get_snapshot(hass, connection, msg):
+    """Return the view model of the requested accounts, or "not modified" if the caller's version is current."""
+    _send_views(hass, connection, msg, "view")
+
+
+@callback
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/get_dashboard",
+    vol.Optional("accounts"): [str],
+    vol.Optional("version"): str,
+})
+def websocket_get_dashboard(hass, connection, msg):
+    """Return the dashboard summary of the requested accounts, or "not modified" if the caller's version is current."""
+    _send_views(hass, connection, msg, "summary")
+
+
+def _send_views(hass, connection, msg, kind):
+    """Reply with the cached ``kind`` views of the requested accounts, versioned by their revisions."""
+    selected = _select_accounts(hass, msg.get("accounts"))
+    revision = max(
+        (hass.data[DOMAIN][entry_id]["revisions"].get(account, 0) for account, entry_id in selected),
+        default=0,
+    )
+    version = f"{_BOOT_TOKEN}-{revision}-{len(selected)}"
+    if kind == "summary":
+        # Upcoming recurring charges change with the date
+        version = f"{version}-{datetime.now().date().isoformat()}"
+    if msg.get("version") == version:
+        connection.send_result(msg["id"], {"version": version, "not_modified": True})
+        return
+    accounts = {}
+    for account, entry_id in selected:
+        entry_data = hass.data[DOMAIN][entry_id]
+        accounts[account] = entry_data["views"].get(kind, account, entry_data["data"].get(account, {}))
+    connection.send_result(msg["id"], {"version": version, "not_modified": False, "accounts": accounts})
+
+OPERATION_SCHEMA = vol.Schema({
+    vol.Required("op"): vol.In(OPERATIONS),
+    vol.Optional("account", default="default"): str,
+    vol.Optional("to_account"): str,
+    vol.Optional("type"): vol.In(ITEM_TYPES),
+    vol.Optional("item_id"): str,
+    vol.Optional("amount"): vol.Coerce(float),
+    vol.Optional("description"): str,
+    vol.Optional("category"): str,
+    vol.Optional("day_of_month"): vol.All(vol.Coerce(int), vol.Range(min=1, max=31)),
+    vol.Optional("end_date"): str,
+})
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/mutate",
+    vol.Required("operations"): vol.All([OPERATION_SCHEMA], vol.Length(min=1)),
+})
+@websocket_api.async_response
+async def websocket_mutate(hass, connection, msg):
+    """
+    Apply add/update/remove/recurring/transfer operations atomically, save once and reply
+    with the new totals and the changed items of every touched account.
+    """
+    # Imported here: the package imports this module
+    from . import async_apply_operations
+
+    try:
+        accounts = await async_apply_operations(hass, msg["operations"])
+    except MutationError as err:
+        # Nothing was committed: the batch only touched working copies
+        connection.send_error(msg["id"], "invalid_operation", str(err))
+        return
+    connection.send_result(msg["id"], {"accounts": accounts})
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/search",
+    vol.Required("query"): str,
+    vol.Optional("accounts"): [str],
+    vol.Optional("item_type"): vol.In(ITEM_TYPES),
+    vol.Optional("offset", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional("limit", default=20): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+})
+@websocket_api.async_response
+async def websocket_search(hass, connection, msg):
+    """
+    Search the descriptions and categories of the current and archived items of the
+    requested accounts; hits are ranked by score then date and paginated.
+    """
+    accounts = {
+        account: hass.data[DOMAIN][entry_id]["data"].get(account, {})
+        for account, entry_id in _select_accounts(hass, msg.get("accounts"))
+    }
+    result = await get_search_index(hass).async_search(
+        accounts, msg["query"], msg.get("item_type"), msg["offset"], msg["limit"]
+    )
+    connection.send_result(
+        msg["id"], {"query": msg["query"], "offset": msg["offset"], "limit": msg["limit"], **result}
+    )
+
+
+@callback
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/forecast",
+    vol.Optional("accounts"): [str],
+})
+def websocket_forecast(hass, connection, msg):
+    """Return the cash-flow forecast of the requested accounts (cached until their data changes)."""
+    accounts = {
+        account: get_account_forecast(hass, entry_id, account)
+        for account, entry_id in _select_accounts(hass, msg.get("accounts"))
+    }
+    connection.send_result(msg["id"], {"accounts": accounts})
+
+
+@callback
+@websocket_api.websocket_command({
+    vol.Required("type"): "budget_tracker/range_totals",
+    vol.Optional("accounts"): [str],
+    vol.Optional("start"): str,
+    vol.Optional("end"): str,
+    vol.Optional("categories", default=False): bool,
+})
+def websocket_range_totals(hass, connection, msg):
+    """
+    Return the income, expenses and balance (and expenses per category) of the archived
+    periods between two months or days of the requested accounts, from their range indexes.
+    """
+    try:
+        start = parse_bound(msg["start"]) if msg.get("start") else None
+        end = parse_bound(msg["end"], end=True) if msg.get("end") else None
+    except ValueError as err:
+        connection.send_error(msg["id"], "invalid_range", str(err))
+        return
+    result = get_range_totals(hass, _select_accounts(hass, msg.get("accounts")), start, end, msg["categories"])
+    connection.send_result(msg["id"], {"start": msg.get("start"), "end": msg.get("end"), **result})
+
+
 def notify_frontend(hass, event_type, data=None):
     """Fire an event to notify frontend components."""
     if data is None:
@@ -58,3 +248,115 @@ def notify_frontend(hass, event_type, data=None):
     # Fire event on the event bus
     hass.bus.async_fire(event_type, data)
     _LOGGER.debug("Fired %s event: %s", event_type, data)
+
+
+class CoalescingNotifier:
+    """
+    Rate-limited fan-out of the data updated event.
+    The first change of an account is sent at once; changes arriving within the account's
+    minimum interval are merged (union of accounts and items) into one trailing event.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the notifier."""
+        self.hass = hass
+        # account -> (entry_id, set of changed item ids, or None when the whole account changed)
+        self._pending = {}
+        self._last_sent = {}
+        self._cancel_timer = None
+        self._timer_due = None
+
+    def _interval(self, entry_id: str) -> float:
+        entry_data = self.hass.data.get(DOMAIN, {}).get(entry_id, {})
+        return entry_data.get("notify_interval", DEFAULT_NOTIFY_INTERVAL)
+
+    def _due(self, account: str) -> float:
+        entry_id = self._pending[account][0]
+        return self._last_sent.get(account, float("-inf")) + self._interval(entry_id)
+
+    @callback
+    def async_notify(self, entry_id: str, account: str = None, items=None) -> None:
+        """Queue a change of an account (all accounts of the entry if None) and its item ids."""
+        entry_data = self.hass.data.get(DOMAIN, {}).get(entry_id)
+        if entry_data is None:
+            return
+        for name in [account] if account else entry_data["accounts"]:
+            if name in self._pending:
+                metrics = entry_data.get("metrics")
+                if metrics is not None:
+                    metrics.increment("events_coalesced")
+                changed = self._pending[name][1]
+                if changed is not None and items is not None and account:
+                    changed.update(items)
+                else:
+                    self._pending[name] = (entry_id, None)
+            else:
+                self._pending[name] = (entry_id, set(items) if items is not None and account else None)
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if not self._pending:
+            return
+        due = min(self._due(account) for account in self._pending)
+        delay = due - time.monotonic()
+        if delay <= 0:
+            self._async_flush()
+            return
+        if self._cancel_timer is not None:
+            if self._timer_due <= due:
+                return
+            self._cancel_timer()
+        self._timer_due = due
+        self._cancel_timer = async_call_later(self.hass, delay, self._async_timer_fired)
+
+    @callback
+    def _async_timer_fired(self, _now) -> None:
+        self._cancel_timer = None
+        self._timer_due = None
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Send one event for every pending account whose interval has elapsed."""
+        now = time.monotonic()
+        ready = sorted(account for account in self._pending if self._due(account) <= now)
+        if ready:
+            entry_ids = []
+            items = {}
+            for account in ready:
+                entry_id, changed = self._pending.pop(account)
+                self._last_sent[account] = now
+                if entry_id not in entry_ids:
+                    entry_ids.append(entry_id)
+                items[account] = sorted(changed) if changed is not None else None
+            data = {"entry_ids": entry_ids, "accounts": ready, "items": items}
+            # Fields of the single-account event, kept for existing listeners
+            data["entry_id"] = entry_ids[0]
+            if len(ready) == 1:
+                data["account"] = ready[0]
+            notify_frontend(self.hass, f"{DOMAIN}_data_updated", data)
+            for entry_id in entry_ids:
+                metrics = self.hass.data.get(DOMAIN, {}).get(entry_id, {}).get("metrics")
+                if metrics is not None:
+                    metrics.increment("events_fired")
+        self._async_schedule()
+
+    @callback
+    def async_forget_entry(self, entry_id: str) -> None:
+        """Drop the pending changes of an unloaded entry."""
+        for account in [account for account, pending in self._pending.items() if pending[0] == entry_id]:
+            del self._pending[account]
+        if not self._pending and self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+            self._timer_due = None
+
+
+@callback
+def async_notify_data_update(hass: HomeAssistant, entry_id: str, account: str = None, items=None) -> None:
+    """Queue a coalesced data updated event for the frontend."""
+    notifier = hass.data.get(DATA_NOTIFIER)
+    if notifier is None:
+        notifier = hass.data[DATA_NOTIFIER] = CoalescingNotifier(hass)
+    notifier.async_notify(entry_id, account, items)
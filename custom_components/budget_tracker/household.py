@@ -0,0 +1,145 @@
+"""Consolidated household totals across accounts and account groups, maintained by delta."""
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import slugify
+
+from .const import DATA_HOUSEHOLD, DOMAIN
+
+# Consolidated totals, in account data key order
+TOTALS = ("income", "expenses", "balance")
+# Key of the totals of every account; groups are keyed by (entry id, group name)
+HOUSEHOLD = None
+
+
+def parse_groups(text: str) -> dict:
+    """
+    Parse the account groups option: comma separated ``group=account+account`` definitions.
+    Returns {group: [accounts]}. Raises ValueError.
+    """
+    groups = {}
+    for definition in (text or "").split(","):
+        if not definition.strip():
+            continue
+        name, separator, members = definition.partition("=")
+        accounts = [account.strip() for account in members.split("+") if account.strip()]
+        if not separator or not name.strip() or not accounts:
+            raise ValueError(f"Invalid account group {definition.strip()!r}")
+        groups[name.strip()] = accounts
+    return groups
+
+
+def household_unique_id(entry_id: str, key, kind: str) -> str:
+    """
+    Return the unique id of the ``kind`` sensor of the household (``None``) or of a group,
+    as created by an entry: each entry enabling them owns its own sensors.
+    """
+    if key is HOUSEHOLD:
+        return f"{DOMAIN}_{entry_id}_household_{kind}"
+    return f"{DOMAIN}_{entry_id}_group_{slugify(key[1])}_{kind}"
+
+
+def _cents(account_data: dict) -> tuple:
+    return tuple(round((account_data.get(key) or 0) * 100) for key in TOTALS)
+
+
+class Household:
+    """
+    Totals of all accounts and of each account group. Every account's last known totals are
+    kept in cents; a change of an account applies its difference to the household and to its
+    groups, and reports which consolidated totals moved (none if the account's totals did not).
+    """
+
+    def __init__(self):
+        """Initialize the totals."""
+        self._accounts = {}
+        self._groups = {}
+        self._memberships = {}
+        self._totals = {HOUSEHOLD: (0, 0, 0)}
+
+    def _apply(self, key, delta: tuple) -> None:
+        self._totals[key] = tuple(total + change for total, change in zip(self._totals[key], delta))
+
+    @callback
+    def async_set_groups(self, groups: dict) -> set:
+        """Replace the account groups ({(entry id, group): [accounts]}); returns the groups whose totals changed."""
+        if groups == self._groups:
+            return set()
+        previous = {group: self._totals.get(group) for group in groups}
+        self._groups = {group: list(accounts) for group, accounts in groups.items()}
+        self._memberships = {}
+        self._totals = {HOUSEHOLD: self._totals[HOUSEHOLD]}
+        for group, accounts in self._groups.items():
+            self._totals[group] = (0, 0, 0)
+            for account in accounts:
+                self._memberships.setdefault(account, []).append(group)
+                if account in self._accounts:
+                    self._apply(group, self._accounts[account])
+        return {group for group in groups if self._totals[group] != previous[group]}
+
+    @callback
+    def async_update(self, account: str, account_data: dict) -> set:
+        """Apply the current totals of an account; returns the keys (None, groups) whose totals changed."""
+        totals = _cents(account_data)
+        previous = self._accounts.get(account, (0, 0, 0))
+        self._accounts[account] = totals
+        if totals == previous:
+            return set()
+        return self._apply_delta(account, tuple(new - old for new, old in zip(totals, previous)))
+
+    @callback
+    def async_forget(self, account: str) -> set:
+        """Remove an account (removed, or its entry unloaded); returns the keys whose totals changed."""
+        previous = self._accounts.pop(account, None)
+        if previous is None or previous == (0, 0, 0):
+            return set()
+        return self._apply_delta(account, tuple(-value for value in previous))
+
+    def _apply_delta(self, account: str, delta: tuple) -> set:
+        changed = {HOUSEHOLD}
+        self._apply(HOUSEHOLD, delta)
+        for group in self._memberships.get(account, ()):
+            self._apply(group, delta)
+            changed.add(group)
+        return changed
+
+    def get(self, key=HOUSEHOLD) -> dict:
+        """Return the totals of the household (``None``) or of a group."""
+        totals = self._totals.get(key, (0, 0, 0))
+        return {name: value / 100 for name, value in zip(TOTALS, totals)}
+
+    def members(self, key=HOUSEHOLD) -> list:
+        """Return the accounts counted in the household (``None``) or in a group."""
+        if key is HOUSEHOLD:
+            return sorted(self._accounts)
+        return [account for account in self._groups.get(key, []) if account in self._accounts]
+
+
+def get_household(hass: HomeAssistant) -> Household:
+    """Return the domain-level household totals, creating them on first use."""
+    household = hass.data.get(DATA_HOUSEHOLD)
+    if household is None:
+        household = hass.data[DATA_HOUSEHOLD] = Household()
+    return household
+
+
+@callback
+def async_update_household(hass: HomeAssistant, entry_id: str, account: str = None) -> None:
+    """
+    Apply the totals of an account (or of every account of an entry) to the household and
+    signal the consolidated totals that changed.
+    """
+    household = hass.data.get(DATA_HOUSEHOLD)
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if household is None or entry_data is None:
+        return
+    changed = set()
+    for name in [account] if account else entry_data["accounts"]:
+        changed |= household.async_update(name, entry_data["data"].get(name, {}))
+    async_signal_household(hass, changed)
+
+
+@callback
+def async_signal_household(hass: HomeAssistant, changed: set) -> None:
+    """Notify the consolidated sensors of the totals that changed."""
+    if changed:
+        async_dispatcher_send(hass, f"{DOMAIN}_household_updated", changed)
@@ -0,0 +1,72 @@
+"""Compact, time-sortable identifiers of items and recurring rules (ULID)."""
+from datetime import datetime
+import os
+import time
+
+# Crockford base32: 26 characters for 48 bits of milliseconds and 80 random bits
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_VALUES = {char: value for value, char in enumerate(_ALPHABET)}
+ID_LENGTH = 26
+_RANDOM_BITS = 80
+_RANDOM_MASK = (1 << _RANDOM_BITS) - 1
+
+_last_ms = 0
+_last_random = 0
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_id() -> str:
+    """
+    Return a new identifier: creation time in milliseconds followed by random bits.
+    Ids sort by creation time; within a millisecond the random part is incremented.
+    """
+    global _last_ms, _last_random
+    now_ms = time.time_ns() // 1_000_000
+    if now_ms <= _last_ms:
+        now_ms = _last_ms
+        _last_random = (_last_random + 1) & _RANDOM_MASK
+        if _last_random == 0:
+            now_ms += 1
+    else:
+        _last_random = int.from_bytes(os.urandom(10), "big")
+    _last_ms = now_ms
+    return _encode((now_ms << _RANDOM_BITS) | _last_random)
+
+
+def is_sortable_id(value) -> bool:
+    """Return True if ``value`` is an identifier made by ``new_id``."""
+    return (
+        isinstance(value, str)
+        and len(value) == ID_LENGTH
+        and value[0] <= "7"
+        and all(char in _VALUES for char in value)
+    )
+
+
+def id_floor(when: datetime) -> str:
+    """
+    Return the smallest identifier created at or after ``when``, so that the ids created in
+    a time range are the ``id_floor(start) <= id < id_floor(end)`` string range.
+    """
+    return _encode(int(when.timestamp() * 1000) << _RANDOM_BITS)
+
+
+def order_key(item_id, timestamp) -> str:
+    """
+    Return the creation order key of an item: its id, or for the uuids of older versions the
+    floor id of its timestamp ("" if it has none), so items of both kinds sort together.
+    """
+    if is_sortable_id(item_id):
+        return item_id
+    try:
+        return id_floor(datetime.fromisoformat(timestamp))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return ""
+
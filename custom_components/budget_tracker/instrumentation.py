@@ -0,0 +1,132 @@
+"""Low-overhead performance instrumentation for Budget Tracker."""
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import time
+
+from .const import DATA_PROFILER, DOMAIN
+
+# Number of recent samples kept per timer to compute percentiles
+SAMPLE_WINDOW = 100
+
+
+class DurationStat:
+    """Rolling duration statistics for one instrumented operation."""
+
+    __slots__ = ("count", "last", "total", "max", "_samples")
+
+    def __init__(self):
+        """Initialize an empty statistic."""
+        self.count = 0
+        self.last = 0.0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def record(self, seconds: float) -> None:
+        """Record one duration in seconds."""
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Return the nearest-rank percentile over the recent samples."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def as_dict(self) -> dict:
+        """Return the statistic in milliseconds."""
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+        }
+
+
+class BudgetMetrics:
+    """Timers and counters collected for one config entry."""
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.durations = {}
+        self.counters = {}
+        self.values = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a duration for ``name``."""
+        stat = self.durations.get(name)
+        if stat is None:
+            stat = self.durations[name] = DurationStat()
+        stat.record(seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Increment the counter ``name``."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_value(self, name: str, value) -> None:
+        """Set the gauge ``name``."""
+        self.values[name] = value
+
+    def duration(self, name: str) -> DurationStat:
+        """Return the statistic for ``name`` (empty if never recorded)."""
+        return self.durations.get(name) or DurationStat()
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable snapshot of all metrics."""
+        return {
+            "durations": {name: stat.as_dict() for name, stat in sorted(self.durations.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "values": dict(sorted(self.values.items())),
+        }
+
+
+def instrumented(name: str):
+    """
+    Decorate ``async def func(hass, entry, ...)`` to time it under ``name``.
+    The metrics of ``entry`` are used; calls are not timed if the entry has none.
+    The call is also profiled while a profiling session is running.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(hass, entry, *args, **kwargs):
+            metrics = get_entry_metrics(hass, entry.entry_id)
+            profiler = hass.data.get(DATA_PROFILER)
+            if metrics is None and profiler is None:
+                return await func(hass, entry, *args, **kwargs)
+            if profiler is not None:
+                profiler.enter()
+            start = time.perf_counter()
+            try:
+                return await func(hass, entry, *args, **kwargs)
+            finally:
+                if metrics is not None:
+                    metrics.record(name, time.perf_counter() - start)
+                if profiler is not None:
+                    profiler.exit()
+        return wrapper
+    return decorator
+
+
+def get_entry_metrics(hass, entry_id):
+    """Return the metrics of a config entry, or None if it is not set up."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if entry_data is None:
+        return None
+    return entry_data.get("metrics")
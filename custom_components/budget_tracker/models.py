@@ -0,0 +1,204 @@
+"""In-memory models for Budget Tracker items and recurring rules."""
+import sys
+
+ITEM_LISTS = ("income_items", "expense_items")
+RECURRING_LISTS = ("recurring_incomes", "recurring_expenses")
+
+# Extra fields of the two items of a transfer: shared id and the other account
+TRANSFER_ID = "transfer_id"
+TRANSFER_ACCOUNT = "transfer_account"
+# Account totals of the transfers, kept out of income and expenses
+ATTR_TRANSFERS_IN = "transfers_in"
+ATTR_TRANSFERS_OUT = "transfers_out"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class BudgetItem:
+    """An income or expense item of the current month."""
+
+    __slots__ = ("id", "amount", "description", "category", "timestamp", "recurring_id", "extra")
+
+    def __init__(
+        self,
+        id,
+        amount,
+        description="",
+        category="",
+        timestamp=None,
+        recurring_id=None,
+        extra=None,
+    ):
+        """Initialize the item; description and category are interned."""
+        self.id = id
+        self.amount = amount
+        self.description = _intern(description)
+        self.category = _intern(category)
+        self.timestamp = timestamp
+        self.recurring_id = recurring_id
+        # Unknown keys found in storage, kept for a lossless round trip
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BudgetItem":
+        """Build an item from its storage representation."""
+        extra = {key: value for key, value in data.items() if key not in cls.__slots__}
+        return cls(
+            data.get("id"),
+            data.get("amount", 0),
+            data.get("description", ""),
+            data.get("category", ""),
+            data.get("timestamp"),
+            data.get("recurring_id"),
+            extra or None,
+        )
+
+    def as_dict(self) -> dict:
+        """Return the storage / state attribute representation."""
+        data = {
+            "id": self.id,
+            "amount": self.amount,
+            "description": self.description,
+            "category": self.category,
+            "timestamp": self.timestamp,
+        }
+        if self.recurring_id is not None:
+            data["recurring_id"] = self.recurring_id
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"BudgetItem({self.as_dict()!r})"
+
+
+class RecurringRule:
+    """A monthly recurring income or expense."""
+
+    __slots__ = ("id", "amount", "description", "category", "day_of_month", "created_at", "end_date", "extra")
+
+    def __init__(
+        self,
+        id,
+        amount,
+        description="",
+        category="",
+        day_of_month=1,
+        created_at=None,
+        end_date=None,
+        extra=None,
+    ):
+        """Initialize the rule; description and category are interned."""
+        self.id = id
+        self.amount = amount
+        self.description = _intern(description)
+        self.category = _intern(category)
+        self.day_of_month = day_of_month
+        self.created_at = created_at
+        self.end_date = end_date
+        # Unknown keys found in storage, kept for a lossless round trip
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecurringRule":
+        """Build a rule from its storage representation."""
+        extra = {key: value for key, value in data.items() if key not in cls.__slots__}
+        return cls(
+            data.get("id"),
+            data.get("amount", 0),
+            data.get("description", ""),
+            data.get("category", ""),
+            data.get("day_of_month", 1),
+            data.get("created_at"),
+            data.get("end_date"),
+            extra or None,
+        )
+
+    def as_dict(self) -> dict:
+        """Return the storage / state attribute representation."""
+        data = {
+            "id": self.id,
+            "amount": self.amount,
+            "description": self.description,
+            "category": self.category,
+            "day_of_month": self.day_of_month,
+            "created_at": self.created_at,
+        }
+        if self.end_date:
+            data["end_date"] = self.end_date
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"RecurringRule({self.as_dict()!r})"
+
+
+def transfer_id(item):
+    """Return the transfer id of an item, or None if it is not part of a transfer."""
+    return item.extra.get(TRANSFER_ID) if item.extra else None
+
+
+def update_totals(account_data: dict) -> dict:
+    """
+    Recompute the totals of an account from its current items. Transfers are kept out of
+    income and expenses, in ``transfers_in`` / ``transfers_out``, and count in the balance.
+    """
+    totals = {"income": 0, "expenses": 0, ATTR_TRANSFERS_IN: 0, ATTR_TRANSFERS_OUT: 0}
+    for key, total, transfers in (
+        ("income_items", "income", ATTR_TRANSFERS_IN),
+        ("expense_items", "expenses", ATTR_TRANSFERS_OUT),
+    ):
+        for item in account_data.get(key, []):
+            if item.extra and TRANSFER_ID in item.extra:
+                totals[transfers] += item.amount
+            else:
+                totals[total] += item.amount
+    account_data.update(totals)
+    account_data["balance"] = (
+        totals["income"] - totals["expenses"] + totals[ATTR_TRANSFERS_IN] - totals[ATTR_TRANSFERS_OUT]
+    )
+    return account_data
+
+
+def items_to_dicts(items) -> list:
+    """Convert a list of items or rules to dicts (attribute boundary)."""
+    return [item.as_dict() for item in items]
+
+
+def account_from_storage(account_data: dict) -> dict:
+    """Convert the item and rule lists of an account from dicts to models, in place."""
+    for key in ITEM_LISTS:
+        if key in account_data:
+            account_data[key] = [BudgetItem.from_dict(item) for item in account_data[key]]
+    for key in RECURRING_LISTS:
+        if key in account_data:
+            account_data[key] = [RecurringRule.from_dict(rule) for rule in account_data[key]]
+    return account_data
+
+
+def account_to_storage(account_data: dict) -> dict:
+    """Return a copy of an account with its models converted to dicts."""
+    stored = dict(account_data)
+    for key in ITEM_LISTS + RECURRING_LISTS:
+        if key in stored:
+            stored[key] = items_to_dicts(stored[key])
+    return stored
+
+
+def data_from_storage(data: dict) -> dict:
+    """Convert every account of a storage payload to models, in place."""
+    for account_data in data.values():
+        if isinstance(account_data, dict):
+            account_from_storage(account_data)
+    return data
+
+
+def data_to_storage(data: dict) -> dict:
+    """Return a storage payload for in-memory data holding models."""
+    return {
+        account: account_to_storage(account_data) if isinstance(account_data, dict) else account_data
+        for account, account_data in data.items()
+    }
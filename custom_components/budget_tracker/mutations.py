@@ -0,0 +1,277 @@
+"""Atomic application of batched item and recurring rule operations."""
+from datetime import datetime
+
+from .ids import new_id
+from .models import (
+    ITEM_LISTS,
+    RECURRING_LISTS,
+    TRANSFER_ACCOUNT,
+    TRANSFER_ID,
+    BudgetItem,
+    RecurringRule,
+    transfer_id,
+    update_totals,
+)
+
+OP_ADD = "add"
+OP_UPDATE = "update"
+OP_REMOVE = "remove"
+OP_ADD_RECURRING = "add_recurring"
+OP_UPDATE_RECURRING = "update_recurring"
+OP_REMOVE_RECURRING = "remove_recurring"
+OP_TRANSFER = "transfer"
+OPERATIONS = (
+    OP_ADD, OP_UPDATE, OP_REMOVE, OP_ADD_RECURRING, OP_UPDATE_RECURRING, OP_REMOVE_RECURRING, OP_TRANSFER,
+)
+
+ITEM_TYPES = ("income", "expense")
+_ITEM_KEYS = {"income": "income_items", "expense": "expense_items"}
+_RULE_KEYS = {"income": "recurring_incomes", "expense": "recurring_expenses"}
+_EDITABLE_FIELDS = ("amount", "description", "category")
+
+
+class MutationError(Exception):
+    """An operation of a batch cannot be applied."""
+
+
+def _creates_current_item(rule: RecurringRule, now: datetime) -> bool:
+    """Return True if adding ``rule`` now also creates its item of the current month."""
+    if now.day > rule.day_of_month:
+        return False
+    if rule.end_date:
+        try:
+            if now > datetime.fromisoformat(rule.end_date):
+                return False
+        except (ValueError, TypeError):
+            pass
+    return True
+
+
+class MutationBatch:
+    """
+    Operations applied to working copies of the touched accounts.
+    Nothing is visible in the entry data until ``commit``; a failing operation leaves it untouched.
+    """
+
+    def __init__(self, data: dict, now: datetime = None, categorize=None):
+        """
+        Initialize the batch for the data of an entry. ``categorize(account, description, amount)``
+        returns the category of added items and rules without one (or None).
+        """
+        self._data = data
+        self.now = now or datetime.now()
+        self._categorize = categorize
+        self.accounts = {}
+        # account -> {id: list key} of the items and rules touched by the batch
+        self._touched = {}
+
+    def _account(self, account: str) -> dict:
+        if account not in self.accounts:
+            if account not in self._data:
+                raise MutationError(f"Account {account} not found")
+            working = dict(self._data[account])
+            for key in ITEM_LISTS + RECURRING_LISTS:
+                working[key] = list(working.get(key, []))
+            self.accounts[account] = working
+        return self.accounts[account]
+
+    def _touch(self, account: str, item_id: str, key: str) -> None:
+        self._touched.setdefault(account, {})[item_id] = key
+
+    @staticmethod
+    def _find(account_data: dict, keys, item_id: str):
+        for key in keys:
+            for index, item in enumerate(account_data[key]):
+                if item.id == item_id:
+                    return key, index
+        raise MutationError(f"Item {item_id} not found")
+
+    @staticmethod
+    def _require(operation: dict, *fields) -> None:
+        missing = [field for field in fields if operation.get(field) is None]
+        if missing:
+            raise MutationError(
+                f"Operation {operation['op']} requires {', '.join(missing)}"
+            )
+
+    def _category(self, account: str, operation: dict) -> str:
+        category = operation.get("category") or ""
+        if not category and self._categorize is not None:
+            category = self._categorize(account, operation.get("description", ""), operation["amount"]) or ""
+        return category
+
+    def _counterpart(self, account: str, item):
+        """Return (account, list key, index) of the other item of a transfer, or None if it is gone."""
+        other = item.extra.get(TRANSFER_ACCOUNT)
+        if other == account or other not in self._data:
+            return None
+        other_data = self._account(other)
+        for key in ITEM_LISTS:
+            for index, candidate in enumerate(other_data[key]):
+                if transfer_id(candidate) == transfer_id(item):
+                    return other, key, index
+        return None
+
+    def apply(self, operation: dict) -> None:
+        """Apply one operation to the working copies."""
+        op = operation["op"]
+        account = operation["account"]
+        account_data = self._account(account)
+        if op == OP_TRANSFER:
+            self._require(operation, "to_account", "amount")
+            to_account = operation["to_account"]
+            if to_account == account:
+                raise MutationError("A transfer needs two different accounts")
+            to_data = self._account(to_account)
+            link = new_id()
+            for data, owner, key, other in (
+                (account_data, account, "expense_items", to_account),
+                (to_data, to_account, "income_items", account),
+            ):
+                item = BudgetItem(
+                    id=new_id(),
+                    amount=operation["amount"],
+                    description=operation.get("description", ""),
+                    category=operation.get("category", ""),
+                    timestamp=self.now.isoformat(),
+                    extra={TRANSFER_ID: link, TRANSFER_ACCOUNT: other},
+                )
+                data[key].append(item)
+                self._touch(owner, item.id, key)
+        elif op == OP_ADD:
+            self._require(operation, "type", "amount")
+            item = BudgetItem(
+                id=new_id(),
+                amount=operation["amount"],
+                description=operation.get("description", ""),
+                category=self._category(account, operation),
+                timestamp=self.now.isoformat(),
+            )
+            key = _ITEM_KEYS[operation["type"]]
+            account_data[key].append(item)
+            self._touch(account, item.id, key)
+        elif op == OP_UPDATE:
+            self._require(operation, "item_id")
+            key, index = self._find(account_data, ITEM_LISTS, operation["item_id"])
+            item = account_data[key][index]
+            account_data[key][index] = self._updated(BudgetItem, item, operation)
+            self._touch(account, operation["item_id"], key)
+            # Both items of a transfer keep the same amount and description
+            counterpart = self._counterpart(account, item) if transfer_id(item) else None
+            if counterpart is not None:
+                other, other_key, other_index = counterpart
+                other_items = self.accounts[other][other_key]
+                other_items[other_index] = self._updated(BudgetItem, other_items[other_index], operation)
+                self._touch(other, other_items[other_index].id, other_key)
+        elif op == OP_REMOVE:
+            self._require(operation, "item_id")
+            key, index = self._find(account_data, ITEM_LISTS, operation["item_id"])
+            item = account_data[key].pop(index)
+            self._touch(account, operation["item_id"], key)
+            # Removing one item of a transfer removes the pair
+            counterpart = self._counterpart(account, item) if transfer_id(item) else None
+            if counterpart is not None:
+                other, other_key, other_index = counterpart
+                removed = self.accounts[other][other_key].pop(other_index)
+                self._touch(other, removed.id, other_key)
+        elif op == OP_ADD_RECURRING:
+            self._require(operation, "type", "amount")
+            rule = RecurringRule(
+                id=new_id(),
+                amount=operation["amount"],
+                description=operation.get("description", ""),
+                category=self._category(account, operation),
+                day_of_month=operation.get("day_of_month", 1),
+                created_at=self.now.isoformat(),
+                end_date=operation.get("end_date"),
+            )
+            rule_key = _RULE_KEYS[operation["type"]]
+            account_data[rule_key].append(rule)
+            self._touch(account, rule.id, rule_key)
+            if _creates_current_item(rule, self.now):
+                item = BudgetItem(
+                    id=new_id(),
+                    amount=rule.amount,
+                    description=rule.description,
+                    category=rule.category,
+                    timestamp=self.now.isoformat(),
+                    recurring_id=rule.id,
+                )
+                item_key = _ITEM_KEYS[operation["type"]]
+                account_data[item_key].append(item)
+                self._touch(account, item.id, item_key)
+        elif op == OP_UPDATE_RECURRING:
+            self._require(operation, "item_id")
+            rule_key, index = self._find(account_data, RECURRING_LISTS, operation["item_id"])
+            rule = self._updated(RecurringRule, account_data[rule_key][index], operation)
+            account_data[rule_key][index] = rule
+            self._touch(account, rule.id, rule_key)
+            # Items already generated this month follow the rule
+            for item_key in ITEM_LISTS:
+                for position, item in enumerate(account_data[item_key]):
+                    if item.recurring_id == rule.id:
+                        account_data[item_key][position] = self._updated(BudgetItem, item, operation)
+                        self._touch(account, item.id, item_key)
+        elif op == OP_REMOVE_RECURRING:
+            self._require(operation, "item_id")
+            rule_key, index = self._find(account_data, RECURRING_LISTS, operation["item_id"])
+            del account_data[rule_key][index]
+            self._touch(account, operation["item_id"], rule_key)
+            for item_key in ITEM_LISTS:
+                for item in account_data[item_key]:
+                    if item.recurring_id == operation["item_id"]:
+                        self._touch(account, item.id, item_key)
+                account_data[item_key] = [
+                    item for item in account_data[item_key] if item.recurring_id != operation["item_id"]
+                ]
+        else:
+            raise MutationError(f"Unknown operation {op}")
+
+    @staticmethod
+    def _updated(model, current, operation: dict):
+        """Return a copy of ``current`` with the fields given in ``operation``."""
+        values = {slot: getattr(current, slot) for slot in model.__slots__}
+        fields = _EDITABLE_FIELDS
+        if model is RecurringRule:
+            fields += ("day_of_month", "end_date")
+        for field in fields:
+            if operation.get(field) is not None:
+                values[field] = operation[field]
+        return model(**values)
+
+    def commit(self) -> dict:
+        """
+        Recompute the totals of the touched accounts and publish them in the entry data.
+        Returns {account: {"income", "expenses", "balance", "changed", "removed"}}.
+        """
+        result = {}
+        for account, account_data in self.accounts.items():
+            update_totals(account_data)
+            self._data[account] = account_data
+
+            changed = []
+            removed = []
+            touched = self._touched.get(account, {})
+            current = {
+                item.id: item
+                for key in set(touched.values())
+                for item in account_data[key]
+            }
+            for item_id, key in touched.items():
+                item = current.get(item_id)
+                if item is None:
+                    removed.append({"id": item_id, "list": key})
+                else:
+                    changed.append({"list": key, "item": item.as_dict()})
+            result[account] = {
+                "income": account_data["income"],
+                "expenses": account_data["expenses"],
+                "balance": account_data["balance"],
+                "changed": changed,
+                "removed": removed,
+            }
+        return result
+
+    def touched_ids(self, account: str) -> list:
+        """Return the ids of the items and rules of an account touched by the batch."""
+        return list(self._touched.get(account, {}))
@@ -0,0 +1,164 @@
+"""Budget periods: calendar months, months starting on a given day, or weeks."""
+import calendar
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+PERIOD_MONTHLY = "monthly"
+PERIOD_WEEKLY = "weekly"
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Account data key holding the start of the period of the current items (ISO datetime)
+PERIOD_START = "period_start"
+
+
+def _month_day(year: int, month: int, day: int) -> date:
+    """Return ``day`` of a month, clamped to its last day (the 31st of a 30-day month is the 30th)."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _add_months(year: int, month: int, months: int):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def add_months(day: date, months: int) -> date:
+    """Return ``day`` moved by ``months`` months, clamped to the last day of the target month."""
+    return _month_day(*_add_months(day.year, day.month, months), day.day)
+
+
+class BudgetPeriod:
+    """A budget period definition: ``monthly`` from day ``anchor``, or ``weekly`` from weekday ``anchor``."""
+
+    __slots__ = ("kind", "anchor")
+
+    def __init__(self, kind: str = PERIOD_MONTHLY, anchor: int = None):
+        """Initialize the period (calendar months by default)."""
+        if kind not in (PERIOD_MONTHLY, PERIOD_WEEKLY):
+            raise ValueError(f"Unknown period type {kind}")
+        if anchor is None:
+            anchor = 1 if kind == PERIOD_MONTHLY else 0
+        if kind == PERIOD_MONTHLY and not 1 <= anchor <= 31:
+            raise ValueError(f"Invalid start day {anchor}")
+        if kind == PERIOD_WEEKLY and not 0 <= anchor <= 6:
+            raise ValueError(f"Invalid start weekday {anchor}")
+        self.kind = kind
+        self.anchor = anchor
+
+    @classmethod
+    def parse(cls, text: str) -> "BudgetPeriod":
+        """Parse ``monthly``, ``monthly:<day>``, ``weekly`` or ``weekly:<weekday name or 0-6>``."""
+        kind, _, anchor = text.strip().lower().partition(":")
+        anchor = anchor.strip()
+        if not anchor:
+            return cls(kind.strip())
+        if anchor in WEEKDAYS:
+            return cls(kind.strip(), WEEKDAYS.index(anchor))
+        try:
+            return cls(kind.strip(), int(anchor))
+        except ValueError as err:
+            raise ValueError(f"Invalid period {text!r}: {err}") from None
+
+    def __str__(self) -> str:
+        if self.kind == PERIOD_WEEKLY:
+            return f"{PERIOD_WEEKLY}:{WEEKDAYS[self.anchor]}"
+        return PERIOD_MONTHLY if self.anchor == 1 else f"{PERIOD_MONTHLY}:{self.anchor}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BudgetPeriod) and (self.kind, self.anchor) == (other.kind, other.anchor)
+
+    def __hash__(self) -> int:
+        return hash((self.kind, self.anchor))
+
+    @property
+    def is_calendar_month(self) -> bool:
+        """Return True for calendar months (the period ids of older versions)."""
+        return self.kind == PERIOD_MONTHLY and self.anchor == 1
+
+    def _start_date(self, day: date) -> date:
+        if self.kind == PERIOD_WEEKLY:
+            return day - timedelta(days=(day.weekday() - self.anchor) % 7)
+        start = _month_day(day.year, day.month, self.anchor)
+        if day >= start:
+            return start
+        return _month_day(*_add_months(day.year, day.month, -1), self.anchor)
+
+    def _next_date(self, start: date) -> date:
+        if self.kind == PERIOD_WEEKLY:
+            return start + timedelta(days=7)
+        return _month_day(*_add_months(start.year, start.month, 1), self.anchor)
+
+    def start(self, when: datetime) -> datetime:
+        """Return the start (local midnight, timezone-aware) of the period containing ``when``."""
+        return dt_util.start_of_local_day(self._start_date(dt_util.as_local(when).date()))
+
+    def next_start(self, when: datetime) -> datetime:
+        """Return the start of the period following the one containing ``when``: the next boundary."""
+        return dt_util.start_of_local_day(self._next_date(self._start_date(dt_util.as_local(when).date())))
+
+    def previous_start(self, when: datetime) -> datetime:
+        """Return the start of the period preceding the one containing ``when``."""
+        return self.start(self.start(when) - timedelta(days=1))
+
+    def occurrence(self, start: date, day_of_month) -> date:
+        """
+        Return the day a monthly recurring rule falls on in the period starting on ``start``:
+        its first ``day_of_month`` from ``start``, or ``start`` itself for weekly periods.
+        """
+        if self.kind == PERIOD_WEEKLY:
+            return start
+        day_of_month = int(day_of_month or 1)
+        day = _month_day(start.year, start.month, day_of_month)
+        if day < start:
+            day = _month_day(*_add_months(start.year, start.month, 1), day_of_month)
+        return day
+
+    def period_id(self, start: datetime) -> str:
+        """
+        Return the history key of the period starting at ``start``: ``YYYY_MM`` for calendar
+        months, as in older versions, else ``YYYY_MM_DD`` of its first day. Ids sort by date.
+        """
+        day = dt_util.as_local(start).date()
+        if self.is_calendar_month:
+            return f"{day.year}_{day.month:02d}"
+        return f"{day.year}_{day.month:02d}_{day.day:02d}"
+
+
+def parse_period_id(period_id: str) -> date:
+    """Return the first day of the period of a history key (``YYYY_MM`` or ``YYYY_MM_DD``)."""
+    parts = [int(part) for part in period_id.split("_")]
+    if len(parts) == 2:
+        return date(parts[0], parts[1], 1)
+    if len(parts) == 3:
+        return date(*parts)
+    raise ValueError(f"Invalid period id {period_id}")
+
+
+def parse_periods(text: str) -> dict:
+    """
+    Parse the periods option: comma separated ``account=period`` definitions, and an optional
+    ``period`` without account used by the other accounts. Returns {account or None: BudgetPeriod}.
+    """
+    periods = {}
+    for definition in (text or "").split(","):
+        if not definition.strip():
+            continue
+        account, separator, period = definition.rpartition("=")
+        periods[account.strip() if separator else None] = BudgetPeriod.parse(period)
+    return periods
+
+
+def account_period(periods: dict, account: str) -> BudgetPeriod:
+    """Return the period of an account from parsed periods (calendar months by default)."""
+    return periods.get(account) or periods.get(None) or BudgetPeriod()
+
+
+def stored_period_start(account_data: dict):
+    """Return the start of the period of an account's current items, or None if unknown."""
+    value = account_data.get(PERIOD_START)
+    if not value:
+        return None
+    try:
+        return dt_util.as_local(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,118 @@
+"""On-demand profiling of the Budget Tracker hot paths."""
+import cProfile
+from datetime import datetime
+import io
+import logging
+import pstats
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_PROFILER, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BudgetProfiler:
+    """
+    cProfile session enabled only while an instrumented section runs
+    (service handlers, save_data and the sensor update dispatch).
+    """
+
+    def __init__(self, hass: HomeAssistant, max_calls=None, duration=None, top=25):
+        """Initialize the profiler."""
+        self.hass = hass
+        self.max_calls = max_calls
+        self.duration = duration
+        self.top = top
+        self.calls = 0
+        self.started_at = datetime.now()
+        self._profile = cProfile.Profile()
+        self._depth = 0
+        self._cancel_timer = None
+        self._stopping = False
+
+    @callback
+    def async_start(self) -> None:
+        """Arm the profiler and its optional time limit."""
+        if self.duration:
+            self._cancel_timer = async_call_later(self.hass, self.duration, self._async_timeout)
+
+    async def _async_timeout(self, _now) -> None:
+        self._cancel_timer = None
+        await async_stop_profiling(self.hass)
+
+    def enter(self) -> None:
+        """Enter an instrumented section."""
+        if self._depth == 0:
+            self._profile.enable()
+        self._depth += 1
+
+    def exit(self, service_call: bool = False) -> None:
+        """Leave an instrumented section, counting completed service calls."""
+        self._depth -= 1
+        if self._depth == 0:
+            self._profile.disable()
+        if service_call:
+            self.calls += 1
+            if self.max_calls and self.calls >= self.max_calls and not self._stopping:
+                self._stopping = True
+                self.hass.async_create_task(async_stop_profiling(self.hass))
+
+    async def async_finish(self) -> str:
+        """Stop profiling, write the stats file and log a top-N summary."""
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+        if self._depth:
+            self._profile.disable()
+            self._depth = 0
+        file_path = self.hass.config.path(
+            f"{DOMAIN}_profile_{self.started_at.strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        summary = await self.hass.async_add_executor_job(self._write_stats, file_path)
+        _LOGGER.info(
+            "Budget Tracker profiling finished after %d service call(s), stats written to %s\n%s",
+            self.calls, file_path, summary,
+        )
+        return file_path
+
+    def _write_stats(self, file_path: str) -> str:
+        self._profile.dump_stats(file_path)
+        if not self._profile.stats:
+            # Stopped before any instrumented section ran: pstats rejects empty stats
+            return "No instrumented call was profiled"
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        return stream.getvalue()
+
+
+def get_active_profiler(hass: HomeAssistant):
+    """Return the running profiler, or None when profiling is disabled."""
+    return hass.data.get(DATA_PROFILER)
+
+
+@callback
+def async_start_profiling(hass: HomeAssistant, max_calls=None, duration=None, top=25) -> bool:
+    """Start a profiling session; returns False if one is already running."""
+    if hass.data.get(DATA_PROFILER) is not None:
+        _LOGGER.warning("Budget Tracker profiling is already running")
+        return False
+    profiler = BudgetProfiler(hass, max_calls, duration, top)
+    hass.data[DATA_PROFILER] = profiler
+    profiler.async_start()
+    _LOGGER.info(
+        "Budget Tracker profiling started (calls: %s, duration: %s)",
+        max_calls or "unlimited", f"{duration} s" if duration else "unlimited",
+    )
+    return True
+
+
+async def async_stop_profiling(hass: HomeAssistant):
+    """Stop the running profiling session and return the stats file path."""
+    profiler = hass.data.pop(DATA_PROFILER, None)
+    if profiler is None:
+        _LOGGER.debug("Budget Tracker profiling is not running")
+        return None
+    return await profiler.async_finish()
@@ -0,0 +1,164 @@
+"""Cumulative totals of the archived periods of each account, for range queries."""
+from bisect import bisect_left
+from datetime import date, timedelta
+
+from homeassistant.core import HomeAssistant
+
+from .anomaly import category_totals
+from .const import DOMAIN
+from .periods import add_months, parse_period_id
+from .schema import is_summary, month_category_totals, month_items
+
+# Totals indexed for every archived period, in account data key order
+TOTALS = ("income", "expenses", "balance")
+
+
+def parse_bound(value: str, end: bool = False) -> date:
+    """
+    Parse a range bound, ``YYYY-MM`` (a whole month) or ``YYYY-MM-DD`` (``_`` separators
+    accepted, as in history keys). Returns the first day of the range, or with ``end`` the
+    first day after it. Raises ValueError.
+    """
+    parts = value.strip().replace("_", "-").split("-")
+    try:
+        if len(parts) == 2:
+            day = date(int(parts[0]), int(parts[1]), 1)
+            return add_months(day, 1) if end else day
+        if len(parts) == 3:
+            day = date(int(parts[0]), int(parts[1]), int(parts[2]))
+            return day + timedelta(days=1) if end else day
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"Invalid range bound {value!r}")
+
+
+def _month_totals(month: dict) -> tuple:
+    """Return the totals in cents and {category: expenses in cents} of an archived period."""
+    totals = tuple(round((month.get(key) or 0) * 100) for key in TOTALS)
+    if is_summary(month):
+        categories = month_category_totals(month, "expense_items")
+    else:
+        categories = category_totals(month_items(month, "expense_items"))
+    return totals, {category: round(amount * 100) for category, amount in categories.items()}
+
+
+class AccountIndex:
+    """
+    Prefix sums of the archived periods of one account, in period order: position ``i`` holds
+    the totals of the first ``i`` periods, so the totals of any run of periods are one
+    difference. Amounts are kept in cents so the sums do not drift.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.keys = []
+        self.starts = []
+        self.sums = {key: [0] for key in TOTALS}
+        # category -> prefix sums of its expenses, aligned on ``keys``
+        self.categories = {}
+
+    def append(self, period_id: str, month: dict) -> None:
+        """Add an archived period after the last one indexed."""
+        totals, categories = _month_totals(month)
+        self.keys.append(period_id)
+        self.starts.append(parse_period_id(period_id))
+        for key, value in zip(TOTALS, totals):
+            self.sums[key].append(self.sums[key][-1] + value)
+        for category in categories.keys() - self.categories.keys():
+            self.categories[category] = [0] * len(self.keys)
+        for category, sums in self.categories.items():
+            sums.append(sums[-1] + categories.get(category, 0))
+
+    def range(self, start: date = None, end: date = None, categories: bool = False) -> dict:
+        """
+        Return the totals of the periods starting from ``start`` and before ``end`` (open
+        bounds if None): two binary searches locate the run, the totals are differences.
+        """
+        first = bisect_left(self.starts, start) if start else 0
+        last = bisect_left(self.starts, end) if end else len(self.keys)
+        last = max(first, last)
+        result = {key: (self.sums[key][last] - self.sums[key][first]) / 100 for key in TOTALS}
+        result["periods"] = last - first
+        result["first_period"] = self.keys[first] if last > first else None
+        result["last_period"] = self.keys[last - 1] if last > first else None
+        if categories:
+            result["categories"] = {
+                category: (sums[last] - sums[first]) / 100
+                for category, sums in self.categories.items()
+                if sums[last] != sums[first]
+            }
+        return result
+
+
+def build_index(history: dict) -> AccountIndex:
+    """Return the index of every archived period of an account (a full read of the history)."""
+    index = AccountIndex()
+    for period_id in sorted(history):
+        index.append(period_id, history[period_id])
+    return index
+
+
+class RangeIndex:
+    """
+    Range indexes of the accounts of an entry. Built at load, extended by each archived
+    period. Archived periods are only ever added (compaction keeps their totals), so an index
+    whose length differs from the history is stale and indexed again on the next read; an
+    archive replacing a period and a recategorization drop the index explicitly.
+    """
+
+    def __init__(self, metrics=None):
+        """Initialize the indexes."""
+        self._indexes = {}
+        self._metrics = metrics
+
+    def set(self, account: str, index: AccountIndex) -> None:
+        """Store an index built outside the event loop."""
+        self._indexes[account] = index
+
+    def get(self, account: str, history: dict) -> AccountIndex:
+        """Return the index of an account, indexing its history again if it changed."""
+        index = self._indexes.get(account)
+        if index is None or len(index.keys) != len(history):
+            self._count("range_index_rebuilds")
+            index = self._indexes[account] = build_index(history)
+        return index
+
+    def extend(self, account: str, period_id: str, month: dict, history: dict) -> None:
+        """Add a period just archived; an index not covering the rest of the history is rebuilt."""
+        index = self._indexes.get(account)
+        # A replaced period leaves the history length unchanged
+        if index is not None and len(index.keys) == len(history) - 1 and (not index.keys or index.keys[-1] < period_id):
+            index.append(period_id, month)
+        else:
+            self._indexes.pop(account, None)
+        self.get(account, history)
+
+    def invalidate(self, account: str = None) -> None:
+        """Drop the index of an account (or of every account); it is rebuilt on the next read."""
+        if account is None:
+            self._indexes.clear()
+            return
+        self._indexes.pop(account, None)
+
+    def _count(self, name: str) -> None:
+        if self._metrics is not None:
+            self._metrics.increment(name)
+
+
+def get_range_totals(hass: HomeAssistant, selected, start: date = None, end: date = None, categories: bool = False) -> dict:
+    """
+    Return the totals of the archived periods within a range of ``(account, entry_id)`` pairs,
+    per account and summed over them.
+    """
+    accounts = {}
+    for account, entry_id in selected:
+        entry_data = hass.data[DOMAIN][entry_id]
+        history = entry_data["data"].get(account, {}).get("history", {})
+        accounts[account] = entry_data["ranges"].get(account, history).range(start, end, categories)
+    total = {key: round(sum(result[key] for result in accounts.values()), 2) for key in TOTALS}
+    if categories:
+        total["categories"] = {}
+        for result in accounts.values():
+            for category, amount in result["categories"].items():
+                total["categories"][category] = round(total["categories"].get(category, 0) + amount, 2)
+    return {"accounts": accounts, "total": total}
@@ -0,0 +1,71 @@
+"""Retention policy of archived months: old months keep only per-category totals."""
+import gzip
+import json
+import logging
+import os
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_ARCHIVE_FILE
+from .schema import is_summary, summarize_month
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def months_to_compact(history: dict, keep_months: int) -> list:
+    """
+    Return the keys of the archived months older than the ``keep_months`` most recent
+    ones that still hold their items (nothing if ``keep_months`` is 0).
+    """
+    if keep_months <= 0:
+        return []
+    return [
+        year_month
+        for year_month in sorted(history)[:-keep_months]
+        if isinstance(history[year_month], dict) and not is_summary(history[year_month])
+    ]
+
+
+def _compact_months(records: list, archive_path=None) -> list:
+    """
+    Append the detailed months to the archive file, if any, then return their summaries.
+    Each call writes a new gzip member of JSON lines, so the archive is never rewritten.
+    """
+    if archive_path is not None:
+        content = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        )
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        with gzip.open(archive_path, "at", encoding="utf-8") as file:
+            file.write(content)
+    return [summarize_month(record["data"]) for record in records]
+
+
+async def async_compact_history(
+    hass: HomeAssistant, data, accounts, keep_months: int, archive: bool = True
+) -> dict:
+    """
+    Reduce the archived months of ``accounts`` older than the ``keep_months`` most recent
+    ones to per-category totals, archiving their items first when ``archive`` is set.
+    Returns {account: [compacted month keys]}.
+    """
+    records = []
+    for account in accounts:
+        history = data.get(account, {}).get("history", {})
+        for year_month in months_to_compact(history, keep_months):
+            records.append({"account": account, "month": year_month, "data": history[year_month]})
+    if not records:
+        return {}
+
+    # Archive write and summaries in the executor; the history is only swapped here
+    archive_path = hass.config.path(DATA_ARCHIVE_FILE) if archive else None
+    summaries = await hass.async_add_executor_job(_compact_months, records, archive_path)
+    compacted = {}
+    for record, summary in zip(records, summaries):
+        history = data[record["account"]]["history"]
+        if history.get(record["month"]) is record["data"]:
+            history[record["month"]] = summary
+            compacted.setdefault(record["account"], []).append(record["month"])
+    _LOGGER.info("Compacted archived months: %s", compacted)
+    return compacted
@@ -0,0 +1,366 @@
+"""Storage schema versions, migrations and the columnar history layout."""
+import base64
+from datetime import datetime, timedelta
+import logging
+import uuid
+
+from .ids import ID_LENGTH, is_sortable_id
+
+_LOGGER = logging.getLogger(__name__)
+
+# Current version of the storage file layout
+SCHEMA_VERSION = 3
+# Top-level key holding the schema version in the storage file
+SCHEMA_VERSION_KEY = "_schema_version"
+
+# Archived month layouts
+FORMAT_COLUMNAR = "columnar"
+# Items dropped by the retention policy, only per-category totals kept
+FORMAT_SUMMARY = "summary"
+ITEM_LISTS = ("income_items", "expense_items")
+
+# Item fields stored as dedicated columns, in expansion order
+_ITEM_FIELDS = ("id", "amount", "description", "category", "timestamp", "recurring_id")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+MIGRATIONS = {}
+
+
+def migration(from_version: int):
+    """Register a migration from ``from_version`` to ``from_version + 1``."""
+    def decorator(func):
+        MIGRATIONS[from_version] = func
+        return func
+    return decorator
+
+
+def migrate(data: dict):
+    """
+    Bring a loaded storage payload up to ``SCHEMA_VERSION``.
+    Returns the in-memory data (without the version key) and whether it was migrated.
+    """
+    version = data.pop(SCHEMA_VERSION_KEY, 1)
+    if version > SCHEMA_VERSION:
+        _LOGGER.warning(
+            "Storage schema version %s is newer than supported version %s", version, SCHEMA_VERSION
+        )
+        return data, False
+    migrated = False
+    while version < SCHEMA_VERSION:
+        _LOGGER.info("Migrating budget data from schema version %s to %s", version, version + 1)
+        data = MIGRATIONS[version](data)
+        version += 1
+        migrated = True
+    return data, migrated
+
+
+def dump(data: dict) -> dict:
+    """Return the storage payload for the in-memory data."""
+    return {SCHEMA_VERSION_KEY: SCHEMA_VERSION, **data}
+
+
+@migration(1)
+def _migrate_1_to_2(data: dict) -> dict:
+    """Convert every archived month to the columnar layout."""
+    for account_data in data.values():
+        if not isinstance(account_data, dict):
+            continue
+        history = account_data.get("history", {})
+        for year_month, month in history.items():
+            history[year_month] = compact_month(month)
+    return data
+
+
+@migration(2)
+def _migrate_2_to_3(data: dict) -> dict:
+    """
+    Compute the per-category expense statistics of the archived periods, in period order.
+    Done once: they are then updated when a period is archived.
+    """
+    # Imported here: the statistics module depends on this one
+    from .anomaly import STATS_KEY, history_category_stats
+
+    for account_data in data.values():
+        if isinstance(account_data, dict) and STATS_KEY not in account_data:
+            account_data[STATS_KEY] = history_category_stats(account_data.get("history", {}))
+    return data
+
+
+# ---------------------- COLUMNAR LAYOUT ----------------------
+def _encode_id(item_id):
+    # Sortable ids are already compact; uuids of older versions become 22 base64 characters
+    if is_sortable_id(item_id):
+        return item_id
+    try:
+        parsed = uuid.UUID(item_id)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if str(parsed) != item_id:
+        return None
+    return base64.urlsafe_b64encode(parsed.bytes).decode("ascii").rstrip("=")
+
+
+def _decode_id(value):
+    if len(value) == ID_LENGTH:
+        return value
+    return str(uuid.UUID(bytes=base64.urlsafe_b64decode(value + "==")))
+
+
+def _encode_timestamp(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None or parsed.isoformat() != value:
+        return None
+    return (parsed - _EPOCH) // _MICROSECOND
+
+
+def _decode_timestamp(value):
+    return (_EPOCH + value * _MICROSECOND).isoformat()
+
+
+def _encode_cents(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    cents = round(value * 100)
+    if cents / 100 != value:
+        return None
+    return cents
+
+
+def _has_standard_fields(item):
+    return all(field in item for field in _ITEM_FIELDS[:5]) and (
+        ("recurring_id" in item) == (item.get("recurring_id") is not None)
+    )
+
+
+def compact_items(items: list, strings: list, string_index: dict) -> dict:
+    """
+    Convert a list of item dicts to parallel column arrays.
+    Descriptions and categories are interned in ``strings``; values that cannot be
+    encoded losslessly keep their raw column so the conversion is always round-trippable.
+    """
+    columns = {"n": len(items)}
+
+    def intern(value):
+        if value is None:
+            return None
+        index = string_index.get(value)
+        if index is None:
+            index = string_index[value] = len(strings)
+            strings.append(value)
+        return index
+
+    raw = {field: [item.get(field) for item in items] for field in _ITEM_FIELDS}
+    extra = []
+    for item in items:
+        others = {key: value for key, value in item.items() if key not in _ITEM_FIELDS}
+        extra.append(others or None)
+    present = [[field for field in _ITEM_FIELDS if field in item] for item in items]
+
+    ids = [_encode_id(value) for value in raw["id"]]
+    if all(value is not None for value in ids):
+        columns["id_b64"] = ids
+    else:
+        columns["id"] = raw["id"]
+
+    cents = [_encode_cents(value) for value in raw["amount"]]
+    if all(value is not None for value in cents):
+        columns["amount_cents"] = cents
+    else:
+        columns["amount"] = raw["amount"]
+
+    stamps = [_encode_timestamp(value) for value in raw["timestamp"]]
+    if all(value is not None for value in stamps):
+        columns["timestamp_us"] = stamps
+    else:
+        columns["timestamp"] = raw["timestamp"]
+
+    for field in ("description", "category"):
+        if all(isinstance(value, str) or value is None for value in raw[field]):
+            columns[f"{field}_idx"] = [intern(value) for value in raw[field]]
+        else:
+            columns[field] = raw[field]
+
+    if any(value is not None for value in raw["recurring_id"]):
+        recurring_ids = [
+            _encode_id(value) if value is not None else None for value in raw["recurring_id"]
+        ]
+        if all(
+            encoded is not None or value is None
+            for encoded, value in zip(recurring_ids, raw["recurring_id"])
+        ):
+            columns["recurring_id_b64"] = recurring_ids
+        else:
+            columns["recurring_id"] = raw["recurring_id"]
+    if not all(_has_standard_fields(item) for item in items):
+        # Only needed when some items lack a standard field
+        columns["fields"] = [
+            sum(1 << _ITEM_FIELDS.index(field) for field in fields) for fields in present
+        ]
+    if any(others is not None for others in extra):
+        columns["extra"] = extra
+    return columns
+
+
+def expand_items(columns: dict, strings: list) -> list:
+    """Rebuild the list of item dicts from its column arrays."""
+    count = columns.get("n", 0)
+    values = {}
+    if "id_b64" in columns:
+        values["id"] = [_decode_id(value) for value in columns["id_b64"]]
+    else:
+        values["id"] = columns.get("id", [None] * count)
+    if "amount_cents" in columns:
+        values["amount"] = [value / 100 for value in columns["amount_cents"]]
+    else:
+        values["amount"] = columns.get("amount", [None] * count)
+    if "timestamp_us" in columns:
+        values["timestamp"] = [_decode_timestamp(value) for value in columns["timestamp_us"]]
+    else:
+        values["timestamp"] = columns.get("timestamp", [None] * count)
+    for field in ("description", "category"):
+        if f"{field}_idx" in columns:
+            values[field] = [
+                strings[index] if index is not None else None for index in columns[f"{field}_idx"]
+            ]
+        else:
+            values[field] = columns.get(field, [None] * count)
+    if "recurring_id_b64" in columns:
+        values["recurring_id"] = [
+            _decode_id(value) if value is not None else None for value in columns["recurring_id_b64"]
+        ]
+    else:
+        values["recurring_id"] = columns.get("recurring_id", [None] * count)
+    fields = columns.get("fields")
+    extra = columns.get("extra")
+
+    items = []
+    for position in range(count):
+        if fields is None:
+            item = {field: values[field][position] for field in _ITEM_FIELDS[:5]}
+            if values["recurring_id"][position] is not None:
+                item["recurring_id"] = values["recurring_id"][position]
+        else:
+            mask = fields[position]
+            item = {
+                field: values[field][position]
+                for bit, field in enumerate(_ITEM_FIELDS)
+                if mask & (1 << bit)
+            }
+        if extra is not None and extra[position]:
+            item.update(extra[position])
+        items.append(item)
+    return items
+
+
+def is_compact(month: dict) -> bool:
+    """Return True if an archived month uses the columnar layout."""
+    return month.get("format") == FORMAT_COLUMNAR
+
+
+def compact_month(month: dict) -> dict:
+    """Return the columnar form of an archived month (unchanged if already compact or summarized)."""
+    if not isinstance(month, dict) or is_compact(month) or is_summary(month):
+        return month
+    compact = {key: value for key, value in month.items() if key not in ITEM_LISTS}
+    strings = []
+    string_index = {}
+    compact["format"] = FORMAT_COLUMNAR
+    compact["columns"] = {
+        key: compact_items(month[key], strings, string_index)
+        for key in ITEM_LISTS
+        if isinstance(month.get(key), list)
+    }
+    compact["strings"] = strings
+    return compact
+
+
+def expand_month(month: dict) -> dict:
+    """Return an archived month with its item lists as dicts."""
+    if not is_compact(month):
+        return month
+    expanded = {
+        key: value for key, value in month.items() if key not in ("format", "columns", "strings")
+    }
+    for key in ITEM_LISTS:
+        if key in month["columns"]:
+            expanded[key] = expand_items(month["columns"][key], month["strings"])
+    return expanded
+
+
+def month_items(month: dict, key: str) -> list:
+    """Return the items ``key`` of an archived month, expanding them only if needed."""
+    if not is_compact(month):
+        return month.get(key, [])
+    columns = month["columns"].get(key)
+    if columns is None:
+        return []
+    return expand_items(columns, month["strings"])
+
+
+def is_summary(month: dict) -> bool:
+    """Return True if an archived month was reduced to per-category totals."""
+    return month.get("format") == FORMAT_SUMMARY
+
+
+def summarize_month(month: dict) -> dict:
+    """
+    Return an archived month reduced to its totals and per-category
+    ``[amount, count]`` of each item list (unchanged if already summarized).
+    """
+    if not isinstance(month, dict) or is_summary(month):
+        return month
+    summary = {
+        key: value
+        for key, value in month.items()
+        if key not in ITEM_LISTS + ("format", "columns", "strings")
+    }
+    summary["format"] = FORMAT_SUMMARY
+    summary["categories"] = {}
+    for key in ITEM_LISTS:
+        if not has_month_items(month, key):
+            continue
+        totals = {}
+        for item in month_items(month, key):
+            category = item.get("category") or ""
+            amount, count = totals.get(category, (0, 0))
+            totals[category] = (amount + (item.get("amount") or 0), count + 1)
+        summary["categories"][key] = {
+            category: [round(amount, 2), count] for category, (amount, count) in totals.items()
+        }
+    return summary
+
+
+def month_category_totals(month: dict, key: str) -> dict:
+    """Return {category: amount} of the item list ``key`` of an archived month."""
+    if is_summary(month):
+        return {
+            category: amount
+            for category, (amount, _count) in month["categories"].get(key, {}).items()
+        }
+    totals = {}
+    for item in month_items(month, key):
+        category = item.get("category") or ""
+        totals[category] = totals.get(category, 0) + (item.get("amount") or 0)
+    return totals
+
+
+def has_month_items(month: dict, key: str) -> bool:
+    """Return True if an archived month stores the item list ``key``."""
+    if is_compact(month):
+        return key in month["columns"]
+    return key in month
+
+
+def month_item_count(month: dict, key: str) -> int:
+    """Return the number of items ``key`` of an archived month without expanding them."""
+    if is_compact(month):
+        return month["columns"].get(key, {}).get("n", 0)
+    if is_summary(month):
+        return 0
+    return len(month.get(key, []))
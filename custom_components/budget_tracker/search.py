@@ -0,0 +1,325 @@
+"""Full-text search over the descriptions and categories of current and archived items."""
+import bisect
+import heapq
+import logging
+import re
+import sys
+import unicodedata
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_SEARCH, DOMAIN
+from .ids import order_key
+from .schema import month_items
+
+_LOGGER = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+_ITEM_TYPES = (("income_items", "income"), ("expense_items", "expense"))
+# Score of a query word matching a whole indexed word, or only its beginning
+EXACT_MATCH_SCORE = 3
+PREFIX_MATCH_SCORE = 1
+
+
+def normalize(text) -> str:
+    """Return ``text`` casefolded and without accents."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text) -> tuple:
+    """Return the distinct normalized words of ``text``, in order."""
+    return tuple(dict.fromkeys(sys.intern(word) for word in _TOKEN_RE.findall(normalize(text))))
+
+
+class SearchDocument:
+    """An indexed item; ``month`` is None for the current month."""
+
+    __slots__ = (
+        "month", "type", "id", "recurring_id", "description", "category", "amount", "timestamp", "order", "words",
+    )
+
+    def __init__(self, month, item_type, item, words):
+        """Initialize the document from an item model or dict."""
+        get = item.get if isinstance(item, dict) else lambda key: getattr(item, key, None)
+        self.month = month
+        self.type = item_type
+        self.id = get("id")
+        self.recurring_id = get("recurring_id")
+        self.description = get("description") or ""
+        self.category = get("category") or ""
+        self.amount = get("amount")
+        self.timestamp = get("timestamp") or ""
+        self.order = order_key(self.id, self.timestamp)
+        self.words = words
+
+    def as_hit(self, account: str, score: int) -> dict:
+        """Return the search result representation."""
+        return {
+            "account": account,
+            "month": self.month,
+            "type": self.type,
+            "id": self.id,
+            "description": self.description,
+            "category": self.category,
+            "amount": self.amount,
+            "timestamp": self.timestamp,
+            "score": score,
+        }
+
+
+class AccountIndex:
+    """Inverted index of the words of one account's items, with prefix lookups."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # (month, item id) -> document
+        self.documents = {}
+        # word -> set of document keys
+        self.postings = {}
+        # Sorted words, for prefix lookups
+        self.vocabulary = []
+        # Item type -> set of document keys
+        self.types = {"income": set(), "expense": set()}
+        # Ids of the documents of the current month
+        self.current = set()
+        # Words of each distinct (description, category), shared by the items repeating them
+        self._words = {}
+
+    def add(self, month, item_type: str, item) -> None:
+        """Index an item (model or dict) of ``month``."""
+        document = SearchDocument(month, item_type, item, ())
+        text = (document.description, document.category)
+        words = self._words.get(text)
+        if words is None:
+            words = self._words[text] = tokenize(f"{text[0]} {text[1]}")
+        document.words = words
+        key = (month, document.id)
+        if key in self.documents:
+            self.remove(month, document.id)
+        self.documents[key] = document
+        self.types[item_type].add(key)
+        if month is None:
+            self.current.add(document.id)
+        for word in words:
+            keys = self.postings.get(word)
+            if keys is None:
+                keys = self.postings[word] = set()
+                bisect.insort(self.vocabulary, word)
+            keys.add(key)
+
+    def remove(self, month, item_id) -> None:
+        """Remove an item of ``month`` from the index."""
+        key = (month, item_id)
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        self.types[document.type].discard(key)
+        if month is None:
+            self.current.discard(item_id)
+        for word in document.words:
+            keys = self.postings.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+
+    def add_current(self, account_data: dict) -> None:
+        """Index every item of the current month."""
+        for key, item_type in _ITEM_TYPES:
+            for item in account_data.get(key, []):
+                self.add(None, item_type, item)
+
+    def current_documents(self) -> list:
+        """Return the documents of the current month."""
+        return [self.documents[(None, item_id)] for item_id in self.current]
+
+    def update_current(self, account_data: dict, ids) -> None:
+        """Re-index the current items whose id, or recurring rule id, is in ``ids``."""
+        ids = set(ids)
+        for document in self.current_documents():
+            if document.id in ids or document.recurring_id in ids:
+                self.remove(None, document.id)
+        for key, item_type in _ITEM_TYPES:
+            for item in account_data.get(key, []):
+                if item.id in ids or item.recurring_id in ids:
+                    self.add(None, item_type, item)
+
+    def archive_current(self, year_month: str, account_data: dict) -> None:
+        """Move the documents of the current month to ``year_month`` and index the new month."""
+        for document in self.current_documents():
+            self.remove(None, document.id)
+            document.month = year_month
+            self.documents[(year_month, document.id)] = document
+            self.types[document.type].add((year_month, document.id))
+            for word in document.words:
+                keys = self.postings.get(word)
+                if keys is None:
+                    keys = self.postings[word] = set()
+                    bisect.insort(self.vocabulary, word)
+                keys.add((year_month, document.id))
+        self.add_current(account_data)
+
+    def _matching_keys(self, prefix: str) -> set:
+        keys = set()
+        position = bisect.bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(prefix):
+            keys |= self.postings[self.vocabulary[position]]
+            position += 1
+        return keys
+
+    def search(self, words: tuple, item_type: str = None) -> dict:
+        """
+        Return {score: document keys} of the items matching every query word as a word prefix;
+        each query word matching a whole word scores more than a prefix.
+        """
+        matches = sorted((self._matching_keys(word) for word in words), key=len)
+        if item_type is not None:
+            matches.insert(0, self.types[item_type])
+        if not matches or not all(matches):
+            return {}
+        candidates = matches[0].intersection(*matches[1:])
+        if len(words) == 1:
+            exact = candidates.intersection(self.postings.get(words[0], ()))
+            buckets = {EXACT_MATCH_SCORE: exact, PREFIX_MATCH_SCORE: candidates - exact}
+            return {score: keys for score, keys in buckets.items() if keys}
+        # Count the whole-word matches, only looping over exact hits
+        exact_counts = {}
+        for word in words:
+            for key in candidates.intersection(self.postings.get(word, ())):
+                exact_counts[key] = exact_counts.get(key, 0) + 1
+        base = PREFIX_MATCH_SCORE * len(words)
+        buckets = {base: candidates.difference(exact_counts)} if len(exact_counts) < len(candidates) else {}
+        for key, count in exact_counts.items():
+            score = base + (EXACT_MATCH_SCORE - PREFIX_MATCH_SCORE) * count
+            buckets.setdefault(score, set()).add(key)
+        return buckets
+
+
+def _build_index(current: dict, history: dict) -> AccountIndex:
+    """Build the index of an account from a snapshot of its items (executor)."""
+    index = AccountIndex()
+    index.add_current(current)
+    for year_month, month in history.items():
+        if not isinstance(month, dict):
+            continue
+        for key, item_type in _ITEM_TYPES:
+            for item in month_items(month, key):
+                index.add(year_month, item_type, item)
+    return index
+
+
+class SearchIndex:
+    """
+    Search indexes of the accounts, built in the executor on the first search of an
+    account and then kept up to date incrementally by the item add, remove and archive paths.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the indexes."""
+        self.hass = hass
+        self._indexes = {}
+        self._building = {}
+        # Accounts changed while their index was being built
+        self._stale = set()
+
+    async def async_get(self, account: str, account_data: dict) -> AccountIndex:
+        """Return the index of an account, building it if needed."""
+        index = self._indexes.get(account)
+        if index is not None:
+            return index
+        future = self._building.get(account)
+        if future is None:
+            self._stale.discard(account)
+            # Lists and month dicts are replaced, never mutated, so shallow copies are a snapshot
+            current = {key: list(account_data.get(key, [])) for key, _ in _ITEM_TYPES}
+            history = dict(account_data.get("history", {}))
+            future = self._building[account] = self.hass.async_add_executor_job(
+                _build_index, current, history
+            )
+        try:
+            index = await future
+        finally:
+            self._building.pop(account, None)
+        if account not in self._stale:
+            self._indexes[account] = index
+        return index
+
+    @callback
+    def async_update(self, account: str, account_data: dict, ids=None) -> None:
+        """Apply a change of an account: re-index ``ids``, or drop the whole index if None."""
+        if account in self._building:
+            self._stale.add(account)
+        index = self._indexes.get(account)
+        if index is None:
+            return
+        if ids is None:
+            del self._indexes[account]
+        else:
+            index.update_current(account_data, ids)
+
+    @callback
+    def async_archive(self, account: str, year_month: str, account_data: dict) -> None:
+        """Move the current items of an account to its archived month ``year_month``."""
+        if account in self._building:
+            self._stale.add(account)
+        index = self._indexes.get(account)
+        if index is not None:
+            index.archive_current(year_month, account_data)
+
+    async def async_search(
+        self, accounts: dict, query: str, item_type: str = None, offset: int = 0, limit: int = 20
+    ) -> dict:
+        """
+        Return the hits of ``query`` over ``accounts`` ({account: account data}), best score
+        first then most recent, with the total number of matches.
+        """
+        words = tokenize(query)
+        if not words:
+            return {"total": 0, "hits": []}
+        buckets = {}
+        for account, account_data in accounts.items():
+            index = await self.async_get(account, account_data)
+            for score, keys in index.search(words, item_type).items():
+                buckets.setdefault(score, []).append((account, index, keys))
+
+        # Only the score levels reaching the requested page are sorted (by creation order)
+        total = sum(len(keys) for levels in buckets.values() for _, _, keys in levels)
+        needed = offset + limit
+        hits = []
+        for score in sorted(buckets, reverse=True):
+            if needed <= 0:
+                break
+            best = heapq.nlargest(
+                needed,
+                (
+                    (document.order, account, document)
+                    for account, index, keys in buckets[score]
+                    for document in map(index.documents.__getitem__, keys)
+                ),
+                key=lambda match: match[0],
+            )
+            hits.extend(document.as_hit(account, score) for _, account, document in best)
+            needed -= len(best)
+        return {"total": total, "hits": hits[offset:offset + limit]}
+
+
+def get_search_index(hass: HomeAssistant) -> SearchIndex:
+    """Return the domain-level search index, creating it on first use."""
+    index = hass.data.get(DATA_SEARCH)
+    if index is None:
+        index = hass.data[DATA_SEARCH] = SearchIndex(hass)
+    return index
+
+
+@callback
+def async_update_search_index(hass: HomeAssistant, entry_id: str, account: str = None, items=None) -> None:
+    """Apply a data change of an account (or of every account of an entry) to the search index."""
+    index = hass.data.get(DATA_SEARCH)
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if index is None or entry_data is None:
+        return
+    for name in [account] if account else entry_data["accounts"]:
+        index.async_update(name, entry_data["data"].get(name, {}), items)
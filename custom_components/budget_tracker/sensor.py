@@ -1,5 +1,4 @@
 """Sensor platform for Budget Tracker integration."""
-from datetime import datetime
 import logging
 
 from homeassistant.components.sensor import (
@@ -8,18 +7,24 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CURRENCY_EURO
+from homeassistant.const import (
+    CURRENCY_EURO,
+    EntityCategory,
+    MATCH_ALL,
+    UnitOfInformation,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import StateType, DiscoveryInfoType
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.typing import StateType
 
 from .const import (
     DOMAIN,
     NAME,
     VERSION,
-    CONF_ACCOUNTS,
     INCOME_SENSOR,
     EXPENSES_SENSOR,
     BALANCE_SENSOR,
@@ -33,6 +38,14 @@ from .const import (
     ATTR_RECURRING_INCOMES,
     ATTR_RECURRING_EXPENSES
 )
+from .envelopes import envelope_state, envelope_unique_id
+from .forecast import get_account_forecast
+from .household import HOUSEHOLD, TOTALS, get_household, household_unique_id
+from .instrumentation import BudgetMetrics, get_entry_metrics
+from .models import ATTR_TRANSFERS_IN, ATTR_TRANSFERS_OUT, items_to_dicts
+from .periods import PERIOD_START, parse_period_id
+from .spending import get_spending_totals
+from .schema import has_month_items, is_summary, month_category_totals, month_item_count, month_items
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,34 +55,165 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Budget Tracker sensors."""
-    accounts = entry.data.get(CONF_ACCOUNTS, ["default"])
+    accounts = hass.data[DOMAIN][entry.entry_id]["accounts"]
     
     entities = []
     for account in accounts:
-        # Current month sensors
-        entities.extend([
-            IncomeSensor(hass, entry, account),
-            ExpensesSensor(hass, entry, account),
-            BalanceSensor(hass, entry, account),
-        ])
-        
-        # Create historical sensors for existing data
-        account_data = hass.data[DOMAIN][entry.entry_id]["data"].get(account, {})
-        history = account_data.get("history", {})
-        
-        for year_month, data in history.items():
-            try:
-                year, month = year_month.split("_")
-                entities.extend([
-                    HistoricalIncomeSensor(hass, entry, account, int(year), int(month), data.get("income", 0)),
-                    HistoricalExpensesSensor(hass, entry, account, int(year), int(month), data.get("expenses", 0)),
-                    HistoricalBalanceSensor(hass, entry, account, int(year), int(month), data.get("balance", 0)),
-                ])
-            except (ValueError, AttributeError) as err:
-                _LOGGER.error("Error creating historical sensors: %s", err)
+        entities.extend(_account_entities(hass, entry, account))
+
+    # Diagnostic performance sensors
+    for key, name, icon in PERFORMANCE_TIMERS:
+        entities.append(PerformanceSensor(hass, entry, key, name, icon))
+    entities.extend([
+        ServiceLatencySensor(hass, entry),
+        BytesWrittenSensor(hass, entry),
+        EventsFiredSensor(hass, entry),
+    ])
     
+    # Consolidated sensors of the household and of the account groups
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    if entry_data["household_sensors"]:
+        entities.extend(_household_entities(hass, entry, HOUSEHOLD))
+    for group in entry_data["account_groups"]:
+        entities.extend(_household_entities(hass, entry, (entry.entry_id, group)))
+
     async_add_entities(entities)
 
+    @callback
+    def async_accounts_added(added):
+        """Add the sensors of accounts added through the options flow."""
+        new_entities = []
+        for account in added:
+            new_entities.extend(_account_entities(hass, entry, account))
+        async_add_entities(new_entities)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, f"{DOMAIN}_accounts_added_{entry.entry_id}", async_accounts_added)
+    )
+
+    @callback
+    def async_budgets_added(added):
+        """Add the sensors of envelopes added through the options flow."""
+        async_add_entities([BudgetEnvelopeSensor(hass, entry, account, category) for account, category in added])
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, f"{DOMAIN}_budgets_added_{entry.entry_id}", async_budgets_added)
+    )
+
+    @callback
+    def async_household_added(added):
+        """Add the consolidated sensors enabled through the options flow."""
+        new_entities = []
+        for key in added:
+            new_entities.extend(_household_entities(hass, entry, key))
+        async_add_entities(new_entities)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, f"{DOMAIN}_household_added_{entry.entry_id}", async_household_added)
+    )
+
+
+def _household_entities(hass: HomeAssistant, entry: ConfigEntry, key) -> list:
+    """Return the consolidated sensors of the household (``None``) or of an account group."""
+    return [HouseholdSensor(hass, entry, key, kind) for kind in TOTALS]
+
+
+def _account_entities(hass: HomeAssistant, entry: ConfigEntry, account: str) -> list:
+    """Return the sensors of one account."""
+    entities = []
+    # Current month sensors
+    entities.extend([
+        IncomeSensor(hass, entry, account),
+        ExpensesSensor(hass, entry, account),
+        BalanceSensor(hass, entry, account),
+    ])
+    
+    # Create historical sensors for existing data
+    account_data = hass.data[DOMAIN][entry.entry_id]["data"].get(account, {})
+    history = account_data.get("history", {})
+    
+    for period_id, data in history.items():
+        try:
+            entities.extend([
+                HistoricalIncomeSensor(hass, entry, account, period_id, data.get("income", 0)),
+                HistoricalExpensesSensor(hass, entry, account, period_id, data.get("expenses", 0)),
+                HistoricalBalanceSensor(hass, entry, account, period_id, data.get("balance", 0)),
+            ])
+        except (ValueError, AttributeError) as err:
+            _LOGGER.error("Error creating historical sensors: %s", err)
+
+    entities.append(ItemsCountSensor(hass, entry, account))
+    for key, name, icon in FORECAST_SENSORS:
+        entities.append(ForecastSensor(hass, entry, account, key, name, icon))
+    for category in hass.data[DOMAIN][entry.entry_id]["budgets"].get(account, {}):
+        entities.append(BudgetEnvelopeSensor(hass, entry, account, category))
+    return entities
+
+
+# Forecast values exposed as sensors: (forecast key, name, icon)
+FORECAST_SENSORS = [
+    ("end_of_period_balance", "Forecast End of Period", "mdi:chart-line"),
+    ("horizon_balance", "Forecast 12 Months", "mdi:chart-timeline-variant"),
+]
+
+
+# Minimum delay between two state writes of a diagnostic sensor (seconds)
+PERFORMANCE_UPDATE_INTERVAL = 30
+
+# Instrumented operations exposed as diagnostic sensors: (metric key, name, icon)
+PERFORMANCE_TIMERS = [
+    ("save_data", "Save Duration", "mdi:content-save-cog"),
+    ("load_data", "Load Duration", "mdi:database-import"),
+    ("json_parse", "JSON Parse Duration", "mdi:code-json"),
+    ("json_serialize", "JSON Serialize Duration", "mdi:code-json"),
+    ("dispatch", "Dispatch Duration", "mdi:broadcast"),
+    ("archive_and_reset_data", "Archive Duration", "mdi:archive-clock"),
+]
+
+
+class DiagnosticSensorMixin:
+    """
+    Throttled state writes of the diagnostic sensors. Data changes only schedule a state
+    write, at most one per ``PERFORMANCE_UPDATE_INTERVAL``, made only if the exposed values
+    changed: the measured hot path does not pay for the diagnostics.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+    # Diagnostic details are not kept in the recorder
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+    _cancel_update = None
+    _written = None
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_update)
+
+    @callback
+    def _handle_data_updated(self) -> None:
+        """Schedule a state write when data changes (one pending write at most)."""
+        if self._cancel_update is None:
+            self._cancel_update = async_call_later(
+                self.hass, PERFORMANCE_UPDATE_INTERVAL, self._async_write_if_changed
+            )
+
+    @callback
+    def _async_write_if_changed(self, _now=None) -> None:
+        """Write the state if the value or attributes changed since the last write."""
+        self._cancel_update = None
+        written = (self.native_value, self.extra_state_attributes)
+        if written == self._written:
+            return
+        self._written = written
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_update(self) -> None:
+        if self._cancel_update is not None:
+            self._cancel_update()
+            self._cancel_update = None
+
 
 class BudgetSensorBase(SensorEntity):
     """Base class for Budget Tracker sensors."""
@@ -120,6 +264,43 @@ class BudgetSensorBase(SensorEntity):
         return data
 
 
+class ItemsCountSensor(DiagnosticSensorMixin, BudgetSensorBase):
+    """Diagnostic sensor for the number of items stored for an account."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str):
+        """Initialize the items count sensor."""
+        super().__init__(hass, entry, account)
+
+        self._attr_unique_id = f"{DOMAIN}_{account}_items_count"
+        self._attr_name = "Items"
+        self._attr_icon = "mdi:format-list-numbered"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the number of items of the current month."""
+        data = self.account_data
+        return len(data.get("income_items", [])) + len(data.get("expense_items", []))
+
+    @property
+    def extra_state_attributes(self):
+        """Return the item counts per list."""
+        data = self.account_data
+        history = data.get("history", {})
+        return {
+            ATTR_ITEMS_INCOME: len(data.get("income_items", [])),
+            ATTR_ITEMS_EXPENSE: len(data.get("expense_items", [])),
+            ATTR_RECURRING_INCOMES: len(data.get("recurring_incomes", [])),
+            ATTR_RECURRING_EXPENSES: len(data.get("recurring_expenses", [])),
+            "history_months": len(history),
+            "history_items": sum(
+                month_item_count(month, "income_items") + month_item_count(month, "expense_items")
+                for month in history.values()
+            ),
+        }
+
+
 class IncomeSensor(BudgetSensorBase):
     """Sensor for current month income."""
 
@@ -143,8 +324,8 @@ class IncomeSensor(BudgetSensorBase):
     def extra_state_attributes(self):
         """Return entity specific state attributes."""
         attrs = {
-            ATTR_ITEMS_INCOME: self.account_data.get("income_items", []),
-            ATTR_RECURRING_INCOMES: self.account_data.get("recurring_incomes", [])
+            ATTR_ITEMS_INCOME: items_to_dicts(self.account_data.get("income_items", [])),
+            ATTR_RECURRING_INCOMES: items_to_dicts(self.account_data.get("recurring_incomes", []))
         }
         return attrs
 
@@ -172,8 +353,8 @@ class ExpensesSensor(BudgetSensorBase):
     def extra_state_attributes(self):
         """Return entity specific state attributes."""
         attrs = {
-            ATTR_ITEMS_EXPENSE: self.account_data.get("expense_items", []),
-            ATTR_RECURRING_EXPENSES: self.account_data.get("recurring_expenses", [])
+            ATTR_ITEMS_EXPENSE: items_to_dicts(self.account_data.get("expense_items", [])),
+            ATTR_RECURRING_EXPENSES: items_to_dicts(self.account_data.get("recurring_expenses", []))
         }
         return attrs
 
@@ -197,6 +378,153 @@ class BalanceSensor(BudgetSensorBase):
         """Return the current month balance value."""
         return self.account_data.get(ATTR_BALANCE, 0)
 
+    @property
+    def extra_state_attributes(self):
+        """Return the transfers counted in the balance and the bounds of the budget period."""
+        period_end = self.hass.data[DOMAIN][self.entry_id].get("period_ends", {}).get(self.account)
+        return {
+            ATTR_TRANSFERS_IN: self.account_data.get(ATTR_TRANSFERS_IN, 0),
+            ATTR_TRANSFERS_OUT: self.account_data.get(ATTR_TRANSFERS_OUT, 0),
+            PERIOD_START: self.account_data.get(PERIOD_START),
+            "period_end": period_end.isoformat() if period_end else None,
+        }
+
+
+class ForecastSensor(BudgetSensorBase):
+    """Sensor for a projected balance of the cash-flow forecast."""
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_native_unit_of_measurement = CURRENCY_EURO
+    # A projection, not a total of past values: no long-term statistics
+    _attr_state_class = None
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, key: str, name: str, icon: str):
+        """Initialize the forecast sensor."""
+        super().__init__(hass, entry, account)
+        self.key = key
+
+        self._attr_unique_id = f"{DOMAIN}_{account}_forecast_{key}"
+        self._attr_name = name
+        self._attr_icon = icon
+
+    @property
+    def forecast(self) -> dict:
+        """Return the cached forecast of the account."""
+        return get_account_forecast(self.hass, self.entry_id, self.account)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the projected balance."""
+        return self.forecast[self.key]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the inputs of the projection, and the projected periods for the 12-month forecast."""
+        forecast = self.forecast
+        if self.key == "horizon_balance":
+            return {"horizon_end": forecast["horizon_end"], "periods": forecast["periods"]}
+        return {
+            key: forecast[key]
+            for key in ("period_end", "balance", "spent", "average_spending", "remaining_spending")
+        }
+
+
+class BudgetEnvelopeSensor(BudgetSensorBase):
+    """Sensor for the amount left in the spending limit of a category."""
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_native_unit_of_measurement = CURRENCY_EURO
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, category: str):
+        """Initialize the envelope sensor."""
+        super().__init__(hass, entry, account)
+        self.category = category
+
+        self._attr_unique_id = envelope_unique_id(account, category)
+        self._attr_name = f"Budget {category} Remaining"
+        self._attr_icon = "mdi:wallet-outline"
+
+    @property
+    def envelope(self) -> dict:
+        """Return the limit, spending and remaining amount of the envelope (maintained totals, no item sum)."""
+        limit = self.hass.data[DOMAIN][self.entry_id]["budgets"].get(self.account, {}).get(self.category)
+        if limit is None:
+            return {}
+        spent = get_spending_totals(self.hass).total(self.account, self.account_data, self.category)
+        return envelope_state(limit, spent)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the remaining amount (negative once the limit is exceeded)."""
+        return self.envelope.get("remaining")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the category, limit, spending and used percentage."""
+        return {"category": self.category, **self.envelope}
+
+
+class HouseholdSensor(SensorEntity):
+    """Sensor for a consolidated total of every account, or of an account group."""
+
+    _attr_has_entity_name = True
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_native_unit_of_measurement = CURRENCY_EURO
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, group, kind: str):
+        """Initialize the sensor of the household (``group`` None) or of a group ((entry id, name))."""
+        self.hass = hass
+        self.entry_id = entry.entry_id
+        self.group = group
+        self.kind = kind
+
+        if group is HOUSEHOLD:
+            identifier, device_name = "household", f"{NAME} - Household"
+        else:
+            identifier, device_name = f"group_{group[1]}", f"{NAME} Group - {group[1]}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{self.entry_id}_{identifier}")},
+            name=device_name,
+            manufacturer="Custom Component",
+            model=f"{NAME} Consolidated",
+            sw_version=VERSION,
+        )
+        self._attr_unique_id = household_unique_id(self.entry_id, group, kind)
+        self._attr_name = f"{kind.capitalize()} Current Month"
+        self._attr_icon = HOUSEHOLD_ICONS[kind]
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, f"{DOMAIN}_household_updated", self._handle_household_updated)
+        )
+
+    @callback
+    def _handle_household_updated(self, changed: set) -> None:
+        """Update the sensor only when the totals it consolidates changed."""
+        if self.group in changed:
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the consolidated total (maintained by delta, accounts are not read)."""
+        return round(get_household(self.hass).get(self.group)[self.kind], 2)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the accounts counted in the total."""
+        return {"accounts": get_household(self.hass).members(self.group)}
+
+
+# Icons of the consolidated totals
+HOUSEHOLD_ICONS = {
+    "income": "mdi:cash-plus",
+    "expenses": "mdi:cash-minus",
+    "balance": "mdi:scale-balance",
+}
+
 
 class HistoricalSensorBase(SensorEntity):
     """Base class for historical Budget Tracker sensors."""
@@ -206,18 +534,24 @@ class HistoricalSensorBase(SensorEntity):
     _attr_device_class = SensorDeviceClass.MONETARY
     _attr_native_unit_of_measurement = CURRENCY_EURO
     
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, year: int, month: int, value: float):
-        """Initialize the historical sensor."""
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, period_id: str, value: float):
+        """Initialize the historical sensor of an archived period (``YYYY_MM`` or ``YYYY_MM_DD``)."""
         self.hass = hass
         self.entry = entry
         self.entry_id = entry.entry_id
         self.account = account
-        self.year = year
-        self.month = month
+        self.period_id = period_id
+        start = parse_period_id(period_id)
+        self.year = start.year
+        self.month = start.month
         self._value = value
         
-        # Format month name for display
-        month_name = datetime(year, month, 1).strftime("%B")
+        # Calendar months are named after the month, other periods after their first day
+        month_name = start.strftime("%B")
+        if period_id.count("_") == 1:
+            self.period_label = f"{month_name} {start.year}"
+        else:
+            self.period_label = f"{start.day} {month_name} {start.year}"
         
         # Device info
         self._attr_device_info = DeviceInfo(
@@ -230,8 +564,9 @@ class HistoricalSensorBase(SensorEntity):
         
         # Common attributes
         self._attr_extra_state_attributes = {
-            ATTR_MONTH: month,
-            ATTR_YEAR: year,
+            ATTR_MONTH: self.month,
+            ATTR_YEAR: self.year,
+            "period": period_id,
         }
         
         # Will be set by implementing classes
@@ -244,64 +579,219 @@ class HistoricalSensorBase(SensorEntity):
         """Return the historical value."""
         return self._value
 
+    @property
+    def month_data(self):
+        """Get the archived data of the sensor's month."""
+        account_data = self.hass.data[DOMAIN][self.entry_id]["data"].get(self.account, {})
+        return account_data.get("history", {}).get(self.period_id, {})
+
 
 class HistoricalIncomeSensor(HistoricalSensorBase):
     """Sensor for historical month income."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, year: int, month: int, value: float):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, period_id: str, value: float):
         """Initialize the historical income sensor."""
-        super().__init__(hass, entry, account, year, month, value)
-        
-        month_name = datetime(year, month, 1).strftime("%B")
-        
-        self._attr_unique_id = f"{DOMAIN}_{account}_income_{year}_{month:02d}"
-        self._attr_name = f"Income {month_name} {year}"
+        super().__init__(hass, entry, account, period_id, value)
+        self._attr_unique_id = f"{DOMAIN}_{account}_income_{period_id}"
+        self._attr_name = f"Income {self.period_label}"
         self._attr_icon = "mdi:cash-plus"
-        
-        # Get historical income items if they exist
-        year_month_key = f"{year}_{month:02d}"
-        account_data = hass.data[DOMAIN][entry.entry_id]["data"].get(account, {})
-        history = account_data.get("history", {})
-        month_data = history.get(year_month_key, {})
-        
-        # Add income items to attributes if they exist
-        if "income_items" in month_data:
-            self._attr_extra_state_attributes[ATTR_ITEMS_INCOME] = month_data["income_items"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return month, year and the archived income items (expanded on demand) or category totals."""
+        attrs = dict(self._attr_extra_state_attributes)
+        month_data = self.month_data
+        if has_month_items(month_data, "income_items"):
+            attrs[ATTR_ITEMS_INCOME] = month_items(month_data, "income_items")
+        elif is_summary(month_data):
+            attrs["categories"] = month_category_totals(month_data, "income_items")
+        return attrs
 
 
 class HistoricalExpensesSensor(HistoricalSensorBase):
     """Sensor for historical month expenses."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, year: int, month: int, value: float):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, period_id: str, value: float):
         """Initialize the historical expenses sensor."""
-        super().__init__(hass, entry, account, year, month, value)
-        
-        month_name = datetime(year, month, 1).strftime("%B")
-        
-        self._attr_unique_id = f"{DOMAIN}_{account}_expenses_{year}_{month:02d}"
-        self._attr_name = f"Expenses {month_name} {year}"
+        super().__init__(hass, entry, account, period_id, value)
+        self._attr_unique_id = f"{DOMAIN}_{account}_expenses_{period_id}"
+        self._attr_name = f"Expenses {self.period_label}"
         self._attr_icon = "mdi:cash-minus"
-        
-        # Get historical expense items if they exist
-        year_month_key = f"{year}_{month:02d}"
-        account_data = hass.data[DOMAIN][entry.entry_id]["data"].get(account, {})
-        history = account_data.get("history", {})
-        month_data = history.get(year_month_key, {})
-        
-        # Add expense items to attributes if they exist
-        if "expense_items" in month_data:
-            self._attr_extra_state_attributes[ATTR_ITEMS_EXPENSE] = month_data["expense_items"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return month, year and the archived expense items (expanded on demand) or category totals."""
+        attrs = dict(self._attr_extra_state_attributes)
+        month_data = self.month_data
+        if has_month_items(month_data, "expense_items"):
+            attrs[ATTR_ITEMS_EXPENSE] = month_items(month_data, "expense_items")
+        elif is_summary(month_data):
+            attrs["categories"] = month_category_totals(month_data, "expense_items")
+        return attrs
 
 
 class HistoricalBalanceSensor(HistoricalSensorBase):
     """Sensor for historical month balance."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, year: int, month: int, value: float):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, account: str, period_id: str, value: float):
         """Initialize the historical balance sensor."""
-        super().__init__(hass, entry, account, year, month, value)
-        
-        month_name = datetime(year, month, 1).strftime("%B")
-        
-        self._attr_unique_id = f"{DOMAIN}_{account}_balance_{year}_{month:02d}"
-        self._attr_name = f"Balance {month_name} {year}"
+        super().__init__(hass, entry, account, period_id, value)
+        self._attr_unique_id = f"{DOMAIN}_{account}_balance_{period_id}"
+        self._attr_name = f"Balance {self.period_label}"
         self._attr_icon = "mdi:scale-balance"
+
+
+class PerformanceSensorBase(DiagnosticSensorMixin, SensorEntity):
+    """Base class for Budget Tracker diagnostic performance sensors."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Initialize the performance sensor."""
+        self.hass = hass
+        self.entry = entry
+        self.entry_id = entry.entry_id
+
+        # Device info
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{self.entry_id}_diagnostics")},
+            name=f"{NAME} Diagnostics",
+            manufacturer="Custom Component",
+            model=f"{NAME} Diagnostics",
+            sw_version=VERSION,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{DOMAIN}_data_updated_{self.entry_id}",
+                self._handle_data_updated,
+            )
+        )
+
+    @property
+    def metrics(self) -> BudgetMetrics:
+        """Get the metrics of the config entry."""
+        return get_entry_metrics(self.hass, self.entry_id) or BudgetMetrics()
+
+
+class PerformanceSensor(PerformanceSensorBase):
+    """Diagnostic sensor for the duration of one instrumented operation."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, key: str, name: str, icon: str):
+        """Initialize the performance sensor."""
+        super().__init__(hass, entry)
+        self.key = key
+
+        self._attr_unique_id = f"{DOMAIN}_{self.entry_id}_perf_{key}"
+        self._attr_name = name
+        self._attr_icon = icon
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the last duration in milliseconds."""
+        return self.metrics.duration(self.key).as_dict()["last_ms"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return count, p95, max and average durations."""
+        return self.metrics.duration(self.key).as_dict()
+
+
+class ServiceLatencySensor(PerformanceSensorBase):
+    """Diagnostic sensor for the latency of the integration's services."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Initialize the service latency sensor."""
+        super().__init__(hass, entry)
+
+        self._attr_unique_id = f"{DOMAIN}_{self.entry_id}_perf_services"
+        self._attr_name = "Service Latency"
+        self._attr_icon = "mdi:timer-outline"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the p95 duration over all service calls in milliseconds."""
+        stats = [
+            stat for name, stat in self.metrics.durations.items()
+            if name.startswith("service_")
+        ]
+        return max((stat.as_dict()["p95_ms"] for stat in stats), default=0.0)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the statistics of each service."""
+        return {
+            name[len("service_"):]: stat.as_dict()
+            for name, stat in self.metrics.durations.items()
+            if name.startswith("service_")
+        }
+
+
+class BytesWrittenSensor(PerformanceSensorBase):
+    """Diagnostic sensor for the size of the last storage write."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Initialize the bytes written sensor."""
+        super().__init__(hass, entry)
+
+        self._attr_unique_id = f"{DOMAIN}_{self.entry_id}_perf_bytes_written"
+        self._attr_name = "Last Save Size"
+        self._attr_icon = "mdi:harddisk"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the number of bytes written by the last save."""
+        return self.metrics.values.get("last_bytes_written", 0)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the cumulative write counters."""
+        counters = self.metrics.counters
+        return {
+            "bytes_written_total": counters.get("bytes_written", 0),
+            "saves": counters.get("saves", 0),
+        }
+
+
+class EventsFiredSensor(PerformanceSensorBase):
+    """Diagnostic sensor for the number of events and dispatches fired."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Initialize the events fired sensor."""
+        super().__init__(hass, entry)
+
+        self._attr_unique_id = f"{DOMAIN}_{self.entry_id}_perf_events_fired"
+        self._attr_name = "Events Fired"
+        self._attr_icon = "mdi:bell-ring-outline"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the number of bus events fired."""
+        return self.metrics.counters.get("events_fired", 0)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the dispatcher and service call counters."""
+        counters = self.metrics.counters
+        return {
+            "dispatches": counters.get("dispatches", 0),
+            "service_calls": counters.get("service_calls", 0),
+        }
@@ -0,0 +1,135 @@
+"""Running per-category expense totals of the current period of every account."""
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_SPENDING, DOMAIN
+from .models import transfer_id
+
+
+class _AccountTotals:
+    """Per-category expense totals of one account's current items, transfers excluded."""
+
+    def __init__(self, account_data: dict):
+        """Seed the totals from the current expense items of the account."""
+        # item id -> (category, amount), and category -> total
+        self.items = {}
+        self.totals = {}
+        # Ids registered by ``record`` whose dispatch is still to come
+        self.fresh = set()
+        for item in account_data.get("expense_items", []):
+            self.add(item)
+
+    def add(self, item) -> None:
+        if transfer_id(item) is not None:
+            return
+        category = item.category or ""
+        amount = item.amount or 0
+        self.items[item.id] = (category, amount)
+        self.totals[category] = self.totals.get(category, 0) + amount
+
+    def discard(self, item_id) -> None:
+        known = self.items.pop(item_id, None)
+        if known is not None:
+            category, amount = known
+            self.totals[category] -= amount
+
+
+class SpendingTotals:
+    """
+    Per-category totals of the current expenses of each account, kept up to date by deltas:
+    built once from the items of an account, then adjusted by the items added, changed or
+    removed, so reading the total of a category never sums items. Changes return the previous
+    total of each category they moved, for the checks comparing a total before and after.
+    """
+
+    def __init__(self):
+        """Initialize the totals."""
+        self._accounts = {}
+
+    def _account(self, account: str, account_data: dict) -> _AccountTotals:
+        totals = self._accounts.get(account)
+        if totals is None:
+            totals = self._accounts[account] = _AccountTotals(account_data)
+        return totals
+
+    def get(self, account: str, account_data: dict) -> dict:
+        """Return {category: total} of the current expenses of an account."""
+        return self._account(account, account_data).totals
+
+    def total(self, account: str, account_data: dict, category: str) -> float:
+        """Return the current expense total of a category of an account."""
+        return self._account(account, account_data).totals.get(category or "", 0)
+
+    def record(self, account: str, account_data: dict, item) -> dict:
+        """Register an expense just added to the current period; returns {category: previous total}."""
+        totals = self._account(account, account_data)
+        if item.id in totals.items or transfer_id(item) is not None:
+            # Already counted (totals just built from the items)
+            return {}
+        category = item.category or ""
+        previous = totals.totals.get(category, 0)
+        totals.add(item)
+        totals.fresh.add(item.id)
+        return {category: previous}
+
+    @callback
+    def async_update(self, account: str, account_data: dict, ids=None) -> dict:
+        """
+        Apply a change of an account: refresh the items ``ids``, or every item if None.
+        Returns {category: previous total} of the categories whose total changed.
+        """
+        totals = self._accounts.get(account)
+        if totals is None:
+            return {}
+        if ids is None:
+            previous = dict(totals.totals)
+            totals = self._accounts[account] = _AccountTotals(account_data)
+        else:
+            ids = set(ids)
+            if ids <= totals.fresh:
+                # Items added through ``record``: already counted
+                totals.fresh -= ids
+                return {}
+            totals.fresh -= ids
+            previous = dict(totals.totals)
+            for item_id in ids:
+                totals.discard(item_id)
+            for item in account_data.get("expense_items", []):
+                if item.id in ids or item.recurring_id in ids:
+                    totals.discard(item.id)
+                    totals.add(item)
+        return {
+            category: previous.get(category, 0)
+            for category in set(previous) | set(totals.totals)
+            if round(previous.get(category, 0) - totals.totals.get(category, 0), 2)
+        }
+
+    @callback
+    def async_forget(self, account: str) -> None:
+        """Drop the totals of a removed account."""
+        self._accounts.pop(account, None)
+
+
+def get_spending_totals(hass: HomeAssistant) -> SpendingTotals:
+    """Return the domain-level spending totals, creating them on first use."""
+    totals = hass.data.get(DATA_SPENDING)
+    if totals is None:
+        totals = hass.data[DATA_SPENDING] = SpendingTotals()
+    return totals
+
+
+@callback
+def async_update_spending_totals(hass: HomeAssistant, entry_id: str, account: str = None, items=None) -> dict:
+    """
+    Apply a data change of an account (or of every account of an entry) to the spending totals.
+    Returns {account: {category: previous total}} of the totals that changed.
+    """
+    totals = hass.data.get(DATA_SPENDING)
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if totals is None or entry_data is None:
+        return {}
+    changes = {}
+    for name in [account] if account else entry_data["accounts"]:
+        changed = totals.async_update(name, entry_data["data"].get(name, {}), items)
+        if changed:
+            changes[name] = changed
+    return changes
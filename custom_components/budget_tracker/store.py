@@ -0,0 +1,320 @@
+"""Budget data shared by every config entry, loaded and parsed once."""
+import asyncio
+from collections.abc import MutableMapping
+import json
+import logging
+import os
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .const import (
+    CONF_ACCOUNTS,
+    CONF_STORAGE_TYPE,
+    DATA_STORAGE_FILE,
+    DATA_STORE,
+    DEFAULT_STORAGE_TYPE,
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_TYPE_FILE,
+    STORAGE_TYPE_STORE,
+)
+from .models import data_from_storage, data_to_storage
+from .schema import (
+    SCHEMA_VERSION,
+    SCHEMA_VERSION_KEY,
+    dump as dump_schema,
+    migrate as migrate_schema,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def empty_account() -> dict:
+    """Return the data of a new account."""
+    return {
+        "income": 0,
+        "expenses": 0,
+        "balance": 0,
+        "income_items": [],
+        "expense_items": [],
+        "recurring_incomes": [],
+        "recurring_expenses": [],
+        "history": {},
+    }
+
+
+def _read_json_file(file_path, metrics=None):
+    with open(file_path, "r", encoding="utf-8") as file:
+        content = file.read()
+    start = time.perf_counter()
+    data = json.loads(content)
+    if metrics is not None:
+        metrics.record("json_parse", time.perf_counter() - start)
+    return data
+
+
+def _load_storage_file(file_path, metrics=None):
+    """
+    Read the storage file, migrate it to the current schema version and convert
+    items and recurring rules to models. Returns the data and whether it was migrated.
+    """
+    data, migrated = migrate_schema(_read_json_file(file_path, metrics))
+    return data_from_storage(data), migrated
+
+
+def _storage_payload(data: dict) -> dict:
+    """
+    Return the versioned storage payload of the data, with the models converted to dicts.
+    Built in the event loop: the data is shared and mutated there.
+    """
+    return dump_schema(data_to_storage(data))
+
+
+def _migrate_payload(version: int, data: dict) -> dict:
+    """Migrate the data of a Home Assistant storage payload from schema ``version``."""
+    data, _ = migrate_schema({**data, SCHEMA_VERSION_KEY: version})
+    return data
+
+
+def _write_json_file(file_path, data, metrics=None):
+    start = time.perf_counter()
+    content = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    if metrics is not None:
+        metrics.record("json_serialize", time.perf_counter() - start)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file:
+        file.write(content)
+    return len(content)
+
+
+class AccountsView(MutableMapping):
+    """The accounts of one config entry, read and written through the shared store."""
+
+    def __init__(self, data: dict, accounts: list):
+        """Initialize the view over ``accounts`` of the store data."""
+        self._data = data
+        self.accounts = accounts
+
+    def __getitem__(self, account):
+        if account not in self.accounts:
+            raise KeyError(account)
+        return self._data[account]
+
+    def __setitem__(self, account, account_data):
+        if account not in self.accounts:
+            raise KeyError(account)
+        self._data[account] = account_data
+
+    def __delitem__(self, account):
+        if account not in self.accounts:
+            raise KeyError(account)
+        del self._data[account]
+
+    def __iter__(self):
+        return (account for account in self.accounts if account in self._data)
+
+    def __len__(self):
+        return sum(1 for account in self.accounts if account in self._data)
+
+
+class StoresView(MutableMapping):
+    """Accounts of several stores, each read and written in the store owning it."""
+
+    def __init__(self, stores: dict):
+        """Initialize the view over ``stores`` ({account: store})."""
+        self.stores = stores
+
+    def __getitem__(self, account):
+        return self.stores[account].data[account]
+
+    def __setitem__(self, account, account_data):
+        self.stores[account].data[account] = account_data
+
+    def __delitem__(self, account):
+        del self.stores[account].data[account]
+
+    def __iter__(self):
+        return (account for account, store in self.stores.items() if account in store.data)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class BudgetStore:
+    """Budget data of every account, owned at the domain level."""
+
+    def __init__(self, hass: HomeAssistant, file_path: str):
+        """Initialize the store."""
+        self.hass = hass
+        self.file_path = file_path
+        self.data = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._save_lock = asyncio.Lock()
+
+    async def async_load(self, metrics=None) -> bool:
+        """Load the storage file once; returns True if its content was migrated."""
+        async with self._load_lock:
+            if self.loaded:
+                return False
+            migrated = False
+            loaded = await self._async_read(metrics)
+            if loaded is not None:
+                data, migrated = loaded
+                # Keep the same dict: entry views hold a reference to it
+                self.data.clear()
+                self.data.update(data)
+                _LOGGER.info("Loaded budget data from: %s", self.file_path)
+            self.loaded = True
+            return migrated
+
+    async def _async_read(self, metrics=None):
+        """Return the stored data as models and whether it was migrated, or None if nothing is stored."""
+        if not os.path.exists(self.file_path):
+            return None
+        return await self.hass.async_add_executor_job(_load_storage_file, self.file_path, metrics)
+
+    def view(self, accounts: list) -> AccountsView:
+        """Return the view of a config entry over its accounts, creating missing ones."""
+        for account in accounts:
+            if account not in self.data:
+                self.data[account] = empty_account()
+        return AccountsView(self.data, accounts)
+
+    async def async_update_accounts(self, added=(), removed=(), metrics=None) -> bool:
+        """
+        Create ``added`` and delete ``removed`` accounts with a single write.
+        Returns True if the store changed.
+        """
+        await self.async_load(metrics)
+        changed = False
+        for account in added:
+            if account not in self.data:
+                self.data[account] = empty_account()
+                changed = True
+        for account in removed:
+            if self.data.pop(account, None) is not None:
+                changed = True
+        if changed:
+            await self.async_save(metrics)
+        return changed
+
+    async def async_save(self, metrics=None):
+        """Write every account in one executor job; returns the number of bytes written."""
+        async with self._save_lock:
+            return await self.hass.async_add_executor_job(
+                _write_json_file, self.file_path, _storage_payload(self.data), metrics
+            )
+
+    async def async_flush(self) -> None:
+        """Write a pending delayed save now (every save of the file backend is immediate)."""
+
+
+class _BudgetDataStore(Store):
+    """Storage helper migrating older payloads with the storage schema migrations."""
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        return await self.hass.async_add_executor_job(_migrate_payload, old_major_version, old_data)
+
+
+class HassBudgetStore(BudgetStore):
+    """
+    Budget data persisted with the Home Assistant storage helper under ``.storage/``:
+    atomic versioned writes, coalesced by ``STORAGE_SAVE_DELAY`` and flushed on shutdown.
+    """
+
+    def __init__(self, hass: HomeAssistant, legacy_path: str):
+        """Initialize the store; ``legacy_path`` is the file imported when nothing is stored yet."""
+        super().__init__(hass, hass.config.path(STORAGE_DIR, STORAGE_KEY))
+        self.legacy_path = legacy_path
+        self._store = _BudgetDataStore(hass, SCHEMA_VERSION, STORAGE_KEY, atomic_writes=True)
+        self._pending = False
+
+    async def _async_read(self, metrics=None):
+        start = time.perf_counter()
+        stored = await self._store.async_load()
+        if metrics is not None:
+            metrics.record("json_parse", time.perf_counter() - start)
+        if stored is not None:
+            # Older schema versions were migrated and saved by the storage helper
+            return await self.hass.async_add_executor_job(data_from_storage, stored), False
+        if os.path.exists(self.legacy_path):
+            return await self._async_import_legacy(metrics), True
+        return None
+
+    async def _async_import_legacy(self, metrics=None) -> dict:
+        """
+        Import the storage file, once: accounts of entries still using the file backend stay in
+        the file, every other account moves to the storage helper and leaves the file, so no
+        account is kept by both backends.
+        """
+        data, _ = await self.hass.async_add_executor_job(_load_storage_file, self.legacy_path, metrics)
+        kept = _file_backend_accounts(self.hass)
+        imported = {account: account_data for account, account_data in data.items() if account not in kept}
+        _LOGGER.info("Imported budget data from file: %s", self.legacy_path)
+        if not kept:
+            return imported
+        # Written now, before the accounts leave the file
+        await self._store.async_save(data_to_storage(imported))
+        file_store = self.hass.data.get(DATA_STORE, {}).get(STORAGE_TYPE_FILE)
+        if file_store is not None:
+            await file_store.async_load(metrics)
+            for account in imported:
+                file_store.data.pop(account, None)
+            await file_store.async_save(metrics)
+        else:
+            remaining = {account: account_data for account, account_data in data.items() if account in kept}
+            await self.hass.async_add_executor_job(
+                _write_json_file, self.legacy_path, _storage_payload(remaining), metrics
+            )
+        return imported
+
+    def _data_to_save(self) -> dict:
+        # Called by the storage helper when the delayed write runs: nothing is pending anymore
+        self._pending = False
+        return data_to_storage(self.data)
+
+    async def async_save(self, metrics=None):
+        """Schedule a delayed write; saves requested meanwhile are coalesced into it."""
+        self._pending = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write a pending delayed save now."""
+        if not self._pending:
+            return
+        self._pending = False
+        async with self._save_lock:
+            await self._store.async_save(self._data_to_save())
+
+
+def _file_backend_accounts(hass: HomeAssistant) -> set:
+    """Return the accounts of the config entries keeping their data in the storage file."""
+    accounts = set()
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.data.get(CONF_STORAGE_TYPE, DEFAULT_STORAGE_TYPE) == STORAGE_TYPE_FILE:
+            accounts.update(entry.options.get(CONF_ACCOUNTS, entry.data.get(CONF_ACCOUNTS, ["default"])))
+    return accounts
+
+
+def get_store(hass: HomeAssistant, storage_type: str = DEFAULT_STORAGE_TYPE) -> BudgetStore:
+    """Return the domain-level store of a storage type, creating it on first use."""
+    stores = hass.data.setdefault(DATA_STORE, {})
+    store = stores.get(storage_type)
+    if store is None:
+        legacy_path = hass.config.path(DATA_STORAGE_FILE)
+        if storage_type == STORAGE_TYPE_STORE:
+            store = HassBudgetStore(hass, legacy_path)
+        else:
+            store = BudgetStore(hass, legacy_path)
+        stores[storage_type] = store
+    return store
+
+
+async def async_flush_stores(hass: HomeAssistant) -> None:
+    """Write the pending saves of every store and forget them (the next setup loads them again)."""
+    for store in hass.data.pop(DATA_STORE, {}).values():
+        await store.async_flush()
@@ -8,6 +8,11 @@
  * @author MendoxIta
  */
 
+// Listes virtualisées : hauteur fixe d'une ligne et lignes rendues hors de la zone visible
+const ROW_HEIGHT = 56;
+const VIRTUAL_VIEWPORT = 400;
+const VIRTUAL_OVERSCAN = 6;
+
 class BudgetTrackerCard extends HTMLElement {
   constructor() {
     super();
@@ -20,8 +25,22 @@ class BudgetTrackerCard extends HTMLElement {
     this._editingItem = null;
     this._isAddingItem = false;
     this._recurringType = 'income'; // Pour différencier le type lors d'ajout/édition d'élément récurrent
-    this._entityListeners = new Map();
+    this._subscription = null;
     this._boundHandleEvent = this._handleEvent.bind(this);
+    // Rendu incrémental : structure de la carte, contenu de l'onglet et lignes déjà rendues
+    this._shellKey = null;
+    this._contentKey = null;
+    this._contentHtml = null;
+    this._listItems = [];
+    this._listType = null;
+    this._rowCache = new Map();
+    // Instantané versionné renvoyé par budget_tracker/get_snapshot
+    this._snapshotVersion = null;
+    this._snapshotAccounts = {};
+    this._snapshotRequest = null;
+    this._snapshotPending = false;
+    this._snapshotUnsupported = false;
+    this._mutateUnsupported = false;
   }
 
   set hass(hass) {
@@ -49,6 +68,7 @@ class BudgetTrackerCard extends HTMLElement {
     if (shouldUpdate) {
       this._fetchData();
       this._render();
+      this._requestSnapshot();
     }
   }
 
@@ -128,14 +148,87 @@ class BudgetTrackerCard extends HTMLElement {
       };
     });
 
+    // Les données du dernier instantané sont plus récentes que les attributs des entités
+    this._applySnapshotAccounts();
+
     // Définir le compte par défaut si aucun n'est sélectionné
     if (!this._currentAccount && this._accounts.length > 0) {
       this._currentAccount = this._accounts[0].name;
     }
   }
 
+  _applySnapshotAccounts() {
+    this._accounts = this._accounts.map(account => {
+      const view = this._snapshotAccounts[account.name];
+      if (!view) return account;
+      return {
+        ...account,
+        income: view.income,
+        expenses: view.expenses,
+        balance: view.balance,
+        income_items: view.income_items,
+        expense_items: view.expense_items,
+        recurring_incomes: view.recurring_incomes,
+        recurring_expenses: view.recurring_expenses,
+        history: view.history,
+      };
+    });
+  }
+
+  _requestSnapshot(force = false) {
+    // Sans la commande websocket (ancienne intégration), relire les attributs des entités
+    if (this._snapshotUnsupported) {
+      this._fetchData();
+      this._render();
+      return Promise.resolve();
+    }
+    if (!this._hass || !this._accounts.length) return Promise.resolve();
+    // Une seule requête à la fois : les demandes reçues entre-temps sont regroupées
+    if (this._snapshotRequest) {
+      this._snapshotPending = true;
+      return this._snapshotRequest;
+    }
+    const message = {
+      type: 'budget_tracker/get_snapshot',
+      accounts: this._accounts.map(acc => acc.name),
+    };
+    if (this._snapshotVersion && !force) {
+      message.version = this._snapshotVersion;
+    }
+    this._snapshotRequest = this._hass.callWS(message)
+      .then(result => {
+        this._snapshotVersion = result.version;
+        if (result.not_modified) return;
+        const accounts = {};
+        Object.values(result.accounts).forEach(view => {
+          accounts[view.slug] = view;
+        });
+        this._snapshotAccounts = accounts;
+        this._applySnapshotAccounts();
+        this._render();
+      })
+      .catch(error => {
+        if (error && error.code === 'unknown_command') {
+          this._snapshotUnsupported = true;
+        } else {
+          console.error('Erreur lors de la récupération des données:', error);
+        }
+        this._fetchData();
+        this._render();
+      })
+      .finally(() => {
+        this._snapshotRequest = null;
+        if (this._snapshotPending) {
+          this._snapshotPending = false;
+          this._requestSnapshot();
+        }
+      });
+    return this._snapshotRequest;
+  }
+
   _render() {
     if (!this._hass || !this._accounts.length) {
+      this._shellKey = null;
       this.shadowRoot.innerHTML = `
         <ha-card header="Budget Tracker">
           <div class="card-content">
@@ -154,7 +247,38 @@ class BudgetTrackerCard extends HTMLElement {
       return;
     }
 
-    // Construire l'interface
+    // La structure de la carte (en-tête, comptes, onglets, styles) n'est reconstruite que si elle change
+    const shellKey = JSON.stringify([
+      this._config.title,
+      this._accounts.map(acc => acc.name),
+      this._currentAccount,
+      this._currentTab,
+    ]);
+    let body = this.shadowRoot.querySelector('.tab-content');
+    if (!body || shellKey !== this._shellKey) {
+      this._renderShell();
+      this._shellKey = shellKey;
+      this._contentKey = null;
+      this._contentHtml = null;
+      body = this.shadowRoot.querySelector('.tab-content');
+    }
+    this._renderContent(body, account);
+    
+    // Attacher les événements UNIQUEMENT si ce n'est pas déjà fait
+    if (!this._eventsAttached) {
+      this._attachEventListeners();
+      this._eventsAttached = true;
+    }
+  }
+
+  _renderContent(body, account) {
+    // Listes de revenus/dépenses : mise à jour ligne par ligne
+    if ((this._currentTab === 'income' || this._currentTab === 'expenses') &&
+        !this._isAddingItem && !this._editingItem) {
+      this._renderItemList(body, account, this._currentTab);
+      return;
+    }
+
     let content = '';
     
     switch (this._currentTab) {
@@ -177,6 +301,97 @@ class BudgetTrackerCard extends HTMLElement {
         content = this._renderOverview(account);
     }
 
+    // Ne toucher au DOM que si le contenu a changé
+    if (this._contentKey !== 'html' || content !== this._contentHtml) {
+      body.innerHTML = content;
+      this._contentKey = 'html';
+      this._contentHtml = content;
+    }
+  }
+
+  _renderItemList(body, account, type) {
+    const items = type === 'income' ? account.income_items : account.expense_items;
+    const key = `list:${type}`;
+    if (this._contentKey !== key) {
+      const isIncome = type === 'income';
+      body.innerHTML = `
+        <h3>${isIncome ? 'Revenus' : 'Dépenses'} du mois (<span class="item-count"></span>)</h3>
+        <div class="items-list virtual-list">
+          <div class="virtual-spacer"><div class="virtual-rows"></div></div>
+        </div>
+        <div class="empty-state">${isIncome ? 'Aucun revenu ce mois-ci' : 'Aucune dépense ce mois-ci'}</div>
+        <button class="btn">${isIncome ? 'Ajouter un revenu' : 'Ajouter une dépense'}</button>
+        <button class="btn btn-danger" id="delete-all-${isIncome ? 'income' : 'expenses'}" style="margin-left: 8px;">Tout supprimer</button>
+      `;
+      body.querySelector('.virtual-list').addEventListener(
+        'scroll', () => this._renderVisibleRows(), { passive: true }
+      );
+      this._contentKey = key;
+      this._contentHtml = null;
+      this._rowCache = new Map();
+    }
+    this._listItems = items;
+    this._listType = type;
+    body.querySelector('.item-count').textContent = items.length;
+    body.querySelector('.virtual-list').style.display = items.length ? '' : 'none';
+    body.querySelector('.empty-state').style.display = items.length ? 'none' : '';
+    this._renderVisibleRows();
+  }
+
+  _renderVisibleRows() {
+    const list = this.shadowRoot.querySelector('.virtual-list');
+    if (!list) return;
+    const items = this._listItems;
+    const viewport = list.clientHeight || VIRTUAL_VIEWPORT;
+    const start = Math.max(0, Math.floor(list.scrollTop / ROW_HEIGHT) - VIRTUAL_OVERSCAN);
+    const end = Math.min(items.length, Math.ceil((list.scrollTop + viewport) / ROW_HEIGHT) + VIRTUAL_OVERSCAN);
+    const rowsContainer = list.querySelector('.virtual-rows');
+    list.querySelector('.virtual-spacer').style.height = `${items.length * ROW_HEIGHT}px`;
+    rowsContainer.style.transform = `translateY(${start * ROW_HEIGHT}px)`;
+
+    // Réutiliser les lignes dont l'élément n'a pas changé
+    const rows = [];
+    const cache = new Map();
+    for (let index = start; index < end; index++) {
+      const item = items[index];
+      const signature = JSON.stringify(item);
+      let cached = this._rowCache.get(item.id);
+      if (!cached || cached.signature !== signature) {
+        const template = document.createElement('template');
+        template.innerHTML = this._renderItemRow(item, this._listType).trim();
+        cached = { signature, element: template.content.firstElementChild };
+      }
+      cache.set(item.id, cached);
+      rows.push(cached.element);
+    }
+    const current = rowsContainer.children;
+    if (current.length !== rows.length || rows.some((row, index) => current[index] !== row)) {
+      rowsContainer.replaceChildren(...rows);
+    }
+    this._rowCache = cache;
+  }
+
+  _renderItemRow(item, type) {
+    const isIncome = type === 'income';
+    return `
+      <div class="item" data-id="${item.id}">
+        <div class="item-details">
+          <div class="item-description">
+            ${item.description || 'Sans description'}
+            ${item.recurring_id ? '<span class="recurring-badge">Récurrent</span>' : ''}
+          </div>
+          <div class="item-category">${item.category || 'Sans catégorie'}</div>
+        </div>
+        <div class="item-amount ${isIncome ? 'income' : 'expenses'}">${isIncome ? '+' : '-'}${parseFloat(item.amount).toFixed(2)} €</div>
+        <div class="item-actions">
+          <button class="btn btn-small">Modifier</button>
+          <button class="btn btn-small btn-danger">Supprimer</button>
+        </div>
+      </div>
+    `;
+  }
+
+  _renderShell() {
     this.shadowRoot.innerHTML = `
       <ha-card>
         <div class="card-header">
@@ -206,7 +421,7 @@ class BudgetTrackerCard extends HTMLElement {
               <button class="tab-btn${this._currentTab === 'history' ? ' active' : ''}" data-tab="history">Historique</button>
             </div>
           </div>
-          ${content}
+          <div class="tab-content"></div>
         </div>
       </ha-card>
       <style>
@@ -380,6 +595,23 @@ class BudgetTrackerCard extends HTMLElement {
         .item-actions {
           display: flex;
         }
+        .virtual-list {
+          max-height: ${VIRTUAL_VIEWPORT}px;
+          overflow-y: auto;
+          position: relative;
+        }
+        .virtual-list .item {
+          height: ${ROW_HEIGHT}px;
+          box-sizing: border-box;
+          padding: 0;
+          overflow: hidden;
+        }
+        .virtual-list .item-description,
+        .virtual-list .item-category {
+          white-space: nowrap;
+          overflow: hidden;
+          text-overflow: ellipsis;
+        }
         .btn {
           background-color: var(--primary-color);
           color: white;
@@ -536,12 +768,6 @@ class BudgetTrackerCard extends HTMLElement {
         }
       </style>
     `;
-    
-    // Attacher les événements UNIQUEMENT si ce n'est pas déjà fait
-    if (!this._eventsAttached) {
-      this._attachEventListeners();
-      this._eventsAttached = true;
-    }
   }
 
   _renderOverview(account) {
@@ -596,79 +822,19 @@ class BudgetTrackerCard extends HTMLElement {
   }
 
   _renderIncomeTab(account) {
+    // La liste elle-même est rendue par _renderItemList
     if (this._isAddingItem) {
       return this._renderAddItemForm('income');
     }
-
-    if (this._editingItem) {
-      return this._renderEditItemForm('income');
-    }
-
-    const incomeCount = account.income_items.length;
-    return `
-      <h3>Revenus du mois (${incomeCount})</h3>
-      <div class="items-list">
-        ${incomeCount > 0 
-          ? account.income_items.map(item => `
-            <div class="item" data-id="${item.id}">
-              <div class="item-details">
-                <div class="item-description">
-                  ${item.description || 'Sans description'}
-                  ${item.recurring_id ? '<span class="recurring-badge">Récurrent</span>' : ''}
-                </div>
-                <div class="item-category">${item.category || 'Sans catégorie'}</div>
-              </div>
-              <div class="item-amount income">+${parseFloat(item.amount).toFixed(2)} €</div>
-              <div class="item-actions">
-                <button class="btn btn-small">Modifier</button>
-                <button class="btn btn-small btn-danger">Supprimer</button>
-              </div>
-            </div>
-          `).join('')
-          : `<div class="empty-state">Aucun revenu ce mois-ci</div>`
-        }
-      </div>
-      <button class="btn">Ajouter un revenu</button>
-      <button class="btn btn-danger" id="delete-all-income" style="margin-left: 8px;">Tout supprimer</button>
-    `;
+    return this._renderEditItemForm('income');
   }
 
   _renderExpensesTab(account) {
+    // La liste elle-même est rendue par _renderItemList
     if (this._isAddingItem) {
       return this._renderAddItemForm('expenses');
     }
-
-    if (this._editingItem) {
-      return this._renderEditItemForm('expenses');
-    }
-
-    const expenseCount = account.expense_items.length;
-    return `
-      <h3>Dépenses du mois (${expenseCount})</h3>
-      <div class="items-list">
-        ${expenseCount > 0 
-          ? account.expense_items.map(item => `
-            <div class="item" data-id="${item.id}">
-              <div class="item-details">
-                <div class="item-description">
-                  ${item.description || 'Sans description'}
-                  ${item.recurring_id ? '<span class="recurring-badge">Récurrent</span>' : ''}
-                </div>
-                <div class="item-category">${item.category || 'Sans catégorie'}</div>
-              </div>
-              <div class="item-amount expenses">-${parseFloat(item.amount).toFixed(2)} €</div>
-              <div class="item-actions">
-                <button class="btn btn-small">Modifier</button>
-                <button class="btn btn-small btn-danger">Supprimer</button>
-              </div>
-            </div>
-          `).join('')
-          : `<div class="empty-state">Aucune dépense ce mois-ci</div>`
-        }
-      </div>
-      <button class="btn">Ajouter une dépense</button>
-      <button class="btn btn-danger" id="delete-all-expenses" style="margin-left: 8px;">Tout supprimer</button>
-    `;
+    return this._renderEditItemForm('expenses');
   }
 
   _renderRecurringTab(account) {
@@ -1049,52 +1215,37 @@ class BudgetTrackerCard extends HTMLElement {
         
     // Appeler le service
     return this._hass.callService(domain, service, data)
-      .then(() => {        
-        // Définir un court délai pour laisser le temps au backend de traiter et émettre les événements
-        return new Promise(resolve => setTimeout(() => {
-          // Fermer les formulaires selon le service appelé
-          if ([
-            'add_income_item',
-            'add_expense_item',
-            'add_recurring_income',
-            'add_recurring_expense'
-          ].includes(service)) {
-            this._isAddingItem = false;
-          }
-          if ([
-            'add_recurring_income',
-            'add_recurring_expense'
-          ].includes(service)) {
-            this._currentTab = 'recurring';
-          }
-          if ([
-            'remove_item',
-            'remove_recurring_item',
-            'add_income_item',
-            'add_expense_item',
-            'add_recurring_income',
-            'add_recurring_expense'
-          ].includes(service)) {
-            this._editingItem = null;
-          }
-          // Force une actualisation immédiate des données
-          this._fetchData();
-          this._render();
-          // Ajout : forcer la mise à jour Home Assistant des entités après modification
-          if ([
-            'add_income_item',
-            'add_expense_item',
-            'remove_item',
-            'add_recurring_income',
-            'add_recurring_expense',
-            'remove_recurring_item'
-          ].includes(service)) {
-            this._refreshData();
-          }
-          // Désactiver l'indicateur de chargement
+      .then(() => {
+        // Fermer les formulaires selon le service appelé
+        if ([
+          'add_income_item',
+          'add_expense_item',
+          'add_recurring_income',
+          'add_recurring_expense'
+        ].includes(service)) {
+          this._isAddingItem = false;
+        }
+        if ([
+          'add_recurring_income',
+          'add_recurring_expense'
+        ].includes(service)) {
+          this._currentTab = 'recurring';
+        }
+        if ([
+          'remove_item',
+          'remove_recurring_item',
+          'add_income_item',
+          'add_expense_item',
+          'add_recurring_income',
+          'add_recurring_expense'
+        ].includes(service)) {
+          this._editingItem = null;
+        }
+        // Le service a déjà modifié les données : l'instantané suivant les contient
+        this._render();
+        return this._requestSnapshot().then(() => {
           this._setLoadingState(false);
-          resolve();
-        }, 300)); // Délai de 300ms pour laisser le temps au backend de propager les événements
+        });
       })
       .catch((error) => {
         console.error(`Erreur lors de ${description}:`, error);
@@ -1104,6 +1255,68 @@ class BudgetTrackerCard extends HTMLElement {
       });
   }
 
+  _mutate(operations, description, fallback) {
+    // Une seule requête : les opérations sont appliquées ensemble et la réponse contient le nouvel état
+    if (this._mutateUnsupported) {
+      return fallback();
+    }
+    this._setLoadingState(true);
+    return this._hass.callWS({ type: 'budget_tracker/mutate', operations })
+      .then(result => {
+        this._isAddingItem = false;
+        this._editingItem = null;
+        if (operations.some(operation => operation.op === 'add_recurring')) {
+          this._currentTab = 'recurring';
+        }
+        this._applyMutation(result.accounts);
+        this._render();
+        this._setLoadingState(false);
+      })
+      .catch(error => {
+        this._setLoadingState(false);
+        if (error && error.code === 'unknown_command') {
+          // Ancienne version de l'intégration : passer par les services
+          this._mutateUnsupported = true;
+          return fallback();
+        }
+        console.error(`Erreur lors de ${description}:`, error);
+        alert(`Une erreur est survenue lors de ${description}.`);
+        throw error;
+      });
+  }
+
+  _applyMutation(accounts) {
+    const patch = (account, changes) => {
+      const patched = {
+        ...account,
+        income: changes.income,
+        expenses: changes.expenses,
+        balance: changes.balance,
+      };
+      ['income_items', 'expense_items', 'recurring_incomes', 'recurring_expenses'].forEach(list => {
+        const removed = new Set(changes.removed.filter(entry => entry.list === list).map(entry => entry.id));
+        const updated = changes.changed.filter(entry => entry.list === list).map(entry => entry.item);
+        if (!removed.size && !updated.length) return;
+        const byId = new Map(updated.map(item => [item.id, item]));
+        const items = (account[list] || [])
+          .filter(item => !removed.has(item.id))
+          .map(item => {
+            const replacement = byId.get(item.id);
+            if (replacement) byId.delete(item.id);
+            return replacement || item;
+          });
+        patched[list] = items.concat(Array.from(byId.values()));
+      });
+      return patched;
+    };
+    Object.entries(accounts).forEach(([name, changes]) => {
+      this._accounts = this._accounts.map(acc => acc.name === name ? patch(acc, changes) : acc);
+      if (this._snapshotAccounts[name]) {
+        this._snapshotAccounts[name] = patch(this._snapshotAccounts[name], changes);
+      }
+    });
+  }
+
   _attachEventListeners() {
     // Délégation unique sur le shadowRoot
     this.shadowRoot.addEventListener('click', (e) => {
@@ -1282,17 +1495,28 @@ class BudgetTrackerCard extends HTMLElement {
     const serviceType = this._currentTab === 'income' ? 'add_income_item' : 'add_expense_item';
     const itemType = this._currentTab === 'income' ? 'revenu' : 'dépense';
 
-    // Utiliser notre méthode centralisée
-    this._callService(
-      'budget_tracker', 
-      serviceType, 
-      {
+    this._mutate(
+      [{
+        op: 'add',
         account: this._currentAccount,
+        type: this._currentTab === 'income' ? 'income' : 'expense',
         amount: amount,
         description: description,
         category: category
-      },
-      `l'ajout d'un élément de ${itemType}`
+      }],
+      `l'ajout d'un élément de ${itemType}`,
+      // Utiliser notre méthode centralisée
+      () => this._callService(
+        'budget_tracker', 
+        serviceType, 
+        {
+          account: this._currentAccount,
+          amount: amount,
+          description: description,
+          category: category
+        },
+        `l'ajout d'un élément de ${itemType}`
+      )
     );
   }
 
@@ -1331,12 +1555,16 @@ class BudgetTrackerCard extends HTMLElement {
       serviceData.end_date = endDate;
     }
 
-    // Utiliser notre méthode centralisée
-    this._callService(
-      'budget_tracker', 
-      serviceType, 
-      serviceData,
-      `l'ajout d'un élément de ${itemType}`
+    this._mutate(
+      [{ ...serviceData, op: 'add_recurring', type: this._recurringType === 'income' ? 'income' : 'expense' }],
+      `l'ajout d'un élément de ${itemType}`,
+      // Utiliser notre méthode centralisée
+      () => this._callService(
+        'budget_tracker', 
+        serviceType, 
+        serviceData,
+        `l'ajout d'un élément de ${itemType}`
+      )
     );
   }
 
@@ -1350,15 +1578,30 @@ class BudgetTrackerCard extends HTMLElement {
       return;
     }
 
-    // Pour mettre à jour un élément, nous devons d'abord le supprimer puis en ajouter un nouveau
     const itemId = this._editingItem;
     const itemType = type === 'income' ? 'revenu' : 'dépense';
-    
+
+    this._mutate(
+      [{
+        op: 'update',
+        account: this._currentAccount,
+        item_id: itemId,
+        amount: amount,
+        description: description,
+        category: category
+      }],
+      `la mise à jour de l'élément de ${itemType}`,
+      () => this._replaceItem(type, itemId, itemType, amount, description, category)
+    );
+  }
+
+  _replaceItem(type, itemId, itemType, amount, description, category) {
+    // Sans budget_tracker/mutate : supprimer l'élément puis en ajouter un nouveau
     // Afficher un indicateur de chargement
     this._setLoadingState(true);
 
     // Séquence d'appels asynchrones pour éviter les problèmes
-    this._callService(
+    return this._callService(
       'budget_tracker',
       'remove_item',
       {
@@ -1402,15 +1645,32 @@ class BudgetTrackerCard extends HTMLElement {
       return;
     }
 
-    // Pour mettre à jour un élément récurrent, nous devons d'abord le supprimer puis en ajouter un nouveau
     const itemId = this._editingItem;
     const itemType = isIncome ? 'revenu récurrent' : 'dépense récurrente';
-    
+
+    this._mutate(
+      [{
+        op: 'update_recurring',
+        account: this._currentAccount,
+        item_id: itemId,
+        amount: amount,
+        description: description,
+        category: category,
+        day_of_month: dayOfMonth,
+        end_date: endDate
+      }],
+      `la mise à jour de l'élément de ${itemType}`,
+      () => this._replaceRecurringItem(isIncome, itemId, itemType, amount, description, category, dayOfMonth, endDate)
+    );
+  }
+
+  _replaceRecurringItem(isIncome, itemId, itemType, amount, description, category, dayOfMonth, endDate) {
+    // Sans budget_tracker/mutate : supprimer l'élément récurrent puis en ajouter un nouveau
     // Afficher un indicateur de chargement
     this._setLoadingState(true);
     
     // Séquence d'appels asynchrones pour éviter les problèmes
-    this._callService(
+    return this._callService(
       'budget_tracker',
       'remove_recurring_item',
       {
@@ -1447,30 +1707,38 @@ class BudgetTrackerCard extends HTMLElement {
 
   _handleRemoveItem(type, itemId) {
     this._showConfirmationDialog('Êtes-vous sûr de vouloir supprimer cet élément ?', () => {
-      // Utiliser notre nouvelle méthode pour appeler le service
-      this._callService(
-        'budget_tracker',
-        'remove_item',
-        {
-          account: this._currentAccount,
-          item_id: itemId
-        },
-        'la suppression de l\'élément'
+      this._mutate(
+        [{ op: 'remove', account: this._currentAccount, item_id: itemId }],
+        'la suppression de l\'élément',
+        // Utiliser notre nouvelle méthode pour appeler le service
+        () => this._callService(
+          'budget_tracker',
+          'remove_item',
+          {
+            account: this._currentAccount,
+            item_id: itemId
+          },
+          'la suppression de l\'élément'
+        )
       );
     });
   }
 
   _handleRemoveRecurringItem(type, itemId) {
     this._showConfirmationDialog('Êtes-vous sûr de vouloir supprimer cet élément récurrent ?', () => {
-      // Utiliser notre nouvelle méthode pour appeler le service
-      this._callService(
-        'budget_tracker',
-        'remove_recurring_item',
-        {
-          account: this._currentAccount,
-          item_id: itemId
-        },
-        'la suppression de l\'élément récurrent'
+      this._mutate(
+        [{ op: 'remove_recurring', account: this._currentAccount, item_id: itemId }],
+        'la suppression de l\'élément récurrent',
+        // Utiliser notre nouvelle méthode pour appeler le service
+        () => this._callService(
+          'budget_tracker',
+          'remove_recurring_item',
+          {
+            account: this._currentAccount,
+            item_id: itemId
+          },
+          'la suppression de l\'élément récurrent'
+        )
       );
     });
   }
@@ -1483,16 +1751,20 @@ class BudgetTrackerCard extends HTMLElement {
     this._showConfirmationDialog(
       `Êtes-vous sûr de vouloir supprimer toutes les ${type === 'income' ? 'revenus' : 'dépenses'} du mois ?`,
       () => {
-        // Utiliser notre nouvelle méthode pour appeler le service
-        this._callService(
-          'budget_tracker',
-          'clear_month_items',
-          {
-            account: this._currentAccount,
-            clear_income: type === 'income',
-            clear_expenses: type === 'expenses'
-          },
-          `la suppression de tous les éléments de type ${type}`
+        this._mutate(
+          items.map(item => ({ op: 'remove', account: this._currentAccount, item_id: item.id })),
+          `la suppression de tous les éléments de type ${type}`,
+          // Utiliser notre nouvelle méthode pour appeler le service
+          () => this._callService(
+            'budget_tracker',
+            'clear_month_items',
+            {
+              account: this._currentAccount,
+              clear_income: type === 'income',
+              clear_expenses: type === 'expenses'
+            },
+            `la suppression de tous les éléments de type ${type}`
+          )
         );
       }
     );
@@ -1527,96 +1799,55 @@ class BudgetTrackerCard extends HTMLElement {
   }
 
   _subscribeEvents() {
-    // Abonnement aux événements de budget_tracker
-    this._hass.connection.subscribeEvents(
-      this._boundHandleEvent,
-      'budget_tracker_month_changed'
-    );
-    this._hass.connection.subscribeEvents(
+    // Une seule souscription : le flux de mises à jour de l'intégration
+    // (événements budget_tracker_data_updated et budget_tracker_month_changed, déjà regroupés)
+    this._unsubscribeEvents();
+    if (!this._hass || !this._hass.connection) return;
+    this._subscription = this._hass.connection.subscribeMessage(
       this._boundHandleEvent,
-      'budget_tracker_data_updated'
-    );
-
-    // Abonnement aux changements d'état des entités
-    this._subscribeEntityChanges();
+      { type: 'budget_tracker/subscribe_updates' }
+    ).catch(() => this._subscribeEntityChanges());
   }
 
   _unsubscribeEvents() {
-    // Nettoyage des abonnements aux événements
-    if (this._hass) {
-      this._hass.connection.removeEventListener(
-        'budget_tracker_month_changed',
-        this._boundHandleEvent
-      );
-      this._hass.connection.removeEventListener(
-        'budget_tracker_data_updated',
-        this._boundHandleEvent
-      );
+    // Nettoyage de la souscription
+    if (this._subscription) {
+      const subscription = this._subscription;
+      this._subscription = null;
+      subscription
+        .then(unsub => {
+          if (typeof unsub === 'function') {
+            unsub();
+          }
+        })
+        .catch(() => {});
     }
-
-    // Désabonnement des entités
-    this._entityListeners.forEach((unsub) => {
-      if (typeof unsub === 'function') {
-        unsub();
-      }
-    });
-    this._entityListeners.clear();
   }
 
-  _handleEvent(event) {
-    // Traiter les événements personnalisés
-    if (event.type === 'budget_tracker_data_updated' || 
-        event.type === 'budget_tracker_month_changed') {
+  _handleEvent(message) {
+    // Traiter les événements personnalisés relayés par le flux de l'intégration
+    const eventType = message.event || message.event_type;
+    if (eventType === 'budget_tracker_data_updated' || 
+        eventType === 'budget_tracker_month_changed') {
       
       // Afficher un indicateur de chargement temporaire
       this._setLoadingState(true);
       
-      // Attendre un court délai pour laisser Home Assistant mettre à jour les entités
-      setTimeout(() => {
-        this._fetchData();
-        this._render();
+      // L'instantané ne dépend pas de la mise à jour des entités : pas de délai nécessaire
+      this._requestSnapshot().then(() => {
         this._setLoadingState(false);
-      }, 350);
+      });
     }
   }
 
   _subscribeEntityChanges() {
-    // Se désabonner d'abord pour éviter les doublons
-    this._entityListeners.forEach((unsub) => {
-      if (typeof unsub === 'function') {
-        unsub();
-      }
-    });
-    this._entityListeners.clear();
-
-    // S'abonner aux changements d'état des entités pertinentes
-    if (this._config.entities) {
-      this._config.entities.forEach((entityId) => {
-        // Abonnement via la nouvelle API de Home Assistant
-        if (this._hass.connection && this._hass.connection.subscribeMessage) {
-          const unsub = this._hass.connection.subscribeMessage(
-            (message) => {
-              // Si l'état de l'entité a changé, rafraîchir les données
-              if (message.data && message.data.entity_id === entityId) {                
-                // Afficher un indicateur de chargement temporaire
-                this._setLoadingState(true);
-                
-                // Actualiser les données et l'interface
-                this._fetchData();
-                this._render();
-                
-                // Désactiver l'indicateur de chargement après un délai
-                setTimeout(() => {
-                  this._setLoadingState(false);
-                }, 200);
-              }
-            },
-            { type: 'subscribe_entities', entity_ids: [entityId] }
-          );
-          this._entityListeners.set(entityId, unsub);
-        }
-      });
-    }
+    // Sans le flux de l'intégration : une seule souscription pour toutes les entités de la carte
+    return this._hass.connection.subscribeMessage(
+      () => {
+        this._requestSnapshot();
+      },
+      { type: 'subscribe_entities', entity_ids: this._config.entities || [] }
+    );
   }
 
   _setLoadingState(isLoading) {
@@ -1645,13 +1876,13 @@ class BudgetTrackerCard extends HTMLElement {
         this._hass.callService('homeassistant', 'update_entity', { entity_id })
       )
     )
-      .then(() => {
-        // Attendre un court délai pour laisser le backend traiter
-        return new Promise(resolve => setTimeout(resolve, 300));
-      })
       .then(() => {
         this._fetchData();
         this._render();
+        // Forcer un instantané complet, même si la version n'a pas changé
+        return this._requestSnapshot(true);
+      })
+      .then(() => {
         this._setLoadingState(false);
       })
       .catch(error => {